@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Silver Hawk Trading - Alert levels (Supabase alert_levels table).
+Loads tracker price levels + zone notes with a cached local snapshot, and
+manages them from the CLI (used by step 4 of the analysis pipeline).
+
+Each run does one cheap watermark read (latest updated_at). The full table is
+only fetched when the watermark differs from the snapshot version. Remove levels
+with `remove` (sets is_active=false), a hard DELETE does not move the watermark."""
+
+import html
+import json
+import os
+import sys
+import urllib.parse
+from datetime import datetime, timezone
+
+from supabase_client import supabase_request, supabase_upsert
+
+SNAPSHOT_PATH = os.environ.get(
+    'ALERT_LEVELS_SNAPSHOT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'alert_levels.json'),
+)
+COLUMNS = 'symbol,name,emoji,direction,price,zone_type,note'
+
+
+# ── Snapshot ──
+
+def _read_snapshot():
+    try:
+        with open(SNAPSHOT_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(version, rows):
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    tmp = SNAPSHOT_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'version': version, 'rows': rows}, f, ensure_ascii=False)
+    os.replace(tmp, SNAPSHOT_PATH)
+
+
+# ── Loader ──
+
+def fetch_watermark():
+    """Latest updated_at in alert_levels ('' if empty, None on error)."""
+    try:
+        result = supabase_request('GET', 'alert_levels?select=updated_at&order=updated_at.desc&limit=1')
+    except Exception as e:
+        print(f'  Alert levels watermark error: {e}')
+        return None
+    if result is None:
+        return None
+    return result[0]['updated_at'] if result else ''
+
+
+def _snapshot_rows(snapshot):
+    """Rows of a snapshot; None if there is none or it is of an empty table."""
+    if not snapshot or not snapshot.get('version'):
+        return None
+    return snapshot['rows']
+
+
+def load_rows():
+    """Active alert level rows, from the snapshot while the watermark is unchanged.
+    Falls back to the last snapshot if Supabase is unreachable. Returns None when
+    there is no table data (table empty, or unreachable without a snapshot) and
+    [] when levels exist but all of them are deactivated."""
+    snapshot = _read_snapshot()
+    watermark = fetch_watermark()
+    if watermark is None:
+        return _snapshot_rows(snapshot)
+    if snapshot and snapshot.get('version') == watermark:
+        return _snapshot_rows(snapshot)
+    if watermark == '':
+        rows = []
+    else:
+        try:
+            rows = supabase_request('GET', f'alert_levels?select={COLUMNS}&is_active=eq.true&order=symbol,price')
+        except Exception as e:
+            print(f'  Alert levels fetch error: {e}')
+            rows = None
+        if rows is None:
+            return _snapshot_rows(snapshot)
+    _write_snapshot(watermark, rows)
+    print(f'  [alert levels refreshed: {len(rows)} rows, version {watermark or "empty"}]')
+    return rows if watermark else None
+
+
+def _text(value):
+    """Free text from the table, escaped for Telegram's HTML parse mode."""
+    return html.escape(value, quote=False) if value else value
+
+
+def config_from_rows(rows):
+    """Build (SYMBOLS, level rules, TRADING_ZONES) dicts as used by tracker_check.
+    Names, emojis and notes are HTML-escaped (alerts are sent with parse_mode=HTML)."""
+    symbols, rules, zones = {}, {}, {}
+    for row in rows:
+        sym = row['symbol']
+        meta = symbols.setdefault(sym, {'name': _text(row.get('name')) or sym, 'emoji': _text(row.get('emoji')) or ''})
+        if row.get('name'):
+            meta['name'] = _text(row['name'])
+        if row.get('emoji'):
+            meta['emoji'] = _text(row['emoji'])
+        levels = rules.setdefault(sym, {'above': [], 'below': []})
+        levels[row['direction']].append(row['price'])
+        if row.get('note'):
+            zones.setdefault(sym, {'zones': []})['zones'].append({
+                'type': row.get('zone_type') or '', 'price': row['price'],
+                'dir': row['direction'], 'note': _text(row['note']),
+            })
+    return symbols, rules, zones
+
+
+def rows_from_config(symbols, rules, zones):
+    """Flatten SYMBOLS/ALERT_RULES/TRADING_ZONES into alert_levels rows (for seeding)."""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for sym, levels in rules.items():
+        if not isinstance(levels, dict):
+            continue
+        meta = symbols.get(sym, {})
+        for direction in ('above', 'below'):
+            for price in levels.get(direction, []):
+                zone = next((z for z in zones.get(sym, {}).get('zones', [])
+                             if z['price'] == price and z['dir'] == direction), {})
+                rows.append({
+                    'symbol': sym, 'name': meta.get('name'), 'emoji': meta.get('emoji'),
+                    'direction': direction, 'price': price,
+                    'zone_type': zone.get('type'), 'note': zone.get('note'),
+                    'is_active': True, 'updated_at': now,
+                })
+    return rows
+
+
+# ── Admin ──
+
+def set_level(symbol, direction, price, zone_type=None, note=None, name=None, emoji=None):
+    """Add or update one level (upsert on symbol+direction+price)."""
+    row = {
+        'symbol': symbol.upper(), 'direction': direction, 'price': price,
+        'zone_type': zone_type, 'note': note, 'is_active': True,
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+    }
+    if name:
+        row['name'] = name
+    if emoji:
+        row['emoji'] = emoji
+    return supabase_upsert('alert_levels', [row], on_conflict='symbol,direction,price')
+
+
+def remove_level(symbol, direction, price):
+    """Deactivate one level (bumps the watermark, unlike a DELETE)."""
+    q = urllib.parse.quote
+    return supabase_request(
+        'PATCH',
+        f'alert_levels?symbol=eq.{q(symbol.upper())}&direction=eq.{direction}&price=eq.{price}',
+        {'is_active': False, 'updated_at': datetime.now(timezone.utc).isoformat()},
+    )
+
+
+def seed_from_tracker():
+    """Seed the table from the built-in defaults in tracker_check.py."""
+    import tracker_check as tc
+    rows = rows_from_config(tc.SYMBOLS, tc.ALERT_RULES, tc.TRADING_ZONES)
+    written = supabase_upsert('alert_levels', rows, on_conflict='symbol,direction,price')
+    print(f'Seeded {written or 0}/{len(rows)} alert levels.')
+
+
+def list_levels():
+    rows = supabase_request('GET', f'alert_levels?select={COLUMNS}&is_active=eq.true&order=symbol,price') or []
+    current = None
+    for r in rows:
+        if r['symbol'] != current:
+            current = r['symbol']
+            print(f'\n  {r.get("emoji") or ""} {current} {r.get("name") or ""}')
+        note = f' - {r["note"]}' if r.get('note') else ''
+        print(f'    {r["direction"]:<6} {r["price"]:>10} {r.get("zone_type") or "":<7}{note}')
+    print(f'\nTotal: {len(rows)} levels')
+
+
+USAGE = """
+Silver Hawk Trading - Alert Levels
+
+Usage:
+  python alert_levels.py list                                        Show active levels
+  python alert_levels.py set NVDA above 200 SELL "Teilgewinne 25%"   Add/update a level
+  python alert_levels.py remove NVDA above 200                       Deactivate a level
+  python alert_levels.py seed                                        Seed from tracker_check.py defaults
+"""
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(USAGE)
+        sys.exit(1)
+
+    cmd = sys.argv[1].lower()
+
+    if cmd == 'list':
+        list_levels()
+    elif cmd == 'set':
+        if len(sys.argv) < 5 or sys.argv[3] not in ('above', 'below'):
+            print('Usage: python alert_levels.py set SYMBOL above|below PRICE [TYPE] ["Note"]')
+            sys.exit(1)
+        zone_type = sys.argv[5].upper() if len(sys.argv) > 5 else None
+        note = sys.argv[6] if len(sys.argv) > 6 else None
+        ok = set_level(sys.argv[2], sys.argv[3], float(sys.argv[4]), zone_type, note)
+        print(f'Set: {sys.argv[2].upper()} {sys.argv[3]} {sys.argv[4]}' if ok else 'Failed to set level')
+    elif cmd == 'remove':
+        if len(sys.argv) < 5:
+            print('Usage: python alert_levels.py remove SYMBOL above|below PRICE')
+            sys.exit(1)
+        ok = remove_level(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+        print(f'Deactivated: {sys.argv[2].upper()} {sys.argv[3]} {sys.argv[4]}' if ok else 'Failed to deactivate level')
+    elif cmd == 'seed':
+        seed_from_tracker()
+    else:
+        print(USAGE)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Silver Hawk Trading - Screener Backtest.
+Walk-forward replay of the morning screener over the cached daily bars of the
+whole universe: the calc_technicals() fields, the hard gates and the v4
+scoring are rebuilt for every trading day, and the forward 1/5/10-day returns
+of each day's top-N LONG and SHORT picks (score >= MIN_SCORE) are compared
+with the average of everything that passed the gates that day.
+
+Nothing runs per day: indicators.py computes each indicator once over the full
+history (symbols x bars), the screener fields are derived for all bars at once,
+scoring.score() scores the whole matrix in one call and the picks are ranked
+per date column. Enrichment (short interest, analyst rating) and the intraday
+timeframes have no history and score as missing. bar_store.py keeps ~2y of
+daily bars, longer --period runs download the older history again.
+
+    python3 backtest.py                                  # screener universe, 2y
+    python3 backtest.py --universe sp500 --period 5y --top 10 --min-score 30"""
+
+import sys
+
+from governor import report
+from morning_screener import (
+    DAILY_CHUNK, FUTURES, MIN_SCORE, MIN_VOLUME, TOP_N, UNIVERSE, build_universe,
+)
+
+PERIOD = '2y'
+HORIZONS = (1, 5, 10)  # forward returns in trading days
+
+
+# ── Bars ──
+
+def load_bars(symbols, period=PERIOD):
+    """Daily bars from the bar cache (only missing bars are downloaded)."""
+    from bar_store import get_bars
+    frames = {}
+    for i in range(0, len(symbols), DAILY_CHUNK):
+        frames.update(get_bars(symbols[i:i + DAILY_CHUNK], period=period))
+    return frames
+
+
+def _lag(x, n):
+    """Value n bars earlier (n < 0: later) for every bar; NaN where missing."""
+    import numpy as np
+    out = np.full_like(x, np.nan)
+    if n > 0:
+        out[:, n:] = x[:, :-n]
+    elif n < 0:
+        out[:, :n] = x[:, -n:]
+    else:
+        out[:] = x
+    return out
+
+
+# ── Screener Fields (all bars at once) ──
+
+def _divergence(close, rsi, lookback=20):
+    """detect_rsi_divergence() for every bar: +1 bullish, -1 bearish, 0 none.
+    Swing points only depend on the 5 bars around them, so they are found
+    once; the last two inside each bar's lookback window come from a running
+    "last swing so far" index."""
+    import numpy as np
+    valid = ~np.isnan(rsi)
+    with np.errstate(invalid='ignore'):
+        lows = valid.copy()
+        highs = valid.copy()
+        for n in (1, 2, -1, -2):
+            lows &= close < _lag(close, n)
+            highs &= close > _lag(close, n)
+    idx = np.arange(close.shape[1])
+    seen = np.cumsum(valid, axis=1).astype(float)
+    enough = (seen - np.nan_to_num(_lag(seen, lookback)) >= lookback - 5) & (idx >= lookback - 1)
+    start = idx - (lookback - 3)  # first swing candidate inside the window
+
+    def last_two(swings):
+        last = np.maximum.accumulate(np.where(swings, idx, -1), axis=1)
+        cur = _lag(last.astype(float), 2)  # candidates end 2 bars before the newest
+        cur = np.where(np.isnan(cur), -1, cur).astype(int)
+        prev = np.take_along_axis(last, np.clip(cur - 1, 0, None), axis=1)
+        found = enough & (cur >= start) & (prev >= start)
+        at = [np.clip(cur, 0, None), np.clip(prev, 0, None)]
+        return (found, *(np.take_along_axis(x, i, axis=1) for x in (close, rsi) for i in at))
+
+    found, c_cur, c_prev, r_cur, r_prev = last_two(lows)
+    bullish = found & (c_cur < c_prev) & (r_cur > r_prev)
+    found, c_cur, c_prev, r_cur, r_prev = last_two(highs)
+    bearish = found & (c_cur > c_prev) & (r_cur < r_prev)
+    return np.where(bullish, 1, np.where(bearish, -1, 0))
+
+
+def screener_fields(close, high, low, volume, futures):
+    """The calc_technicals() fields for every bar of right-aligned bar
+    matrices, as scoring columns. Returns (cols, passed): `passed` mirrors
+    passes_hard_gates() (no row -> not passed)."""
+    import numpy as np
+    import indicators as ind
+
+    n_bars = np.cumsum(~np.isnan(close), axis=1)
+    prev = _lag(close, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change_pct = np.round(np.where(n_bars >= 2, (close - prev) / prev * 100, 0.0), 2)
+
+        # ── RSI + delta/range/divergence ──
+        rsi_m = ind.rsi(close)
+        rsi = np.round(rsi_m, 1)
+        rsi_delta = np.round(rsi - _lag(rsi_m, 5), 1)
+        n_rsi = np.cumsum(~np.isnan(rsi_m), axis=1)
+        hi, lo, extreme = rsi_m.copy(), rsi_m.copy(), np.zeros(close.shape, dtype=bool)
+        for n in range(20):
+            r = _lag(rsi_m, n)
+            hi, lo = np.fmax(hi, r), np.fmin(lo, r)
+            extreme |= (r < 35) | (r > 65)
+        has_range = n_rsi >= 20
+        rsi_range = np.round(hi - lo, 1)
+        divergence = _divergence(close, rsi_m)
+
+        # ── MACD histogram ──
+        _, _, hist = ind.macd(close)
+        has_macd = n_bars >= 35
+        macd = np.where(has_macd, np.round(hist, 4), np.nan)
+        macd_prev = np.where(has_macd, np.round(_lag(hist, 1), 4), np.nan)
+
+        # ── ATR%, ADX, SMAs ──
+        atr_pct = np.round(ind.atr(high, low, close) / close * 100, 2)
+        adx = np.round(ind.adx(high, low, close)[0], 1)
+        dist = {}
+        for period in (50, 200):
+            s = np.round(ind.sma(close, period), 2)
+            dist[period] = np.round(np.where(s != 0, (close - s) / s * 100, np.nan), 2)
+
+        # ── Volume (directional) ──
+        avg_vol = np.floor(np.nan_to_num(ind.sma(volume, 20), nan=0))
+        vol_today = np.nan_to_num(volume, nan=0)
+        partial = (avg_vol > 0) & (vol_today < avg_vol * 0.1) & (n_bars >= 2)
+        vol_today = np.floor(np.where(partial, np.nan_to_num(_lag(volume, 1), nan=0), vol_today))
+        vol_ratio = np.where(avg_vol > 0, np.round(vol_today / avg_vol, 2), 0.0)
+
+        # ── Bollinger: band + width percentile of the last 120 bars ──
+        upper, lower, width = ind.bollinger(close)
+        below = np.zeros(close.shape)
+        seen = np.zeros(close.shape)
+        for n in range(120):
+            w = _lag(width, n)
+            below += w < width
+            seen += ~np.isnan(w)
+        bb_pctl = np.round(np.where(np.isnan(width) | (seen == 0), np.nan, below / seen * 100), 1)
+
+        change_5d = np.round(np.where(n_bars >= 6, (close - _lag(close, 5)) / _lag(close, 5) * 100,
+                                      np.nan), 2)
+
+        valid = (n_bars >= 30) & (close > 0) & ~np.isnan(rsi)
+        liquid = (avg_vol >= MIN_VOLUME) & ~(has_range & ((rsi_range < 15) | ~extreme))
+        passed = valid & (futures[:, None] | liquid)
+
+    cols = {
+        'rsi': rsi, 'rsi_delta': rsi_delta,
+        'dist200': dist[200], 'dist50': dist[50],
+        'divergence': divergence,
+        'macd': macd, 'macd_prev': macd_prev,
+        'macd_up': has_macd & (macd > macd_prev), 'macd_down': has_macd & ~(macd > macd_prev),
+        'atr_pct': atr_pct, 'adx': adx,
+        'vol_ratio': vol_ratio, 'change_pct': change_pct,
+        'bb_pctl': bb_pctl, 'bb_ok': (upper - lower) > 0,
+        # No history for enrichment and intraday timeframes: scored as missing
+        'short_pct': 0.0, 'rating': '', 'change_5d': change_5d,
+        'n_tf': 0, 'agree_long': 0, 'against_long': 0, 'agree_short': 0, 'against_short': 0,
+    }
+    return cols, passed
+
+
+# ── Walk-Forward ──
+
+def _to_dates(frames, symbols, width):
+    """(sorted trading dates, symbols x width grid column of every bar)."""
+    import numpy as np
+    import pandas as pd
+    dates = pd.DatetimeIndex(sorted(set().union(*(frames[s].index for s in symbols))))
+    slot = np.full((len(symbols), width), -1)
+    for i, sym in enumerate(symbols):
+        idx = frames[sym].index[frames[sym]['Close'].notna().values]
+        slot[i, width - len(idx):] = dates.get_indexer(idx)
+    return dates, slot
+
+
+def run(frames, top_n=TOP_N, min_score=MIN_SCORE, horizons=HORIZONS):
+    """Replay the screener over all bars in `frames` ({symbol: DataFrame}).
+    Returns {'dates', 'symbols', 'passed' (per day), direction: {horizon: stats}}."""
+    import numpy as np
+    import indicators as ind
+    import scoring
+
+    symbols, m = ind.from_frames(frames)
+    close = m['Close']
+    futures = np.array([s in FUTURES for s in symbols])
+    cols, passed = screener_fields(close, m['High'], m['Low'], m['Volume'], futures)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fwd = {h: (_lag(close, -h) / close - 1) * 100 for h in horizons}
+
+    # Own bars -> common date grid (symbols x dates), so every column is one day
+    dates, slot = _to_dates(frames, symbols, close.shape[1])
+    on_grid = slot >= 0
+    rows = np.nonzero(on_grid)[0]
+
+    def grid(x, fill):
+        out = np.full((len(symbols), len(dates)), fill, dtype=np.asarray(x).dtype)
+        out[rows, slot[on_grid]] = x[on_grid]
+        return out
+
+    ok = grid(passed, False)
+    fwd = {h: grid(r, np.nan) for h, r in fwd.items()}
+    result = {'dates': dates, 'symbols': symbols, 'passed': ok.sum(axis=0)}
+    for direction in scoring.RULES:
+        scores, _ = scoring.score(cols, direction)
+        ranked = np.where(ok, grid(scores, -1), -1)
+        # Same order as build_message(): score desc, ties in symbol order
+        order = np.argsort(-ranked, axis=0, kind='stable')[:top_n]
+        top = np.take_along_axis(ranked, order, axis=0)
+        picks = np.zeros(ok.shape, dtype=bool)
+        np.put_along_axis(picks, order, top >= min_score, axis=0)
+        sign = 1 if direction == 'LONG' else -1
+        stats = {}
+        for h, r in fwd.items():
+            have = ~np.isnan(r)
+            pick_r = sign * r[picks & have]
+            base_r = sign * r[ok & have]
+            stats[h] = {
+                'n': len(pick_r),
+                'days': int(np.any(picks & have, axis=0).sum()),
+                'mean': float(pick_r.mean()) if len(pick_r) else None,
+                'median': float(np.median(pick_r)) if len(pick_r) else None,
+                'hit': float((pick_r > 0).mean() * 100) if len(pick_r) else None,
+                'base': float(base_r.mean()) if len(base_r) else None,
+            }
+        result[direction] = stats
+    return result
+
+
+def format_report(result, label, top_n=TOP_N, min_score=MIN_SCORE):
+    dates = result['dates']
+    lines = [f'  Backtest {label}: {len(result["symbols"])} symbols, '
+             f'{dates[0]:%Y-%m-%d}..{dates[-1]:%Y-%m-%d} ({len(dates)} days)',
+             f'  Top {top_n} | Score Min: {min_score} | '
+             f'Bestanden: {result["passed"].mean():.0f} symbols/day']
+
+    def pct(v):
+        return f'{v:+.2f}%' if v is not None else '   n/a'
+
+    for direction in ('LONG', 'SHORT'):
+        lines.append(f'\n  {direction} (return in trade direction)')
+        for h, s in result[direction].items():
+            edge = s['mean'] - s['base'] if s['mean'] is not None and s['base'] is not None else None
+            hit = f'{s["hit"]:.0f}%' if s['hit'] is not None else 'n/a'
+            lines.append(f'    {h:>2}d: {pct(s["mean"])} (median {pct(s["median"])}, hit {hit}, '
+                         f'{s["n"]} picks on {s["days"]} days) | all {pct(s["base"])} | '
+                         f'edge {pct(edge)}')
+    return '\n'.join(lines)
+
+
+def main(universe=UNIVERSE, period=PERIOD, top_n=TOP_N, min_score=MIN_SCORE):
+    import time
+    print(f'  Building universe ({universe})...')
+    index_syms = build_universe(universe)[0]
+    symbols = sorted(index_syms | FUTURES)
+    print(f'  Loading {period} of daily bars for {len(symbols)} symbols...')
+    frames = load_bars(symbols, period)
+    if not frames:
+        print('  No bars to backtest.')
+        return
+    t0 = time.perf_counter()
+    result = run(frames, top_n, min_score)
+    print(f'  Replayed in {time.perf_counter() - t0:.1f}s\n')
+    print(format_report(result, universe, top_n, min_score))
+
+
+if __name__ == '__main__':
+    def arg(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    main(arg('--universe', UNIVERSE), arg('--period', PERIOD),
+         int(arg('--top', TOP_N)), int(arg('--min-score', MIN_SCORE)))
+    report()
@@ -0,0 +1,242 @@
+"""Local OHLCV bar cache with incremental append.
+Used by morning_screener.py, update_stocks.py, portfolio_check.py, reddit_gems.py
+and the /analyse-stock data collection step.
+
+Bars are stored per symbol and interval as one memory-mapped columnar .npy file
+(rows: timestamp, open, high, low, close, volume). On each run only the missing
+tail since the last stored bar is downloaded (in one batch per start date) and
+merged in. The last stored bar is always refetched because it may have been a
+partial bar. In GitHub Actions the directory is restored via actions/cache.
+
+Yahoo serves split/dividend-adjusted prices, so after a corporate action the
+whole history moves to a new price basis. The tail download therefore starts
+one completed bar earlier; if that overlapping bar's close no longer matches
+the cache, the symbol's cached bars are discarded and the full period is
+downloaded again instead of mixing two price bases."""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+CACHE_DIR = os.environ.get(
+    'BAR_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'bars'),
+)
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+RETENTION_DAYS = 800  # Keep ~2y of bars per symbol, enough for SMA200 + backtests
+INTRADAY_RETENTION_DAYS = 60  # Intraday bars: Yahoo serves 15m only for ~60 days anyway
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+ADJUST_TOLERANCE = 1e-4  # relative close difference on the overlap bar that means "re-adjusted"
+
+TS_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '7d': 7, '1mo': 31, '60d': 60, '3mo': 92, '6mo': 183,
+    '1y': 366, '2y': 731, '730d': 730, '5y': 1827,
+}
+
+
+def _period_days(period):
+    if period not in PERIOD_DAYS:
+        raise ValueError(f'Unsupported period: {period}')
+    return PERIOD_DAYS[period]
+
+
+def _key(symbol, interval):
+    safe = symbol.replace('/', '_').replace('=', '_eq_').replace('^', '_idx_')
+    return f'{safe}__{interval}'
+
+
+def _path(symbol, interval):
+    return os.path.join(CACHE_DIR, f'{_key(symbol, interval)}.npy')
+
+
+def _index_path():
+    return os.path.join(CACHE_DIR, 'index.json')
+
+
+def _load_index():
+    try:
+        with open(_index_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _index_path() + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp, _index_path())
+
+
+# ── Frame <-> Columns ──
+
+def _to_columns(df):
+    """DataFrame (DatetimeIndex, OHLCV columns) -> 6 x n float64 array."""
+    import numpy as np
+    idx = df.index
+    if idx.tz is not None:
+        idx = idx.tz_convert('UTC').tz_localize(None)
+    ts = idx.values.astype('datetime64[s]').astype('int64').astype(float)
+    cols = [ts] + [df[f].values.astype(float) if f in df else np.full(len(df), np.nan) for f in FIELDS]
+    return np.vstack(cols)
+
+
+def _to_frame(cols):
+    """6 x n float64 array -> DataFrame with a naive UTC DatetimeIndex."""
+    import numpy as np
+    import pandas as pd
+    idx = pd.DatetimeIndex(np.asarray(cols[0]).astype('int64').astype('datetime64[s]'), name='Date')
+    return pd.DataFrame({f: np.array(cols[i + 1]) for i, f in enumerate(FIELDS)}, index=idx)
+
+
+# ── Store ──
+
+def load(symbol, interval='1d'):
+    """Load cached bars for one symbol as a DataFrame, or None if not cached."""
+    import numpy as np
+    path = _path(symbol, interval)
+    if not os.path.exists(path):
+        return None
+    try:
+        cols = np.load(path, mmap_mode='r')
+    except (OSError, ValueError) as e:
+        print(f'  Bar cache {symbol}: unreadable ({e}), refetching')
+        return None
+    return _to_frame(cols)
+
+
+def save(symbol, interval, df):
+    """Write bars for one symbol atomically (temp file + rename)."""
+    import numpy as np
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _path(symbol, interval)
+    tmp = path + '.tmp.npy'
+    np.save(tmp, _to_columns(df))
+    os.replace(tmp, path)
+
+
+def merge(cached, fresh):
+    """Merge freshly downloaded bars into cached ones (fresh bars win)."""
+    import pandas as pd
+    if cached is None or cached.empty:
+        return fresh
+    if fresh is None or fresh.empty:
+        return cached
+    out = pd.concat([cached, fresh])
+    return out[~out.index.duplicated(keep='last')].sort_index()
+
+
+def rebased(cached, fresh):
+    """True if the fresh tail is on a different price basis than the cache:
+    the last completed cached bar was refetched and its close moved."""
+    if cached is None or fresh is None or len(cached) < 2:
+        return False
+    ref = cached.index[-2]
+    if ref not in fresh.index:
+        return False
+    before, after = float(cached['Close'].iloc[-2]), float(fresh.loc[ref, 'Close'])
+    return abs(after - before) > ADJUST_TOLERANCE * abs(before)
+
+
+def _normalize(df):
+    """Keep only OHLCV columns, drop bars without a close, naive UTC index."""
+    df = df[[f for f in FIELDS if f in df]].dropna(subset=['Close'])
+    if df.index.tz is not None:
+        df = df.copy()
+        df.index = df.index.tz_convert('UTC').tz_localize(None)
+    return df
+
+
+def _download(symbols, interval, start=None, period=None):
+    """One yf.download for a group of symbols. Returns {symbol: DataFrame}."""
+    import yfinance as yf
+    from governor import call
+    kwargs = {'start': start.strftime('%Y-%m-%d')} if start else {'period': period}
+    batch = call('yahoo', yf.download, symbols, interval=interval, group_by='ticker',
+                 threads=True, progress=False, **kwargs)
+    frames = {}
+    for sym in symbols:
+        try:
+            df = batch if len(symbols) == 1 and 'Close' in batch else batch[sym]
+            df = _normalize(df)
+            if len(df):
+                frames[sym] = df
+        except KeyError:
+            continue  # Not in the batch: reported as missing by get_bars()
+    return frames
+
+
+def get_bars(symbols, period='1y', interval='1d'):
+    """Return {symbol: DataFrame} with at least `period` of bars per symbol.
+    Cached symbols only download the tail since their last stored bar; symbols
+    without (enough) cached history are downloaded in full. Symbols without any
+    data are left out."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    need_from = now - timedelta(days=_period_days(period))
+    index = _load_index()
+
+    cached = {}
+    groups = {}  # fetch start date (or None = full period) -> symbols
+    for sym in symbols:
+        key = _key(sym, interval)
+        df = load(sym, interval)
+        covered = index.get(key, {}).get('covered_from')
+        if df is None or len(df) < 2 or covered is None or covered > need_from.strftime(TS_FORMAT):
+            groups.setdefault(None, []).append(sym)
+            continue
+        cached[sym] = df
+        # From the last completed bar: it overlaps the cache (see rebased())
+        groups.setdefault(df.index[-2].date(), []).append(sym)
+
+    fresh = {}
+    for start, syms in groups.items():
+        try:
+            if start is None:
+                fresh.update(_download(syms, interval, period=period))
+            else:
+                fresh.update(_download(syms, interval, start=start))
+        except Exception as e:
+            print(f'  Bar download failed ({len(syms)} symbols): {e}')
+
+    # Split/dividend since the last run: drop the old basis, refetch in full
+    resync = [sym for sym in cached if rebased(cached[sym], fresh.get(sym))]
+    if resync:
+        print(f'  Prices re-adjusted (split/dividend) for {len(resync)} symbols, refetching: '
+              f'{", ".join(resync[:20])}')
+        for sym in resync:
+            del cached[sym], fresh[sym]
+        try:
+            fresh.update(_download(resync, interval, period=period))
+        except Exception as e:
+            print(f'  Bar download failed ({len(resync)} symbols): {e}')
+
+    retention = RETENTION_DAYS if interval in DAILY_INTERVALS else INTRADAY_RETENTION_DAYS
+    keep_from = now - timedelta(days=max(retention, _period_days(period)))
+    result = {}
+    for sym in symbols:
+        key = _key(sym, interval)
+        df = merge(cached.get(sym), fresh.get(sym))
+        if df is None or df.empty:
+            continue
+        df = df[df.index >= keep_from]
+        if sym in fresh:
+            save(sym, interval, df)
+            entry = index.setdefault(key, {})
+            if sym not in cached:
+                entry['covered_from'] = need_from.strftime(TS_FORMAT)
+            else:
+                entry['covered_from'] = max(entry['covered_from'], keep_from.strftime(TS_FORMAT))
+            entry['last_fetch'] = now.strftime(TS_FORMAT)
+        result[sym] = df[df.index >= need_from]
+
+    if fresh:
+        _save_index(index)
+    missing = [sym for sym in symbols if sym not in result]
+    if missing:
+        from governor import record_drop
+        record_drop('yahoo', len(missing))
+        print(f'  No bars for {len(missing)} symbols: {", ".join(missing[:20])}')
+    return result
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Silver Hawk Trading - Hot Path Benchmarks.
+Times the per-run hot paths of the jobs on fixed inputs at 10, 100, 1,000 and
+5,000 symbols, fully offline:
+
+  calc_technicals        morning_screener daily technicals (1y of bars)
+  adx                    indicators.adx on the symbols x bars matrix
+  bollinger              indicators.bollinger + bb_width_percentile
+  rsi_divergence         morning_screener.detect_rsi_divergence per symbol
+  scoring                LONG + SHORT scores (score_candidates)
+  build_message          screener Telegram message incl. ranking + signal texts
+  check_alerts           tracker alert checks (8 levels per symbol)
+
+Inputs are synthetic (seeded random walks) or, with --tape, the daily bars of
+a recorder.py tape, repeated until each size is reached. Every run is
+appended to BENCH_PATH (JSON, tagged with the git commit) and compared with
+the previous run, so slowdowns show up between commits.
+
+    python3 benchmark.py [--sizes 10,100,1000,5000] [--only adx,scoring] [--repeat 3]
+                         [--tape .cache/tapes/morning_screener.tape] [--no-save]"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from recorder import REPLAY_ENV
+
+for _var, _value in REPLAY_ENV.items():
+    os.environ.setdefault(_var, _value)  # the job modules need credentials to import
+
+BENCH_PATH = os.environ.get(
+    'BENCH_RESULTS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'benchmarks.json'),
+)
+SIZES = (10, 100, 1000, 5000)
+REPEAT = 3
+BARS = 260        # one year of daily bars, as scanned by the screener
+LEVELS = 8        # alert levels per symbol for check_alerts
+HISTORY = 200     # runs kept in BENCH_PATH
+SLOWER = 1.10     # flag results more than 10% slower than the previous run
+NOISE = 0.001     # ... and more than 1 ms slower (sub-ms timings jitter)
+
+
+# ── Inputs ──
+
+def synthetic_frames(n, bars=BARS, seed=42):
+    """{symbol: OHLCV DataFrame}: seeded random walks, every 10th symbol with
+    a shorter history (recent listing)."""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2026-01-02', periods=bars)
+    frames = {}
+    for i in range(n):
+        length = bars if i % 10 else int(rng.integers(40, bars))
+        drift, vol = rng.normal(0.0004, 0.0008), rng.uniform(0.01, 0.04)
+        close = rng.uniform(10, 500) * np.exp(np.cumsum(rng.normal(drift, vol, length)))
+        spread = close * rng.uniform(0.002, 0.03, length)
+        frames[f'S{i:04d}'] = pd.DataFrame({
+            'Open': close, 'High': close + spread, 'Low': close - spread, 'Close': close,
+            'Volume': rng.lognormal(14, 1, length).round(),
+        }, index=index[-length:])
+    return frames
+
+
+def tape_frames(path, n):
+    """Daily bars recorded by recorder.py, repeated (as new symbols) up to n."""
+    import ast
+    from recorder import Tape
+    recorded = {}
+    for key, answers in Tape(path, 'replay').entries.items():
+        if key[0] != 'yf.download' or "('interval', '1d')" not in key[2]:
+            continue
+        symbols = ast.literal_eval(key[1])
+        for ok, batch in answers:
+            if not ok or batch is None or batch.empty:
+                continue
+            for sym in symbols:
+                if batch.columns.nlevels > 1 and sym in batch.columns.get_level_values(0):
+                    df = batch[sym]
+                elif batch.columns.nlevels == 1 and len(symbols) == 1:
+                    df = batch
+                else:
+                    continue
+                df = df.dropna(subset=['Close'])
+                if len(df):
+                    recorded[sym] = df
+    if not recorded:
+        raise SystemExit(f'No daily bars on tape {path}')
+    names = list(recorded)
+    frames = {}
+    for i in range(n):
+        sym = names[i % len(names)]
+        frames[sym if i < len(names) else f'{sym}#{i // len(names)}'] = recorded[sym]
+    return frames
+
+
+class Inputs:
+    """All derived inputs for one size, built once (not timed)."""
+
+    def __init__(self, frames):
+        import indicators as ind
+        import morning_screener as ms
+        self.frames = frames
+        self.symbols = list(frames)
+        _, self.m = ind.from_frames(frames)
+        self.rsi = ind.rsi(self.m['Close'])
+        self.data = ms.calc_technicals(frames, self.symbols)
+        self.scores = ms.score_candidates(self.data, self.data)
+
+
+def alert_config(inputs):
+    """Tracker SYMBOLS/ALERT_RULES with LEVELS levels around each last price,
+    plus (prices, prev_prices) so part of the levels are crossed."""
+    import numpy as np
+    symbols, rules, prices, prev = {}, {'flash_move_pct': 1.5, 'big_daily_move_pct': 5.0}, {}, {}
+    close = inputs.m['Close']
+    for i, sym in enumerate(inputs.symbols):
+        price, before = float(close[i, -1]), float(close[i, -2])
+        symbols[sym] = {'name': sym, 'emoji': '📈'}
+        steps = np.linspace(0.9, 1.1, LEVELS)
+        rules[sym] = {'above': [round(before * s, 2) for s in steps[LEVELS // 2:]],
+                      'below': [round(before * s, 2) for s in steps[:LEVELS // 2]]}
+        prices[sym] = {'price': price, 'change_pct': (price / before - 1) * 100,
+                       'day_low': min(price, before), 'day_high': max(price, before)}
+        prev[sym] = before
+    return symbols, rules, prices, prev
+
+
+# ── Benchmarks ──
+# Each returns the zero-argument callable that is timed.
+
+def bench_calc_technicals(inputs):
+    from morning_screener import calc_technicals
+    return lambda: calc_technicals(inputs.frames, inputs.symbols)
+
+
+def bench_adx(inputs):
+    import indicators as ind
+    m = inputs.m
+    return lambda: ind.adx(m['High'], m['Low'], m['Close'])
+
+
+def bench_bollinger(inputs):
+    import indicators as ind
+    return lambda: ind.bb_width_percentile(ind.bollinger(inputs.m['Close'])[2])
+
+
+def bench_rsi_divergence(inputs):
+    from morning_screener import detect_rsi_divergence
+    close, rsi = inputs.m['Close'], inputs.rsi
+    return lambda: [detect_rsi_divergence(close[i], rsi[i]) for i in range(len(close))]
+
+
+def bench_scoring(inputs):
+    from morning_screener import score_candidates
+    return lambda: score_candidates(inputs.data, inputs.data)
+
+
+def bench_build_message(inputs):
+    from morning_screener import build_message
+    return lambda: build_message(inputs.data, [], {}, '02.01.2026 07:00 UTC', len(inputs.symbols), {},
+                                 scores=inputs.scores)
+
+
+def bench_check_alerts(inputs):
+    import tracker_check as tc
+    symbols, rules, prices, prev = alert_config(inputs)
+    index = tc.compile_alert_rules(rules, {})
+
+    def run():
+        saved = tc.SYMBOLS, tc.ALERT_RULES
+        tc.SYMBOLS, tc.ALERT_RULES = symbols, rules
+        try:
+            return tc.check_alerts(prices, prev, set(), index)
+        finally:
+            tc.SYMBOLS, tc.ALERT_RULES = saved
+    return run
+
+
+BENCHMARKS = {name[len('bench_'):]: fn for name, fn in globals().items() if name.startswith('bench_')}
+
+
+def measure(fn, repeat=REPEAT):
+    """Best of `repeat` wall-clock timings in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# ── Results ──
+
+def _commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_runs():
+    try:
+        with open(BENCH_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_run(run):
+    runs = (load_runs() + [run])[-HISTORY:]
+    os.makedirs(os.path.dirname(BENCH_PATH), exist_ok=True)
+    tmp = BENCH_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(runs, f, indent=1)
+    os.replace(tmp, BENCH_PATH)
+
+
+def previous(runs, source):
+    """Latest stored result per (benchmark, size) for the same input source."""
+    prev = {}
+    for run in runs:
+        if run.get('input') == source:
+            for name, sizes in run['results'].items():
+                for n, seconds in sizes.items():
+                    prev[name, n] = (seconds, run.get('commit'))
+    return prev
+
+
+def main(sizes=SIZES, only=None, repeat=REPEAT, tape=None, save=True):
+    import numpy
+    source = f'tape:{os.path.basename(tape)}' if tape else 'synthetic'
+    names = [name for name in BENCHMARKS if not only or name in only]
+    prev = previous(load_runs(), source)
+    results = {name: {} for name in names}
+    print(f'  Benchmarks ({source}, best of {repeat}): {", ".join(names)}')
+    for n in sizes:
+        frames = tape_frames(tape, n) if tape else synthetic_frames(n)
+        inputs = Inputs(frames)
+        for name in names:
+            seconds = measure(BENCHMARKS[name](inputs), repeat)
+            results[name][str(n)] = round(seconds, 6)
+            line = f'    {name:<16} {n:>5} symbols  {seconds * 1000:>10.2f} ms'
+            if (name, str(n)) in prev:
+                before, commit = prev[name, str(n)]
+                ratio = seconds / before if before else 1.0
+                flag = '  SLOWER' if ratio > SLOWER and seconds - before > NOISE else ''
+                line += f'  ({ratio - 1:+.0%} vs {commit or "last run"}){flag}'
+            print(line)
+
+    run = {
+        'commit': _commit(),
+        'time': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'input': source,
+        'repeat': repeat,
+        'results': results,
+    }
+    if save:
+        save_run(run)
+        print(f'  [saved to {BENCH_PATH}]')
+    return run
+
+
+if __name__ == '__main__':
+    def arg(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    sizes = tuple(int(n) for n in arg('--sizes', ','.join(map(str, SIZES))).split(','))
+    only = arg('--only', None)
+    main(sizes, set(only.split(',')) if only else None, int(arg('--repeat', REPEAT)),
+         arg('--tape', None), '--no-save' not in sys.argv)
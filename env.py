@@ -0,0 +1,18 @@
+"""Shared .env loader.
+Used by supabase_client.py and notifier.py, so neither needs the other just
+to read its credentials."""
+
+import os
+
+
+def load_env():
+    """Load .env file into os.environ."""
+    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    if not os.path.exists(env_path):
+        return
+    with open(env_path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, val = line.split('=', 1)
+                os.environ.setdefault(key.strip(), val.strip())
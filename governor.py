@@ -0,0 +1,213 @@
+"""Shared rate-limit governor for outbound requests.
+Used by quotes.py, bar_store.py, meta_cache.py, supabase_client.py,
+notifier.py, morning_screener.py, reddit_gems.py, recorder.py and telemetry.py.
+
+Every request to an upstream (Yahoo, Supabase, Telegram, other web pages)
+goes through call():
+a token bucket paces requests to the upstream's limit, throttling answers
+(HTTP 429/503, yfinance rate-limit errors) are retried with exponential
+backoff that honors Retry-After, and a circuit breaker stops hammering an
+upstream that keeps failing. Requests that still fail are counted as dropped,
+so a run can report them instead of silently losing symbols or messages.
+Failed attempts and response bytes are counted too (see snapshot())."""
+
+import json
+import random
+import threading
+import time
+import urllib.error
+
+# upstream -> (requests per second, burst)
+LIMITS = {
+    'yahoo': (4.0, 8),
+    'supabase': (20.0, 20),
+    'telegram': (1.0, 3),  # Telegram: ~1 msg/s per chat, 20/min in groups
+    'web': (2.0, 4),       # Wikipedia, ApeWisdom
+}
+RETRIES = 3
+BACKOFF_BASE = 1.0   # seconds, doubled per retry (+ jitter)
+BACKOFF_MAX = 60.0
+BREAKER_FAILURES = 5   # consecutive failures that open the circuit
+BREAKER_COOLDOWN = 60  # seconds before a trial request is let through
+
+
+class Throttled(Exception):
+    """Upstream asked us to slow down (optionally with a Retry-After delay)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(Exception):
+    """Upstream failed repeatedly; requests are short-circuited for a while."""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while _paced:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Empty the bucket so nobody sends for `seconds` (shared Retry-After)."""
+        with self.lock:
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+            self.updated = time.monotonic()
+
+
+class Breaker:
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= BREAKER_COOLDOWN:
+                self.opened_at = time.monotonic()  # half-open: one trial per cooldown
+                return True
+            return False
+
+    def record(self, ok):
+        with self.lock:
+            if ok:
+                self.failures, self.opened_at = 0, None
+            else:
+                self.failures += 1
+                if self.failures >= BREAKER_FAILURES:
+                    self.opened_at = time.monotonic()
+
+
+_paced = True  # False: no pacing or backoff sleeps (see unthrottle())
+_buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in LIMITS.items()}
+_breakers = {name: Breaker() for name in LIMITS}
+_metrics = {name: {'calls': 0, 'retries': 0, 'throttled': 0, 'dropped': 0, 'short_circuited': 0,
+                   'errors': 0, 'bytes': 0}
+            for name in LIMITS}
+_metrics_lock = threading.Lock()
+
+
+def _count(upstream, key, n=1):
+    with _metrics_lock:
+        _metrics[upstream][key] += n
+
+
+def _retry_after(e):
+    """Seconds to wait from a throttling error, or None if it is not one."""
+    if isinstance(e, Throttled):
+        return e.retry_after or 0
+    if isinstance(e, urllib.error.HTTPError) and e.code in (429, 503):
+        header = e.headers.get('Retry-After') if e.headers else None
+        if header and header.isdigit():
+            return int(header)
+        try:  # Telegram: {"parameters": {"retry_after": N}}
+            return json.loads(e.read()).get('parameters', {}).get('retry_after', 0)
+        except Exception:
+            return 0
+    if type(e).__name__ == 'YFRateLimitError' or 'Too Many Requests' in str(e):
+        return 0
+    return None
+
+
+def _transient(e):
+    """Network-level failures worth retrying (incl. yfinance's HTTP client errors)."""
+    if isinstance(e, urllib.error.HTTPError):
+        return e.code >= 500
+    return isinstance(e, OSError) or type(e).__name__ in ('RequestsError', 'CurlError', 'Timeout')
+
+
+def transient(e):
+    """True for errors worth sending again later (throttling, 5xx, network,
+    open circuit); False for permanent rejections such as HTTP 400."""
+    return isinstance(e, CircuitOpen) or _retry_after(e) is not None or _transient(e)
+
+
+def call(upstream, fn, *args, retries=RETRIES, **kwargs):
+    """Run fn(*args, **kwargs) under the upstream's rate limit, backoff and breaker.
+    Raises the last error (or CircuitOpen) once retries are exhausted."""
+    breaker = _breakers[upstream]
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            _count(upstream, 'short_circuited')
+            _count(upstream, 'dropped')
+            raise CircuitOpen(f'{upstream}: circuit open after {BREAKER_FAILURES} failures')
+        _buckets[upstream].acquire()
+        _count(upstream, 'calls')
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            _count(upstream, 'errors')
+            retry_after = _retry_after(e)
+            if retry_after is None and not _transient(e):
+                breaker.record(True)  # a real answer (e.g. 404), not an outage
+                raise
+            breaker.record(False)
+            if retry_after is not None:
+                _count(upstream, 'throttled')
+            if attempt == retries:
+                _count(upstream, 'dropped')
+                raise
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (1 + random.random() * 0.25)
+            if retry_after:
+                delay = max(delay, retry_after)
+                _buckets[upstream].pause(retry_after)
+            _count(upstream, 'retries')
+            if _paced:
+                time.sleep(delay)
+            continue
+        breaker.record(True)
+        return result
+
+
+def unthrottle():
+    """Stop pacing and backoff sleeps (responses replayed by recorder.py are local).
+    Retries, breakers and metrics still behave as recorded."""
+    global _paced
+    _paced = False
+
+
+def record_drop(upstream, n=1):
+    """Count items lost without an exception (e.g. symbols missing from a batch)."""
+    _count(upstream, 'dropped', n)
+
+
+def record_bytes(upstream, n):
+    """Count bytes sent or received (for requests whose body we handle ourselves)."""
+    _count(upstream, 'bytes', n)
+
+
+def record_error(upstream, n=1):
+    """Count error answers that are returned instead of raised (e.g. Supabase 4xx)."""
+    _count(upstream, 'errors', n)
+
+
+def snapshot():
+    """Copy of the counters per upstream, e.g. to diff around a stage."""
+    with _metrics_lock:
+        return {name: dict(m) for name, m in _metrics.items()}
+
+
+def report():
+    """Print one summary line per upstream that was used."""
+    for name, m in _metrics.items():
+        if m['calls'] or m['dropped']:
+            print(f'  [{name}: {m["calls"]} calls, {m["retries"]} retries, '
+                  f'{m["throttled"]} throttled, {m["dropped"]} dropped]')
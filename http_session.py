@@ -0,0 +1,49 @@
+"""Shared keep-alive HTTP(S) session.
+Used by supabase_client.py and notifier.py."""
+
+import http.client
+import urllib.parse
+
+
+class Session:
+    """Persistent HTTP(S) connection to one host.
+    Reconnects transparently when the server has closed an idle connection.
+    Not thread-safe: use one Session per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urllib.parse.urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request. Returns (status, response bytes, response headers).
+        `body` may be a callable returning a fresh (e.g. streaming) body per attempt."""
+        for attempt in range(2):
+            reused = self.conn is not None
+            if self.conn is None:
+                self.conn = self._connect()
+            try:
+                data = body() if callable(body) else body
+                self.conn.request(method, f'{self.prefix}/{path}', body=data, headers=headers or {})
+                resp = self.conn.getresponse()
+                payload = resp.read()
+                if resp.will_close:
+                    self.close()
+                return resp.status, payload, resp.headers
+            except (http.client.HTTPException, ConnectionError):
+                # Stale keep-alive connection: retry once on a fresh one
+                self.close()
+                if not reused or attempt:
+                    raise
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
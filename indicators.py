@@ -0,0 +1,216 @@
+"""Shared technical indicator engine.
+Used by update_stocks.py, portfolio_check.py, reddit_gems.py and morning_screener.py
+so every script computes RSI, MACD, ATR, ADX, Bollinger and SMAs the same way.
+
+All indicators work on 2-D float matrices (symbols x bars). Each row holds one
+symbol's bars right-aligned: the newest bar is always the last column and
+shorter histories are padded with NaN on the left (see align()). The EWM-based
+indicators loop over the bar axis only, every step is one NumPy op across the
+whole universe."""
+
+import numpy as np
+
+
+# ── Matrix Helpers ──
+
+def align(rows, length=None):
+    """Stack 1-D bar arrays into a right-aligned, NaN-padded matrix.
+    NaNs inside a row are dropped first (same as Series.dropna())."""
+    cleaned = []
+    for r in rows:
+        a = np.asarray(r, dtype=float).ravel()
+        cleaned.append(a[~np.isnan(a)])
+    width = length if length is not None else max((len(a) for a in cleaned), default=0)
+    out = np.full((len(cleaned), width), np.nan)
+    for i, a in enumerate(cleaned):
+        a = a[len(a) - width:] if len(a) > width else a
+        if width and len(a):
+            out[i, width - len(a):] = a
+    return out
+
+
+def from_frames(frames, fields=('Close', 'High', 'Low', 'Volume'), length=None):
+    """Build one aligned matrix per OHLCV field from {symbol: DataFrame}.
+    Returns (symbols, {field: matrix}) with rows in the order of symbols."""
+    symbols = list(frames)
+    raw = {f: [frames[s][f].values for s in symbols] for f in fields}
+    if length is None:
+        # One common width so all field matrices line up bar for bar
+        length = max((int(np.sum(~np.isnan(np.asarray(a, dtype=float))))
+                      for rows in raw.values() for a in rows), default=0)
+    mats = {f: align(rows, length) for f, rows in raw.items()}
+    return symbols, mats
+
+
+def bar_counts(x):
+    """Number of valid (non-NaN) bars per row."""
+    return np.sum(~np.isnan(x), axis=1)
+
+
+def latest(x, back=0):
+    """Value `back` bars before the newest bar for every row (NaN if missing)."""
+    if x.shape[1] <= back:
+        return np.full(x.shape[0], np.nan)
+    return x[:, -1 - back]
+
+
+def scalar(v, ndigits=None):
+    """Convert a NumPy scalar to float (rounded), or None if NaN/inf."""
+    if v is None:
+        return None
+    v = float(v)
+    if not np.isfinite(v):
+        return None
+    return round(v, ndigits) if ndigits is not None else v
+
+
+def _shift(x, n=1):
+    """Shift each row right by n bars (like Series.shift(n))."""
+    out = np.full_like(x, np.nan)
+    if n < x.shape[1]:
+        out[:, n:] = x[:, :-n]
+    return out
+
+
+def _diff(x):
+    return x - _shift(x)
+
+
+# ── Moving Averages ──
+
+def ewm(x, alpha, min_periods=0, adjust=True):
+    """Exponentially weighted mean along the bar axis.
+    Matches pandas ewm(alpha=..., adjust=..., min_periods=...).mean() for
+    rows that are dense after their leading NaN padding."""
+    n_sym, n_bar = x.shape
+    out = np.full((n_sym, n_bar), np.nan)
+    decay = 1.0 - alpha
+    num = np.zeros(n_sym)
+    den = np.zeros(n_sym)
+    seen = np.zeros(n_sym, dtype=int)
+    min_obs = max(min_periods, 1)
+    for t in range(n_bar):
+        col = x[:, t]
+        ok = ~np.isnan(col)
+        if adjust:
+            num = np.where(ok, col + decay * num, num)
+            den = np.where(ok, 1.0 + decay * den, den)
+        else:
+            first = ok & (seen == 0)
+            num = np.where(first, col, np.where(ok, decay * num + alpha * col, num))
+            den = np.where(ok, 1.0, den)
+        seen += ok
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, t] = np.where(seen >= min_obs, num / den, np.nan)
+    return out
+
+
+def ema(x, span):
+    """Classic EMA (span, adjust=False) as used for MACD."""
+    return ewm(x, alpha=2.0 / (span + 1), adjust=False)
+
+
+def wilder(x, period=14):
+    """Wilder smoothing (alpha = 1/period) with period warm-up bars."""
+    return ewm(x, alpha=1.0 / period, min_periods=period)
+
+
+def _windows(x, period):
+    """Rolling windows view (symbols x bars-period+1 x period)."""
+    return np.lib.stride_tricks.sliding_window_view(x, period, axis=1)
+
+
+def sma(x, period):
+    """Simple moving average; NaN until a full window of bars exists."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= period:
+        out[:, period - 1:] = _windows(x, period).mean(axis=-1)
+    return out
+
+
+def rolling_std(x, period):
+    """Rolling sample standard deviation (ddof=1, like pandas)."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= period:
+        out[:, period - 1:] = _windows(x, period).std(axis=-1, ddof=1)
+    return out
+
+
+# ── Indicators ──
+
+def rsi(close, period=14):
+    """RSI with Wilder's smoothing."""
+    delta = _diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    pad = np.isnan(close)
+    gain[pad] = np.nan
+    loss[pad] = np.nan
+    avg_gain = wilder(gain, period)
+    avg_loss = wilder(loss, period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return line, sig, line - sig
+
+
+def true_range(high, low, close):
+    """True range; NaN on each row's first bar (no previous close)."""
+    prev = _shift(close)
+    return np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev)))
+
+
+def atr(high, low, close, period=14):
+    """Average true range as a simple mean of the last period true ranges."""
+    return sma(true_range(high, low, close), period)
+
+
+def adx(high, low, close, period=14):
+    """ADX, +DI and -DI using Wilder smoothing."""
+    up = _diff(high)
+    down = -_diff(low)
+    plus_dm = np.where(up < 0, 0.0, up)
+    minus_dm = np.where(down < 0, 0.0, down)
+    both = (plus_dm > 0) & (minus_dm > 0)
+    plus_zero = both & (plus_dm < minus_dm)
+    minus_zero = both & (minus_dm < plus_dm)
+    plus_dm[plus_zero] = 0.0
+    minus_dm[minus_zero] = 0.0
+
+    tr = wilder(true_range(high, low, close), period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        plus_di = 100 * wilder(plus_dm, period) / tr
+        minus_di = 100 * wilder(minus_dm, period) / tr
+        di_sum = plus_di + minus_di
+        dx = 100 * np.abs(plus_di - minus_di) / np.where(di_sum == 0, 1.0, di_sum)
+    return wilder(dx, period), plus_di, minus_di
+
+
+def bollinger(close, period=20, num_std=2):
+    """Bollinger upper band, lower band and relative bandwidth."""
+    mid = sma(close, period)
+    std = rolling_std(close, period)
+    upper = mid + num_std * std
+    lower = mid - num_std * std
+    with np.errstate(invalid='ignore', divide='ignore'):
+        width = (upper - lower) / mid
+    return upper, lower, width
+
+
+def bb_width_percentile(width, lookback=120):
+    """Percentile (0-100) of the latest bandwidth within the last lookback values."""
+    recent = width[:, -lookback:]
+    valid = ~np.isnan(recent)
+    cur = width[:, -1:]
+    with np.errstate(invalid='ignore'):
+        below = np.sum((recent < cur) & valid, axis=1)
+    n = np.sum(valid, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = below / n * 100
+    return np.where(np.isnan(cur[:, 0]) | (n == 0), np.nan, pct)
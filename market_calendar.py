@@ -0,0 +1,276 @@
+"""Shared exchange session calendar and cron scheduler.
+Used by tracker_check.py, update_stocks.py and the GitHub Actions workflows
+(`python3 market_calendar.py gate <job>`) so no run is spent on closed markets.
+
+Sessions are defined in exchange local time (zoneinfo), so DST shifts on
+either side of the Atlantic are handled automatically. Holidays are computed
+per year (fixed dates, weekday rules and Easter), no calendar download needed.
+
+Slot jobs run once per slot: the workflow calls `market_calendar.py done <job>
+<slot>` after a successful run, and the slot is not due again that day even
+though its window spans several cron ticks (so a late schedule cannot skip it)."""
+
+import json
+import os
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# Regular sessions (trading days, exchange local time)
+MARKETS = {
+    'US': {'tz': 'America/New_York', 'open': time(9, 30), 'close': time(16, 0)},
+    'XETRA': {'tz': 'Europe/Berlin', 'open': time(9, 0), 'close': time(17, 30)},
+    # CME Globex metals: Sun 18:00 - Fri 17:00 NY time, daily 17:00-18:00 break.
+    # A session opening at 18:00 belongs to the next day's trading date.
+    'CME': {'tz': 'America/New_York', 'open': time(18, 0), 'close': time(17, 0)},
+}
+US_EARLY_CLOSE = time(13, 0)
+CLOSE_GRACE = timedelta(minutes=20)  # keep checking briefly after the close (closing print)
+
+# Cron jobs: due while any of `markets` is open, or inside one of the `slots`
+# ((market, 'open'|'close', offset minutes), each due for `window` minutes,
+# several ticks of the 30-minute cron, until marked done)
+JOBS = {
+    'tracker': {'markets': ('US', 'XETRA', 'CME')},
+    'update_stocks': {
+        'markets': ('US', 'XETRA'),
+        'slots': (('US', 'close', 0), ('XETRA', 'close', 0)),  # daily close settles
+        'window': 60,
+    },
+    'portfolio_check': {
+        'slots': (('XETRA', 'open', -60), ('US', 'open', -30), ('US', 'close', -60)),
+        'window': 90,
+    },
+}
+SLOTS_PATH = os.environ.get(
+    'CRON_SLOTS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'cron_slots.json'),
+)
+SLOTS_KEPT = 50  # done markers kept per job
+
+
+def market_for(symbol):
+    """Map a Yahoo symbol to its market (None = unknown, always fetched)."""
+    if symbol.endswith('=F'):
+        return 'CME'
+    if symbol.endswith('.DE'):
+        return 'XETRA'
+    if '.' in symbol or '=' in symbol or '-' in symbol:
+        return None  # other exchanges, FX, crypto
+    return 'US'
+
+
+# ── Holidays ──
+
+def _easter(year):
+    """Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th weekday (0=Mon) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    """US rule: Saturday holidays are observed Friday, Sunday ones Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def holidays(market, year):
+    """Full-day closures of a market in one year."""
+    good_friday = _easter(year) - timedelta(days=2)
+    if market == 'US':
+        days = {
+            _nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),   # Presidents' Day
+            good_friday,
+            _nth_weekday(year, 5, 0, -1),  # Memorial Day
+            _observed(date(year, 7, 4)),
+            _nth_weekday(year, 9, 0, 1),   # Labor Day
+            _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+            _observed(date(year, 12, 25)),
+        }
+        if date(year, 1, 1).weekday() != 5:  # no Friday make-up for a Saturday New Year
+            days.add(_observed(date(year, 1, 1)))
+        if year >= 2022:
+            days.add(_observed(date(year, 6, 19)))  # Juneteenth
+        return frozenset(days)
+    if market == 'XETRA':
+        return frozenset({
+            date(year, 1, 1), good_friday, _easter(year) + timedelta(days=1),
+            date(year, 5, 1), date(year, 12, 24), date(year, 12, 25),
+            date(year, 12, 26), date(year, 12, 31),
+        })
+    if market == 'CME':
+        # Metals close fully only on these; other US holidays are shortened sessions
+        return frozenset({_observed(date(year, 1, 1)), good_friday, _observed(date(year, 12, 25))})
+    return frozenset()
+
+
+def is_trading_day(market, d):
+    return d.weekday() < 5 and d not in holidays(market, d.year)
+
+
+def _close_time(market, d):
+    """Regular close on trading date d (US early closes before holidays)."""
+    close = MARKETS[market]['close']
+    if market == 'US':
+        thanksgiving = _nth_weekday(d.year, 11, 3, 4)
+        early = {thanksgiving + timedelta(days=1), date(d.year, 12, 24), date(d.year, 7, 3)}
+        if d in early and is_trading_day('US', d):
+            return US_EARLY_CLOSE
+    return close
+
+
+# ── Sessions ──
+
+def session_bounds(market, trading_date):
+    """(open, close) of one trading date as aware UTC datetimes, or None."""
+    if not is_trading_day(market, trading_date):
+        return None
+    cfg = MARKETS[market]
+    tz = ZoneInfo(cfg['tz'])
+    if market == 'CME':
+        start = datetime.combine(trading_date - timedelta(days=1), cfg['open'], tz)  # Mon: Sunday evening
+        end = datetime.combine(trading_date, cfg['close'], tz)
+    else:
+        start = datetime.combine(trading_date, cfg['open'], tz)
+        end = datetime.combine(trading_date, _close_time(market, trading_date), tz)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def _candidate_dates(market, now):
+    local = now.astimezone(ZoneInfo(MARKETS[market]['tz'])).date()
+    return [local + timedelta(days=1), local, local - timedelta(days=1)]
+
+
+def _in_session(market, now):
+    for d in _candidate_dates(market, now):
+        bounds = session_bounds(market, d)
+        if bounds and bounds[0] <= now < bounds[1]:
+            return True
+    return False
+
+
+def is_open(market, now=None, grace=CLOSE_GRACE):
+    """True while `market` is in session (or within `grace` after its close).
+    Unknown markets (None) always count as open."""
+    if market is None:
+        return True
+    now = now or datetime.now(timezone.utc)
+    return _in_session(market, now) or _in_session(market, now - grace)
+
+
+def last_open(market, now=None):
+    """Start of the most recent session that has opened by `now` (UTC), or None."""
+    now = now or datetime.now(timezone.utc)
+    local = now.astimezone(ZoneInfo(MARKETS[market]['tz'])).date()
+    for back in range(-1, 12):
+        bounds = session_bounds(market, local - timedelta(days=back))
+        if bounds and bounds[0] <= now:
+            return bounds[0]
+    return None
+
+
+def symbols_to_fetch(symbols, known=None, now=None, grace=CLOSE_GRACE):
+    """Symbols whose market is open (or closed less than `grace` ago), plus those
+    missing from `known` (symbols without any stored price yet) if given."""
+    now = now or datetime.now(timezone.utc)
+    return [s for s in symbols
+            if (known is not None and s not in known) or is_open(market_for(s), now, grace)]
+
+
+# ── Cron Gate ──
+
+def _load_done():
+    try:
+        with open(SLOTS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def due_slot(job, now=None):
+    """Key ('US open -30 2026-03-09') of the slot of `job` whose window contains
+    `now` and that is not marked done yet, or None."""
+    cfg = JOBS[job]
+    now = now or datetime.now(timezone.utc)
+    window = timedelta(minutes=cfg.get('window', 0))
+    done = set(_load_done().get(job, ()))
+    for market, event, offset in cfg.get('slots', ()):
+        local = now.astimezone(ZoneInfo(MARKETS[market]['tz'])).date()
+        bounds = session_bounds(market, local)
+        if not bounds:
+            continue
+        at = bounds[0 if event == 'open' else 1] + timedelta(minutes=offset)
+        key = f'{market} {event} {offset} {local}'
+        if at <= now < at + window and key not in done:
+            return key
+    return None
+
+
+def mark_done(job, slot):
+    """Record that `job` ran for `slot`, so the rest of its window is skipped."""
+    done = _load_done()
+    done[job] = (done.get(job, []) + [slot])[-SLOTS_KEPT:]
+    os.makedirs(os.path.dirname(SLOTS_PATH), exist_ok=True)
+    tmp = SLOTS_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(done, f)
+    os.replace(tmp, SLOTS_PATH)
+
+
+def after_close(job):
+    """How long after a market's close `job` still fetches it (its close slots)."""
+    cfg = JOBS[job]
+    if not any(event == 'close' for _, event, _ in cfg.get('slots', ())):
+        return CLOSE_GRACE
+    return max(CLOSE_GRACE, timedelta(minutes=cfg['window']))
+
+
+def job_due(job, now=None):
+    """Whether a scheduled cron run of `job` should do any work now."""
+    now = now or datetime.now(timezone.utc)
+    if any(is_open(m, now) for m in JOBS[job].get('markets', ())):
+        return True
+    return due_slot(job, now) is not None
+
+
+if __name__ == '__main__':
+    # python3 market_calendar.py gate <job> [--force]
+    # python3 market_calendar.py done <job> <slot>   (after a successful slot run)
+    if len(sys.argv) < 3 or sys.argv[1] not in ('gate', 'done') or sys.argv[2] not in JOBS:
+        print(f'Usage: python3 market_calendar.py gate|done {{{"|".join(JOBS)}}} [--force | <slot>]')
+        sys.exit(1)
+    job = sys.argv[2]
+    if sys.argv[1] == 'done':
+        if len(sys.argv) > 3 and sys.argv[3]:  # empty: not a slot run (forced or market open)
+            mark_done(job, sys.argv[3])
+            print(f'{job}: slot {sys.argv[3]} done')
+        sys.exit(0)
+    forced = '--force' in sys.argv
+    slot = None if forced or any(is_open(m) for m in JOBS[job].get('markets', ())) else due_slot(job)
+    due = forced or job_due(job)
+    print(f'{job}: {"due" if due else "markets closed, skipping"}' + (f' (slot {slot})' if slot else ''))
+    if os.environ.get('GITHUB_OUTPUT'):
+        with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+            f.write(f'run={"true" if due else "false"}\nslot={slot or ""}\n')
@@ -0,0 +1,194 @@
+"""Shared fundamentals/metadata cache with per-field TTLs.
+Used by update_stocks.py, portfolio_check.py, reddit_gems.py and morning_screener.py.
+
+Ticker.info is the slowest and most throttled yfinance call, but most of its
+fields change at most daily. Each cached field carries its own fetch time and
+TTL; a symbol only hits Yahoo when one of the requested fields has expired,
+and one info (or calendar) call then refreshes all fields of that source.
+Live prices are never cached here (see quotes.py). In GitHub Actions the
+file is restored via actions/cache."""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+CACHE_PATH = os.environ.get(
+    'META_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'meta.json'),
+)
+DAY = 24 * 3600
+WORKERS = 8
+TIMEOUT = 30   # seconds per symbol incl. retries (deadline scales with worker waves)
+MISS_TTL = 2 * 3600  # empty answers (no .info, no calendar) are retried after 2h
+
+# field -> (source, TTL seconds)
+FIELDS = {
+    # Company data: practically static
+    'sector': ('info', 30 * DAY),
+    'industry': ('info', 30 * DAY),
+    'shortName': ('info', 30 * DAY),
+    'longName': ('info', 30 * DAY),
+    # Slow fundamentals
+    'beta': ('info', 7 * DAY),
+    'shortPercentOfFloat': ('info', 3 * DAY),  # reported twice a month
+    'marketCap': ('info', DAY),
+    'recommendationKey': ('info', DAY),
+    'averageVolume': ('info', DAY),
+    'trailingPE': ('info', DAY),
+    'forwardPE': ('info', DAY),
+    'fiftyDayAverage': ('info', DAY),
+    'twoHundredDayAverage': ('info', DAY),
+    # Next earnings date (also refetched once it has passed)
+    'earnings_date': ('calendar', DAY),
+}
+
+
+def _load():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(cache):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp = CACHE_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp, CACHE_PATH)
+
+
+def _expired(field, entry, now, today):
+    """entry = [value, fetched_at] or None."""
+    if entry is None:
+        return True
+    value, fetched = entry
+    if now - fetched > (FIELDS[field][1] if value is not None else MISS_TTL):
+        return True
+    return field == 'earnings_date' and value is not None and value < today
+
+
+def _fetch_source(sym, source, today):
+    """One info or calendar request -> {field: value} for all fields of that source."""
+    import yfinance as yf
+    from governor import call
+    t = yf.Ticker(sym)
+    if source == 'info':
+        info = call('yahoo', lambda: t.info)
+        return {f: info.get(f) for f, (src, _) in FIELDS.items() if src == 'info'}
+    earnings = None
+    try:
+        cal = call('yahoo', lambda: t.calendar)
+        if cal and isinstance(cal, dict) and cal.get('Earnings Date'):
+            d = cal['Earnings Date'][0]
+            d = d.date() if hasattr(d, 'date') else d
+            if str(d) >= today:
+                earnings = str(d)
+    except Exception:
+        pass  # No calendar (futures, ETFs) is a valid answer
+    return {'earnings_date': earnings}
+
+
+def _fetch(sym, sources, today):
+    """Fetch the expired sources of one symbol (paced + retried by governor.py).
+    A failed source is logged and skipped so the other one's values still land;
+    only if every source failed is the (last) error raised."""
+    values, error = {}, None
+    for source in sorted(sources):
+        try:
+            values.update(_fetch_source(sym, source, today))
+        except Exception as e:
+            print(f'  Meta {sym} ({source}): {e}')
+            error = e
+    if error is not None and not values:
+        raise error
+    return values
+
+
+def _run_all(jobs, timeout):
+    """Run {key: fn} on WORKERS daemon threads. Returns ({key: result}, {key: error},
+    unfinished keys) after at most `timeout` seconds; unfinished calls are abandoned
+    and, being daemon threads, do not keep the interpreter alive at exit. At the
+    deadline workers stop picking up jobs, and the returned dicts are snapshots,
+    so a late result can neither change them nor start another request."""
+    todo = queue.Queue()
+    for item in jobs.items():
+        todo.put(item)
+    results, errors = {}, {}
+    lock, stop = threading.Lock(), threading.Event()
+    finished = threading.Semaphore(0)
+
+    def worker():
+        while not stop.is_set():
+            try:
+                key, fn = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result, error = fn(), None
+            except Exception as e:
+                result, error = None, e
+            with lock:
+                if stop.is_set():
+                    return
+                if error is None:
+                    results[key] = result
+                else:
+                    errors[key] = error
+            finished.release()
+
+    for _ in range(min(WORKERS, len(jobs))):
+        threading.Thread(target=worker, daemon=True).start()
+    deadline = time.monotonic() + timeout
+    for _ in jobs:
+        if not finished.acquire(timeout=max(0, deadline - time.monotonic())):
+            break
+    with lock:
+        stop.set()
+        results, errors = dict(results), dict(errors)
+    return results, errors, [key for key in jobs if key not in results and key not in errors]
+
+
+def get_meta(symbols, fields):
+    """Return {symbol: {field: value}} for the requested FIELDS.
+    Only symbols with an expired field are fetched (concurrently, with a
+    per-symbol timeout and retries). If a fetch fails, the last cached
+    (possibly expired) values are returned instead. Empty answers are only
+    trusted for MISS_TTL, and never replace a known info value."""
+    now = time.time()
+    today = str(datetime.now(timezone.utc).date())
+    cache = _load()
+
+    todo = {}
+    for sym in symbols:
+        entries = cache.get(sym, {})
+        sources = {FIELDS[f][0] for f in fields if _expired(f, entries.get(f), now, today)}
+        if sources:
+            todo[sym] = sources
+
+    if todo:
+        print(f'  [meta: {len(symbols) - len(todo)} cached, fetching {len(todo)}]')
+        # Daemon threads: a hung request can neither stall the run nor its exit
+        jobs = {sym: (lambda sym=sym, sources=sources: _fetch(sym, sources, today))
+                for sym, sources in todo.items()}
+        results, errors, pending = _run_all(jobs, TIMEOUT * -(-len(todo) // WORKERS))
+        for sym, e in errors.items():
+            print(f'  Meta {sym}: {e}')
+        for sym, values in results.items():
+            entries = cache.setdefault(sym, {})
+            for field, value in values.items():
+                old = entries.get(field)
+                if value is None and old and old[0] is not None and FIELDS[field][0] == 'info':
+                    # Empty answer: keep serving the last value, retry after MISS_TTL
+                    entries[field] = [old[0], now - FIELDS[field][1] + MISS_TTL]
+                else:
+                    entries[field] = [value, now]
+        for sym in pending:
+            print(f'  Meta {sym}: timeout')
+        _save(cache)
+
+    return {sym: {f: (cache.get(sym, {}).get(f) or [None])[0] for f in fields} for sym in symbols}
@@ -1,21 +1,47 @@
 #!/usr/bin/env python3
 """Silver Hawk Trading - Morning Screener v3.
-Scans NASDAQ-100 + custom watchlist + futures before market open.
+Scans a configurable index universe (NASDAQ-100 by default, up to S&P 500 or
+custom symbol lists with 1,000+ names) + watchlist + futures before market open.
 Scores LONG and SHORT independently with RSI delta, divergence, ADX,
 directional volume, Bollinger squeeze, and wrong-side penalties.
-Two-phase: fast batch yf.download(), then individual enrichment for top picks.
+Two-phase: chunked daily download + technicals (only per-symbol summary rows
+are kept, so peak memory stays flat as the universe grows), then individual
+enrichment for top picks.
+Intraday timeframes (1h/15m) add RSI/ADX/ATR% per timeframe for the
+candidates that pass the hard gates; scoring rewards (or requires) alignment.
 Runs daily at 08:00 CET via GitHub Actions."""
 
 import json
+import os
 import re
-import urllib.parse
+import sys
+import time
 import urllib.request
 from datetime import datetime, timezone
 
+from governor import call, record_bytes, report
+from notifier import send_telegram
 from supabase_client import supabase_request
+from telemetry import job_run, span
 
 
 # ── Config ──
+# Universe: comma-separated INDEXES names and/or symbol lists as file:<path>
+# (one SYMBOL[,sector[,name]] per line, e.g. a STOXX 600 export with .DE/.PA/... suffixes)
+UNIVERSE = os.environ.get('SCREENER_UNIVERSE', 'nasdaq100')
+INDEXES = {
+    # name -> (Wikipedia page, label); table id="constituents": ticker | name | sector
+    'nasdaq100': ('Nasdaq-100', 'NASDAQ-100'),
+    'sp500': ('List_of_S%26P_500_companies', 'S&P 500'),
+}
+DAILY_CHUNK = 100  # symbols per daily download + technicals batch (bounds memory)
+CONSTITUENTS_PATH = os.environ.get(
+    'CONSTITUENTS_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'constituents.json'),
+)
+CONSTITUENTS_TTL = 24 * 3600
+CONSTITUENTS_MIN_KEEP = 0.8  # a scrape with fewer than 80% of the last count is a parse failure
+CONSTITUENTS_HISTORY = 50    # index changes kept per index
 FUTURES = {'SI=F', 'GC=F'}
 MIN_VOLUME = 100_000
 MIN_SCORE = 25
@@ -23,19 +49,27 @@ TOP_N = 5
 ENRICH_N = 10
 SECTOR_LIMIT = 0.60
 
+# Intraday timeframes: interval -> history period (bar cache keeps only the tail)
+INTRADAY = {'1h': '60d', '15m': '1mo'}
+INTRADAY_BARS = 300     # newest bars per symbol and timeframe used for indicators
+INTRADAY_CHUNK = 50     # symbols per intraday download + compute batch (bounds memory)
+
 
 # ── Data Sources ──
 
-def fetch_nasdaq100_symbols():
-    """Fetch NASDAQ-100 constituents + ICB sectors + company names from Wikipedia."""
+def fetch_index_symbols(index):
+    """Fetch index constituents + sectors + company names from Wikipedia."""
+    page, label = INDEXES[index]
     try:
-        url = 'https://en.wikipedia.org/wiki/Nasdaq-100'
+        url = f'https://en.wikipedia.org/wiki/{page}'
         req = urllib.request.Request(url, headers={'User-Agent': 'SilverHawk/1.0'})
-        resp = urllib.request.urlopen(req, timeout=20)
-        html = resp.read().decode()
+        resp = call('web', urllib.request.urlopen, req, timeout=20, retries=1)
+        body = resp.read()
+        record_bytes('web', len(body))
+        html = body.decode()
         parts = html.split('id="constituents"')
         if len(parts) < 2:
-            print('  Wikipedia: NASDAQ-100 constituents table not found')
+            print(f'  Wikipedia: {label} constituents table not found')
             return [], {}, {}
         table_html = parts[1].split('</table>')[0]
         rows = re.findall(r'<tr>(.*?)</tr>', table_html, re.DOTALL)
@@ -45,7 +79,7 @@ def fetch_nasdaq100_symbols():
         for row in rows:
             cells = re.findall(r'<td[^>]*>(.*?)</td>', row, re.DOTALL)
             if len(cells) >= 3:
-                # Columns: [0]=Ticker, [1]=Company, [2]=ICB Industry, [3]=ICB Subsector
+                # Columns: [0]=Ticker, [1]=Company, [2]=Sector (ICB Industry / GICS Sector)
                 ticker = re.sub(r'<[^>]+>', '', cells[0]).strip().replace('.', '-')
                 if ticker and re.match(r'^[A-Z][A-Z0-9-]{0,5}$', ticker):
                     tickers.append(ticker)
@@ -57,10 +91,107 @@ def fetch_nasdaq100_symbols():
                         sectors[ticker] = sector_text
         return tickers, sectors, names
     except Exception as e:
-        print(f'  Wikipedia fetch failed: {e}')
+        print(f'  Wikipedia fetch failed ({label}): {e}')
         return [], {}, {}
 
 
+def _load_constituents():
+    try:
+        with open(CONSTITUENTS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_constituents(cache):
+    os.makedirs(os.path.dirname(CONSTITUENTS_PATH), exist_ok=True)
+    tmp = CONSTITUENTS_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp, CONSTITUENTS_PATH)
+
+
+def get_index_symbols(index):
+    """Index constituents with a daily TTL. Returns (tickers, sectors, names, change);
+    change is {'date', 'added', 'removed'} when this refresh changed the index.
+    A failed or implausibly short scrape falls back to the last good snapshot."""
+    cache = _load_constituents()
+    entry = cache.get(index)
+    if entry and time.time() - entry['fetched'] < CONSTITUENTS_TTL:
+        return entry['tickers'], entry['sectors'], entry['names'], None
+
+    tickers, sectors, names = fetch_index_symbols(index)
+    if entry and len(tickers) < len(entry['tickers']) * CONSTITUENTS_MIN_KEEP:
+        print(f'  {INDEXES[index][1]}: scrape returned {len(tickers)} symbols, '
+              f'using snapshot from {entry["date"]} ({len(entry["tickers"])})')
+        return entry['tickers'], entry['sectors'], entry['names'], None
+    if not tickers:
+        return [], {}, {}, None
+
+    change = None
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    history = entry.get('changes', []) if entry else []
+    if entry:
+        added = sorted(set(tickers) - set(entry['tickers']))
+        removed = sorted(set(entry['tickers']) - set(tickers))
+        if added or removed:
+            change = {'date': today, 'added': added, 'removed': removed}
+            history = (history + [change])[-CONSTITUENTS_HISTORY:]
+            print(f'  {INDEXES[index][1]} changes: +{",".join(added) or "-"} / -{",".join(removed) or "-"}')
+    cache[index] = {'fetched': time.time(), 'date': today, 'tickers': tickers,
+                    'sectors': sectors, 'names': names, 'changes': history}
+    _save_constituents(cache)
+    return tickers, sectors, names, change
+
+
+def load_symbol_file(path):
+    """Read a custom universe file: SYMBOL[,sector[,name]] per line, # comments."""
+    tickers, sectors, names = [], {}, {}
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = [x.strip() for x in line.split(',', 2)]
+            sym = fields[0].upper()
+            tickers.append(sym)
+            if len(fields) > 1 and fields[1]:
+                sectors[sym] = fields[1]
+            if len(fields) > 2 and fields[2]:
+                names[sym] = fields[2]
+    return tickers, sectors, names
+
+
+def build_universe(spec=UNIVERSE):
+    """Merge all sources of a universe spec ('nasdaq100,sp500,file:x.csv').
+    Returns (symbols, sectors, names, changes); earlier sources win on
+    sector/name, changes lists (label, change) for indexes that changed."""
+    symbols, sectors, names, changes = set(), {}, {}, []
+    for source in filter(None, (x.strip() for x in spec.split(','))):
+        if source.startswith('file:'):
+            try:
+                tickers, sec, nam = load_symbol_file(source[5:])
+            except OSError as e:
+                print(f'  Universe file failed: {e}')
+                continue
+            label = os.path.basename(source[5:])
+        elif source in INDEXES:
+            tickers, sec, nam, change = get_index_symbols(source)
+            label = INDEXES[source][1]
+            if change:
+                changes.append((label, change))
+        else:
+            print(f'  Unknown universe source: {source} (known: {", ".join(INDEXES)}, file:<path>)')
+            continue
+        print(f'  {label}: {len(tickers)} symbols')
+        symbols.update(tickers)
+        for sym, v in sec.items():
+            sectors.setdefault(sym, v)
+        for sym, v in nam.items():
+            names.setdefault(sym, v)
+    return symbols, sectors, names, changes
+
+
 def get_watchlist():
     result = supabase_request('GET', 'stocks?select=symbol,name,sector&is_active=eq.true')
     return result or []
@@ -130,249 +261,247 @@ def detect_rsi_divergence(close_vals, rsi_vals, lookback=20):
     return None
 
 
-def calc_adx(high, low, close, period=14):
-    """Calculate ADX, +DI, -DI using Wilder smoothing."""
-    import numpy as np
-    import pandas as pd
-
-    plus_dm = high.diff().copy()
-    minus_dm = (-low.diff()).copy()
-    plus_dm[plus_dm < 0] = 0
-    minus_dm[minus_dm < 0] = 0
-    both = (plus_dm > 0) & (minus_dm > 0)
-    plus_dm[both & (plus_dm < minus_dm)] = 0
-    minus_dm[both & (minus_dm < plus_dm)] = 0
-
-    tr1 = high - low
-    tr2 = (high - close.shift()).abs()
-    tr3 = (low - close.shift()).abs()
-    tr = pd.Series(
-        np.maximum(np.maximum(tr1.values, tr2.values), tr3.values),
-        index=high.index
-    )
-
-    alpha = 1.0 / period
-    atr = tr.ewm(alpha=alpha, min_periods=period).mean()
-    smooth_plus = plus_dm.ewm(alpha=alpha, min_periods=period).mean()
-    smooth_minus = minus_dm.ewm(alpha=alpha, min_periods=period).mean()
-
-    plus_di = 100 * smooth_plus / atr
-    minus_di = 100 * smooth_minus / atr
-    di_sum = plus_di + minus_di
-    dx = 100 * (plus_di - minus_di).abs() / di_sum.replace(0, 1)
-    adx = dx.ewm(alpha=alpha, min_periods=period).mean()
-
-    return float(adx.iloc[-1]), float(plus_di.iloc[-1]), float(minus_di.iloc[-1])
-
-
-def calc_bollinger(close, sma_period=20, num_std=2, lookback=120):
-    """Calculate Bollinger Bands, bandwidth percentile, and price position."""
-    import numpy as np
-    if len(close) < sma_period:
-        return {'bb_width_percentile': None, 'bb_position': None}
-
-    sma = close.rolling(sma_period).mean()
-    std = close.rolling(sma_period).std()
-    upper = sma + (num_std * std)
-    lower = sma - (num_std * std)
-    bb_width = (upper - lower) / sma
-
-    recent = bb_width.dropna().iloc[-min(lookback, len(bb_width.dropna())):]
-    cur_w = float(bb_width.iloc[-1])
-    if len(recent) > 0 and not np.isnan(cur_w):
-        bb_pctl = round(float((recent < cur_w).sum() / len(recent) * 100), 1)
-    else:
-        bb_pctl = None
-
-    band_range = float(upper.iloc[-1] - lower.iloc[-1])
-    bb_pos = round((float(close.iloc[-1]) - float(lower.iloc[-1])) / band_range, 2) if band_range > 0 else None
-
-    return {'bb_width_percentile': bb_pctl, 'bb_position': bb_pos}
-
-
 # ── Phase 1: Batch Download + Technicals ──
 
-def batch_download(symbols):
-    """Batch download 1 year of OHLCV data for all symbols."""
-    import yfinance as yf
-    return yf.download(symbols, period='1y', group_by='ticker', threads=True, progress=False)
+def scan_daily(symbols, chunk_size=DAILY_CHUNK):
+    """Daily technicals for all symbols, DAILY_CHUNK symbols at a time.
+    Each chunk's year of bars (served from the local bar cache, only bars since
+    the last run are fetched) goes straight through calc_technicals() and is
+    dropped; only the per-symbol summary rows are kept."""
+    from bar_store import get_bars
+    data = {}
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        with span('download'):
+            bars = get_bars(chunk, period='1y')
+        with span('technicals'):
+            data.update(calc_technicals(bars, chunk))
+        del bars
+        if len(symbols) > chunk_size:
+            print(f'    {min(i + chunk_size, len(symbols))}/{len(symbols)} symbols')
+    return data
 
 
 def calc_technicals(batch_data, symbols, single=False):
-    """Calculate all v3 technicals from batch OHLCV data."""
+    """Calculate all v3 technicals from batch OHLCV data.
+    Indicators are computed for the whole universe at once via indicators.py,
+    the per-symbol loop only assembles the result rows."""
     import numpy as np
+    import indicators as ind
 
-    results = {}
+    frames, short = {}, []
     for sym in symbols:
         try:
             df = batch_data if single else batch_data[sym]
-            close = df['Close'].dropna()
-            high = df['High'].dropna()
-            low = df['Low'].dropna()
-            volume = df['Volume'].dropna()
+        except KeyError:
+            continue  # No bars: already reported (and counted) by bar_store.get_bars()
+        if len(df['Close'].dropna()) >= 30:
+            frames[sym] = df
+        else:
+            short.append(sym)
+    if short:
+        print(f'    Skipped {len(short)} symbols with <30 bars: {", ".join(short[:20])}')
+    if not frames:
+        return {}
 
-            if len(close) < 30:
-                continue
-            price = float(close.iloc[-1])
-            if price <= 0:
-                continue
-            prev = float(close.iloc[-2]) if len(close) >= 2 else price
-            change_pct = round((price - prev) / prev * 100, 2)
-
-            # ── RSI 14 (Wilder's smoothing) + series for delta/divergence ──
-            delta = close.diff()
-            gain = delta.where(delta > 0, 0).ewm(alpha=1/14, min_periods=14).mean()
-            loss_s = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, min_periods=14).mean()
-            rs = gain / loss_s
-            rsi_series = 100 - (100 / (1 + rs))
-            rsi_val = float(rsi_series.iloc[-1])
-            if np.isnan(rsi_val):
-                continue
-            rsi = round(rsi_val, 1)
-
-            # RSI Delta (5-day)
-            rsi_delta = None
-            rsi_clean = rsi_series.dropna()
-            if len(rsi_clean) >= 6:
-                r5 = float(rsi_clean.iloc[-6])
-                if not np.isnan(r5):
-                    rsi_delta = round(rsi - r5, 1)
-
-            # RSI Divergence
-            rsi_divergence = detect_rsi_divergence(close.values, rsi_series.values)
-
-            # RSI Range Quality (last 20 days)
-            rsi_range = None
-            rsi_had_extreme = False
-            if len(rsi_clean) >= 20:
-                rsi_20 = rsi_clean.iloc[-20:]
-                rsi_20_vals = rsi_20[~np.isnan(rsi_20.values)]
-                if len(rsi_20_vals) >= 10:
-                    rsi_range = round(float(rsi_20_vals.max() - rsi_20_vals.min()), 1)
-                    rsi_had_extreme = bool((rsi_20_vals < 35).any() or (rsi_20_vals > 65).any())
-
-            # ── MACD + histogram direction ──
-            macd_cur = macd_prev = None
-            macd_hist_dir = None
-            macd_converging = False
-            if len(close) >= 35:
-                exp12 = close.ewm(span=12, adjust=False).mean()
-                exp26 = close.ewm(span=26, adjust=False).mean()
-                macd_line = exp12 - exp26
-                signal_line = macd_line.ewm(span=9, adjust=False).mean()
-                histogram = macd_line - signal_line
-                macd_cur = round(float(histogram.iloc[-1]), 4)
-                macd_prev = round(float(histogram.iloc[-2]), 4)
-                macd_hist_dir = 'increasing' if macd_cur > macd_prev else 'decreasing'
-                macd_converging = (
-                    abs(float(macd_line.iloc[-1] - signal_line.iloc[-1])) <
-                    abs(float(macd_line.iloc[-2] - signal_line.iloc[-2]))
-                )
-
-            # ── ATR% ──
-            atr_pct = None
-            if len(high) >= 15 and len(low) >= 15 and len(close) >= 15:
-                h = high.values[-15:]
-                l = low.values[-15:]
-                c = close.values[-15:]
-                tr = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - c[:-1]), np.abs(l[1:] - c[:-1])))
-                atr_pct = round(float(np.mean(tr)) / price * 100, 2)
-
-            # ── ADX ──
-            adx_val = plus_di = minus_di = None
-            if len(high) >= 30 and len(low) >= 30 and len(close) >= 30:
-                try:
-                    adx_val, plus_di, minus_di = calc_adx(high, low, close)
-                    if np.isnan(adx_val):
-                        adx_val = None
-                    else:
-                        adx_val = round(adx_val, 1)
-                except Exception:
-                    pass
-
-            # ── SMAs + distance ──
-            sma50 = round(float(close.rolling(50).mean().iloc[-1]), 2) if len(close) >= 50 else None
-            sma200 = round(float(close.rolling(200).mean().iloc[-1]), 2) if len(close) >= 200 else None
-            sma200_dist = round((price - sma200) / sma200 * 100, 2) if sma200 else None
-            sma50_dist = round((price - sma50) / sma50 * 100, 2) if sma50 else None
-
-            # ── Volume (directional) ──
-            # Use last complete trading day if current day has partial volume
-            avg_vol = int(volume.tail(20).mean()) if len(volume) >= 20 else 0
-            vol_today = int(volume.iloc[-1]) if len(volume) > 0 else 0
-            # If vol_today is suspiciously low (<10% of avg), likely partial day -> use previous
-            if avg_vol > 0 and vol_today < avg_vol * 0.1 and len(volume) >= 2:
-                vol_today = int(volume.iloc[-2])
-            vol_ratio = round(vol_today / avg_vol, 2) if avg_vol > 0 else 0
-
-            # ── Bollinger Bands ──
-            bb = calc_bollinger(close)
-
-            # ── 5-day change ──
-            change_5d = None
-            if len(close) >= 6:
-                c5 = float(close.iloc[-6])
-                change_5d = round((price - c5) / c5 * 100, 2)
-
-            results[sym] = {
-                'price': price, 'change_pct': change_pct,
-                # RSI
-                'rsi': rsi, 'rsi_delta': rsi_delta, 'rsi_divergence': rsi_divergence,
-                'rsi_range': rsi_range, 'rsi_had_extreme': rsi_had_extreme,
-                # MACD
-                'macd_hist': macd_cur, 'macd_hist_prev': macd_prev,
-                'macd_hist_direction': macd_hist_dir, 'macd_converging': macd_converging,
-                # ATR + ADX
-                'atr_pct': atr_pct,
-                'adx': adx_val, 'plus_di': plus_di, 'minus_di': minus_di,
-                # SMAs
-                'sma50': sma50, 'sma200': sma200,
-                'sma200_distance_pct': sma200_dist, 'sma50_distance_pct': sma50_dist,
-                # Volume
-                'volume': avg_vol, 'vol_today': vol_today, 'vol_ratio': vol_ratio,
-                # Bollinger
-                'bb_width_percentile': bb.get('bb_width_percentile'),
-                'bb_position': bb.get('bb_position'),
-                # Other
-                'change_5d': change_5d,
-                # Enrichment (Phase 2)
-                'analyst_rating': None, 'short_pct': None,
-                'earnings_date': None, 'market_cap': None, 'sector': None,
-            }
-        except Exception:
+    syms, m = ind.from_frames(frames)
+    close, high, low, volume = m['Close'], m['High'], m['Low'], m['Volume']
+    n_bars = ind.bar_counts(close)
+
+    rsi_m = ind.rsi(close)
+    n_rsi = ind.bar_counts(rsi_m)
+    rsi_20 = rsi_m[:, -20:]
+    with np.errstate(invalid='ignore'):
+        rsi_20_range = np.nanmax(rsi_20, axis=1) - np.nanmin(rsi_20, axis=1)
+        rsi_20_extreme = np.any((rsi_20 < 35) | (rsi_20 > 65), axis=1)
+    macd_line, signal_line, histogram = ind.macd(close)
+    atr = ind.atr(high, low, close)[:, -1]
+    adx, plus_di, minus_di = (x[:, -1] for x in ind.adx(high, low, close))
+    sma50 = ind.sma(close, 50)[:, -1]
+    sma200 = ind.sma(close, 200)[:, -1]
+    upper, lower, bb_width = ind.bollinger(close)
+    bb_pctl = ind.bb_width_percentile(bb_width)
+
+    results = {}
+    for i, sym in enumerate(syms):
+        price = float(close[i, -1])
+        if price <= 0:
+            continue
+        prev = float(close[i, -2]) if n_bars[i] >= 2 else price
+        change_pct = round((price - prev) / prev * 100, 2)
+
+        # ── RSI 14 (Wilder's smoothing) + delta/divergence ──
+        rsi = ind.scalar(rsi_m[i, -1], 1)
+        if rsi is None:
+            continue
+
+        # RSI Delta (5-day)
+        rsi_delta = None
+        if n_rsi[i] >= 6:
+            r5 = ind.scalar(rsi_m[i, -6])
+            if r5 is not None:
+                rsi_delta = round(rsi - r5, 1)
+
+        # RSI Divergence
+        rsi_divergence = detect_rsi_divergence(close[i], rsi_m[i])
+
+        # RSI Range Quality (last 20 days)
+        rsi_range = None
+        rsi_had_extreme = False
+        if n_rsi[i] >= 20:
+            rsi_range = round(float(rsi_20_range[i]), 1)
+            rsi_had_extreme = bool(rsi_20_extreme[i])
+
+        # ── MACD + histogram direction ──
+        macd_cur = macd_prev = None
+        macd_hist_dir = None
+        macd_converging = False
+        if n_bars[i] >= 35:
+            macd_cur = round(float(histogram[i, -1]), 4)
+            macd_prev = round(float(histogram[i, -2]), 4)
+            macd_hist_dir = 'increasing' if macd_cur > macd_prev else 'decreasing'
+            macd_converging = bool(
+                abs(macd_line[i, -1] - signal_line[i, -1]) <
+                abs(macd_line[i, -2] - signal_line[i, -2])
+            )
+
+        # ── ATR% ──
+        atr_pct = ind.scalar(atr[i] / price * 100, 2)
+
+        # ── ADX ──
+        adx_val = ind.scalar(adx[i], 1)
+        pdi = ind.scalar(plus_di[i]) if adx_val is not None else None
+        mdi = ind.scalar(minus_di[i]) if adx_val is not None else None
+
+        # ── SMAs + distance ──
+        s50 = ind.scalar(sma50[i], 2)
+        s200 = ind.scalar(sma200[i], 2)
+        sma200_dist = round((price - s200) / s200 * 100, 2) if s200 else None
+        sma50_dist = round((price - s50) / s50 * 100, 2) if s50 else None
+
+        # ── Volume (directional) ──
+        # Use last complete trading day if current day has partial volume
+        vol = volume[i][~np.isnan(volume[i])]
+        avg_vol = int(vol[-20:].mean()) if len(vol) >= 20 else 0
+        vol_today = int(vol[-1]) if len(vol) > 0 else 0
+        # If vol_today is suspiciously low (<10% of avg), likely partial day -> use previous
+        if avg_vol > 0 and vol_today < avg_vol * 0.1 and len(vol) >= 2:
+            vol_today = int(vol[-2])
+        vol_ratio = round(vol_today / avg_vol, 2) if avg_vol > 0 else 0
+
+        # ── Bollinger Bands ──
+        band_range = float(upper[i, -1] - lower[i, -1])
+        bb_pos = round((price - float(lower[i, -1])) / band_range, 2) if band_range > 0 else None
+
+        # ── 5-day change ──
+        change_5d = None
+        if n_bars[i] >= 6:
+            c5 = float(close[i, -6])
+            change_5d = round((price - c5) / c5 * 100, 2)
+
+        results[sym] = {
+            'price': price, 'change_pct': change_pct,
+            # RSI
+            'rsi': rsi, 'rsi_delta': rsi_delta, 'rsi_divergence': rsi_divergence,
+            'rsi_range': rsi_range, 'rsi_had_extreme': rsi_had_extreme,
+            # MACD
+            'macd_hist': macd_cur, 'macd_hist_prev': macd_prev,
+            'macd_hist_direction': macd_hist_dir, 'macd_converging': macd_converging,
+            # ATR + ADX
+            'atr_pct': atr_pct,
+            'adx': adx_val, 'plus_di': pdi, 'minus_di': mdi,
+            # SMAs
+            'sma50': s50, 'sma200': s200,
+            'sma200_distance_pct': sma200_dist, 'sma50_distance_pct': sma50_dist,
+            # Volume
+            'volume': avg_vol, 'vol_today': vol_today, 'vol_ratio': vol_ratio,
+            # Bollinger
+            'bb_width_percentile': ind.scalar(bb_pctl[i], 1),
+            'bb_position': bb_pos,
+            # Other
+            'change_5d': change_5d,
+            # Enrichment (Phase 2)
+            'analyst_rating': None, 'short_pct': None,
+            'earnings_date': None, 'market_cap': None, 'sector': None,
+        }
+    return results
+
+
+# ── Phase 1b: Intraday Timeframes ──
+
+def calc_intraday_technicals(bars, symbols, length=INTRADAY_BARS):
+    """RSI (+delta), ADX/DI and ATR% on intraday bars for all symbols at once.
+    Only the newest `length` bars per symbol are used. The bias is LONG/SHORT
+    when RSI side and DI direction agree, else None."""
+    import indicators as ind
+
+    frames = {sym: bars[sym] for sym in symbols if sym in bars and len(bars[sym]) >= 30}
+    if not frames:
+        return {}
+    syms, m = ind.from_frames(frames, fields=('Close', 'High', 'Low'), length=length)
+    close, high, low = m['Close'], m['High'], m['Low']
+    rsi_m = ind.rsi(close)
+    atr = ind.atr(high, low, close)[:, -1]
+    adx, plus_di, minus_di = (x[:, -1] for x in ind.adx(high, low, close))
+
+    results = {}
+    for i, sym in enumerate(syms):
+        price = float(close[i, -1])
+        rsi = ind.scalar(rsi_m[i, -1], 1)
+        if rsi is None or price <= 0:
             continue
+        r5 = ind.scalar(rsi_m[i, -6])
+        pdi, mdi = ind.scalar(plus_di[i]), ind.scalar(minus_di[i])
+        bias = None
+        if pdi is not None and mdi is not None:
+            if rsi > 50 and pdi > mdi:
+                bias = 'LONG'
+            elif rsi < 50 and mdi > pdi:
+                bias = 'SHORT'
+        results[sym] = {
+            'rsi': rsi, 'rsi_delta': round(rsi - r5, 1) if r5 is not None else None,
+            'adx': ind.scalar(adx[i], 1), 'plus_di': pdi, 'minus_di': mdi,
+            'atr_pct': ind.scalar(atr[i] / price * 100, 2), 'bias': bias,
+        }
     return results
 
 
+def add_intraday(data, symbols, timeframes=INTRADAY):
+    """Attach intraday technicals as data[sym]['tf'][timeframe].
+    Bars are downloaded and processed in chunks of INTRADAY_CHUNK symbols,
+    so only one chunk of intraday bars is held in memory at a time."""
+    from bar_store import get_bars
+    for tf, period in timeframes.items():
+        done = 0
+        for i in range(0, len(symbols), INTRADAY_CHUNK):
+            chunk = symbols[i:i + INTRADAY_CHUNK]
+            with span('intraday_download'):
+                bars = get_bars(chunk, period=period, interval=tf)
+            with span('intraday_technicals'):
+                for sym, vals in calc_intraday_technicals(bars, chunk).items():
+                    data[sym].setdefault('tf', {})[tf] = vals
+                    done += 1
+            del bars
+        print(f'    {tf}: {done}/{len(symbols)} symbols')
+
+
 # ── Phase 2: Enrich Top Candidates ──
 
 def enrich_candidates(symbols, data):
-    """Fetch individual yfinance info for top candidates."""
-    import yfinance as yf
-    today = datetime.now(timezone.utc).date()
-
+    """Fetch individual yfinance info for top candidates.
+    Served from the metadata cache (per-field TTLs); only expired fields
+    are fetched, concurrently with a per-symbol timeout and retries."""
+    from meta_cache import get_meta
+    symbols = [sym for sym in symbols if sym in data]
+    meta = get_meta(symbols, ('recommendationKey', 'shortPercentOfFloat', 'marketCap',
+                              'sector', 'earnings_date'))
     for sym in symbols:
-        if sym not in data:
-            continue
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            data[sym]['analyst_rating'] = info.get('recommendationKey')
-            data[sym]['short_pct'] = info.get('shortPercentOfFloat', 0)
-            data[sym]['market_cap'] = info.get('marketCap', 0)
-            data[sym]['sector'] = info.get('sector', '')
-            try:
-                cal = t.calendar
-                if cal and isinstance(cal, dict) and 'Earnings Date' in cal:
-                    dates = cal['Earnings Date']
-                    if dates:
-                        ed = dates[0].date() if hasattr(dates[0], 'date') else dates[0]
-                        if ed >= today:
-                            data[sym]['earnings_date'] = str(ed)
-            except Exception:
-                pass
-        except Exception as e:
-            print(f'  Enrich {sym}: {e}')
+        m = meta[sym]
+        data[sym]['analyst_rating'] = m['recommendationKey']
+        data[sym]['short_pct'] = m['shortPercentOfFloat'] or 0
+        data[sym]['market_cap'] = m['marketCap'] or 0
+        data[sym]['sector'] = m['sector'] or ''
+        data[sym]['earnings_date'] = m['earnings_date']
 
 
 # ── Hard Gates ──
@@ -392,323 +521,17 @@ def passes_hard_gates(sym, d):
     return True
 
 
-# ── v4 Scoring: Trend/Momentum (not reversal!) ──
-#
-# Philosophy: Score stocks with TREND CONFIRMATION.
-# LONG = uptrend + pullback to support + momentum resuming
-# SHORT = downtrend + bounce to resistance + momentum fading
-# Falling knives (RSI <30 under SMA200) get ZERO, not bonus points.
-#
-# Weight distribution (max ~100):
-#   Trend alignment (SMA200)     0-15  (mandatory foundation)
-#   SMA50 pullback/rejection     0-12  (entry timing)
-#   RSI sweet spot               0-12  (momentum, not extremes)
-#   MACD confirmation            0-13  (momentum direction)
-#   ATR% volatility              0-18  (Turbo leverage needs vol)
-#   ADX trend strength           0-10  (trending vs ranging)
-#   Volume confirmation          0-8   (institutional backing)
-#   Bollinger / squeeze          0-5   (breakout potential)
-#   Extras (SI, analyst, 5d)     0-7   (bonus signals)
-
-def score_long(d):
-    """Score LONG potential (0-100). v4 Trend/Momentum scoring.
-    Rewards: uptrend + pullback + momentum resuming.
-    Penalizes: falling knives, no trend, overextended."""
-    score = 0
-    signals = []
-    rsi = d['rsi']
-    price = d['price']
-    dist200 = d.get('sma200_distance_pct')
-    dist50 = d.get('sma50_distance_pct')
-    adx = d.get('adx')
-    rd = d.get('rsi_delta')
-
-    # ── TREND ALIGNMENT: SMA200 (0-15, mandatory foundation) ──
-    # Above SMA200 = uptrend. Below = no LONG setup.
-    if dist200 is not None:
-        if dist200 < 0:
-            # Below SMA200: heavy penalty, kills the setup
-            score -= 15
-            signals.append('UNTER SMA200')
-        elif 0 <= dist200 <= 5:
-            score += 15; signals.append('Uptrend nah SMA200')
-        elif 5 < dist200 <= 15:
-            score += 12; signals.append('Uptrend')
-        elif 15 < dist200 <= 30:
-            score += 8
-        else:
-            score += 4  # Very extended above SMA200
-
-    # ── SMA50 PULLBACK TIMING (0-12) ──
-    # Best LONG: price pulled back to SMA50 in an uptrend
-    if dist50 is not None and dist200 is not None and dist200 >= 0:
-        if -3 <= dist50 <= 1:
-            score += 12; signals.append('SMA50 Pullback')
-        elif -5 <= dist50 <= 3:
-            score += 8; signals.append('Nahe SMA50')
-        elif dist50 > 3:
-            score += 4  # Above SMA50, trending
-
-    # ── RSI SWEET SPOT (0-12) ──
-    # Ideal LONG: RSI 35-55 (cooled off in uptrend, ready to resume)
-    # NOT oversold extremes (falling knife) or overbought (too late)
-    if 35 <= rsi <= 45:
-        score += 12; signals.append(f'RSI {rsi:.0f} Pullback-Zone')
-    elif 45 < rsi <= 55:
-        score += 10; signals.append(f'RSI {rsi:.0f} neutral')
-    elif 30 <= rsi < 35:
-        score += 6; signals.append(f'RSI {rsi:.0f} niedrig')
-    elif 55 < rsi <= 65:
-        score += 5  # Still ok, momentum
-    elif rsi > 70:
-        score -= 5  # Overbought = bad entry for LONG
-    elif rsi < 30:
-        score -= 8  # Falling knife territory
-
-    # RSI delta: momentum resuming (0-8)
-    if rd is not None:
-        if rd > 5 and 30 <= rsi <= 55:
-            score += 8; signals.append(f'RSI dreht +{rd:.0f}')
-        elif rd > 3 and rsi <= 55:
-            score += 5
-        elif rd > 0:
-            score += 2
-        elif rd < -5:
-            score -= 3  # Momentum fading
-
-    # RSI divergence (0-5)
-    div = d.get('rsi_divergence')
-    if div == 'bullish' and dist200 is not None and dist200 >= 0:
-        score += 5; signals.append('DIV bullish')
-
-    # ── MACD CONFIRMATION (0-13) ──
-    mc = d.get('macd_hist')
-    mp = d.get('macd_hist_prev')
-    m_dir = d.get('macd_hist_direction')
-    if mc is not None and mp is not None:
-        if mp < 0 and mc > 0:
-            score += 10; signals.append('MACD Cross UP')
-        elif mc > 0 and m_dir == 'increasing':
-            score += 8; signals.append('MACD steigend')
-        elif mc > 0:
-            score += 5
-        elif mp < 0 and mc < 0 and m_dir == 'increasing':
-            score += 3  # Converging from below = potential cross
-
-    # ── ATR% VOLATILITY (0-18, Turbo king) ──
-    atr = d.get('atr_pct')
-    if atr is not None:
-        if atr >= 5.0:
-            score += 18; signals.append(f'ATR {atr:.1f}%')
-        elif atr >= 3.5:
-            score += 14
-        elif atr >= 2.5:
-            score += 9
-        elif atr >= 1.5:
-            score += 4
-
-    # ── ADX TREND STRENGTH (0-10) ──
-    if adx is not None:
-        if adx >= 35:
-            score += 10; signals.append(f'ADX {adx:.0f} stark')
-        elif adx >= 25:
-            score += 7; signals.append(f'ADX {adx:.0f}')
-        elif adx >= 20:
-            score += 3
-        else:
-            score -= 2  # No trend = bad for momentum
-
-    # ── VOLUME CONFIRMATION (0-8) ──
-    vr = d.get('vol_ratio') or 0
-    chg = d.get('change_pct', 0)
-    if vr >= 2.5 and chg > 0:
-        score += 8; signals.append(f'Vol {vr:.1f}x')
-    elif vr >= 1.5 and chg > 0:
-        score += 5
-    elif vr >= 1.5 and chg < -1:
-        score -= 3  # High vol on red = distribution
-
-    # ── BOLLINGER SQUEEZE (0-5) ──
-    bb_pct = d.get('bb_width_percentile')
-    bb_pos = d.get('bb_position')
-    if bb_pct is not None and bb_pos is not None:
-        if bb_pct < 15 and adx and adx >= 20:
-            score += 5; signals.append('BB Squeeze')
-        elif bb_pct < 25:
-            score += 2
-
-    # ── EXTRAS (0-7) ──
-    # Short Interest: squeeze fuel for LONG
-    si = d.get('short_pct') or 0
-    if si >= 0.20:
-        score += 4; signals.append(f'SI {si*100:.0f}%')
-    elif si >= 0.10:
-        score += 2
-
-    # Analyst
-    rating = d.get('analyst_rating') or ''
-    if rating in ('strong_buy', 'strongBuy'):
-        score += 3
-    elif rating in ('buy',):
-        score += 2
-
-    # 5-day pullback in uptrend
-    c5d = d.get('change_5d')
-    if c5d is not None and -8 <= c5d <= -2 and dist200 is not None and dist200 >= 0:
-        score += 5; signals.append('5d Pullback im Uptrend')
-
-    return max(0, min(100, score)), signals
-
-
-def score_short(d):
-    """Score SHORT potential (0-100). v4 Trend/Momentum scoring.
-    Rewards: downtrend + bounce to resistance + momentum fading.
-    Penalizes: strong uptrends, oversold bounces."""
-    score = 0
-    signals = []
-    rsi = d['rsi']
-    price = d['price']
-    dist200 = d.get('sma200_distance_pct')
-    dist50 = d.get('sma50_distance_pct')
-    adx = d.get('adx')
-    rd = d.get('rsi_delta')
-
-    # ── TREND ALIGNMENT: SMA200 (0-15, mandatory foundation) ──
-    # Below SMA200 = downtrend. Above = no SHORT setup.
-    if dist200 is not None:
-        if dist200 > 0:
-            # Above SMA200: heavy penalty, kills the setup
-            score -= 15
-            signals.append('UEBER SMA200')
-        elif -5 <= dist200 < 0:
-            score += 15; signals.append('Downtrend nah SMA200')
-        elif -15 <= dist200 < -5:
-            score += 12; signals.append('Downtrend')
-        elif -30 <= dist200 < -15:
-            score += 8
-        else:
-            score += 4  # Very extended below SMA200
-
-    # ── SMA50 REJECTION TIMING (0-12) ──
-    # Best SHORT: price bounced up to SMA50 in a downtrend
-    if dist50 is not None and dist200 is not None and dist200 < 0:
-        if -1 <= dist50 <= 3:
-            score += 12; signals.append('SMA50 Abprall')
-        elif -3 <= dist50 <= 5:
-            score += 8; signals.append('Nahe SMA50')
-        elif dist50 < -3:
-            score += 4  # Below SMA50, trending down
-
-    # ── RSI SWEET SPOT (0-12) ──
-    # Ideal SHORT: RSI 50-65 (bounced in downtrend, ready to resume down)
-    if 55 <= rsi <= 65:
-        score += 12; signals.append(f'RSI {rsi:.0f} Bounce-Zone')
-    elif 50 <= rsi < 55:
-        score += 10; signals.append(f'RSI {rsi:.0f} neutral')
-    elif 65 < rsi <= 70:
-        score += 6; signals.append(f'RSI {rsi:.0f} hoch')
-    elif 40 <= rsi < 50:
-        score += 5  # Still ok
-    elif rsi < 30:
-        score -= 5  # Oversold = bad entry for SHORT
-    elif rsi > 75:
-        score -= 8  # Extreme = could be strong momentum, risky short
-
-    # RSI delta: momentum fading (0-8)
-    if rd is not None:
-        if rd < -5 and 45 <= rsi <= 70:
-            score += 8; signals.append(f'RSI faellt {rd:.0f}')
-        elif rd < -3 and rsi >= 45:
-            score += 5
-        elif rd < 0:
-            score += 2
-        elif rd > 5:
-            score -= 3  # Momentum picking up = bad for short
-
-    # RSI divergence (0-5)
-    div = d.get('rsi_divergence')
-    if div == 'bearish' and dist200 is not None and dist200 < 0:
-        score += 5; signals.append('DIV bearish')
-
-    # ── MACD CONFIRMATION (0-13) ──
-    mc = d.get('macd_hist')
-    mp = d.get('macd_hist_prev')
-    m_dir = d.get('macd_hist_direction')
-    if mc is not None and mp is not None:
-        if mp > 0 and mc < 0:
-            score += 10; signals.append('MACD Cross DOWN')
-        elif mc < 0 and m_dir == 'decreasing':
-            score += 8; signals.append('MACD fallend')
-        elif mc < 0:
-            score += 5
-        elif mp > 0 and mc > 0 and m_dir == 'decreasing':
-            score += 3  # Converging from above = potential cross down
-
-    # ── ATR% VOLATILITY (0-18, Turbo king) ──
-    atr = d.get('atr_pct')
-    if atr is not None:
-        if atr >= 5.0:
-            score += 18; signals.append(f'ATR {atr:.1f}%')
-        elif atr >= 3.5:
-            score += 14
-        elif atr >= 2.5:
-            score += 9
-        elif atr >= 1.5:
-            score += 4
-
-    # ── ADX TREND STRENGTH (0-10) ──
-    if adx is not None:
-        if adx >= 35:
-            score += 10; signals.append(f'ADX {adx:.0f} stark')
-        elif adx >= 25:
-            score += 7; signals.append(f'ADX {adx:.0f}')
-        elif adx >= 20:
-            score += 3
-        else:
-            score -= 2  # No trend = bad for momentum
-
-    # ── VOLUME CONFIRMATION (0-8) ──
-    vr = d.get('vol_ratio') or 0
-    chg = d.get('change_pct', 0)
-    if vr >= 2.5 and chg < 0:
-        score += 8; signals.append(f'Vol {vr:.1f}x')
-    elif vr >= 1.5 and chg < 0:
-        score += 5
-    elif vr >= 1.5 and chg > 1:
-        score -= 3  # High vol on green = accumulation
-
-    # ── BOLLINGER SQUEEZE (0-5) ──
-    bb_pct = d.get('bb_width_percentile')
-    bb_pos = d.get('bb_position')
-    if bb_pct is not None and bb_pos is not None:
-        if bb_pct < 15 and adx and adx >= 20:
-            score += 5; signals.append('BB Squeeze')
-        elif bb_pct < 25:
-            score += 2
-
-    # ── EXTRAS (0-7) ──
-    # Short Interest: crowded short = risky
-    si = d.get('short_pct') or 0
-    if si >= 0.25:
-        score -= 5  # Too crowded, squeeze risk
-    elif si >= 0.15:
-        score -= 2
-    elif si < 0.05:
-        score += 2  # Low SI = room to short
-
-    # Analyst
-    rating = d.get('analyst_rating') or ''
-    if rating in ('sell', 'strong_sell', 'strongSell'):
-        score += 3
-    elif rating in ('underperform',):
-        score += 2
-
-    # 5-day bounce in downtrend
-    c5d = d.get('change_5d')
-    if c5d is not None and 2 <= c5d <= 8 and dist200 is not None and dist200 < 0:
-        score += 5; signals.append('5d Bounce im Downtrend')
-
-    return max(0, min(100, score)), signals
+# ── v4 Scoring: Trend/Momentum (rule tables in scoring.py) ──
+
+def score_candidates(data, symbols):
+    """Score LONG and SHORT for `symbols` in one vectorized pass.
+    Returns {'LONG': {sym: (score, signal mask)}, 'SHORT': {...}}; decode the
+    masks with scoring.signal_texts() only for the symbols displayed."""
+    import scoring
+    symbols = list(symbols)
+    result = scoring.score_rows([data[sym] for sym in symbols])
+    return {direction: {sym: (int(scores[i]), int(masks[i])) for i, sym in enumerate(symbols)}
+            for direction, (scores, masks) in result.items()}
 
 
 # ── Portfolio Context ──
@@ -757,6 +580,12 @@ def fmt_candidate(i, score, sym, sector, d, signals, direction, pos_dirs, name='
         line += f' | ATR {d["atr_pct"]:.1f}%'
     line += '\n'
 
+    # Intraday timeframes: RSI + bias per timeframe
+    if d.get('tf'):
+        arrows = {'LONG': '↑', 'SHORT': '↓', None: '→'}
+        line += '   ' + ' | '.join(f'{tf} RSI {v["rsi"]:.0f}{arrows[v["bias"]]}'
+                                    for tf, v in d['tf'].items()) + '\n'
+
     # Signals
     if signals:
         line += f'   {", ".join(signals[:4])}\n'
@@ -783,24 +612,23 @@ def fmt_candidate(i, score, sym, sector, d, signals, direction, pos_dirs, name='
     return line
 
 
-def build_message(all_data, positions, sector_map, scan_time, total_scanned, pos_dirs, name_map=None):
-    """Build the Telegram screener message."""
+def build_message(all_data, positions, sector_map, scan_time, total_scanned, pos_dirs, name_map=None,
+                  index_changes=None, scores=None):
+    """Build the Telegram screener message. `scores` from score_candidates()
+    (computed here if not given)."""
+    from scoring import signal_texts
     name_map = name_map or {}
     passed = {sym: d for sym, d in all_data.items() if passes_hard_gates(sym, d)}
+    scores = scores or score_candidates(all_data, passed)
 
-    long_scores = []
-    short_scores = []
-    for sym, d in passed.items():
-        ls, lsig = score_long(d)
-        ss, ssig = score_short(d)
-        sector = sector_map.get(sym, d.get('sector') or '?')
-        long_scores.append((ls, sym, sector, d, lsig))
-        short_scores.append((ss, sym, sector, d, ssig))
+    def top(direction):
+        ranked = sorted(passed, key=lambda sym: scores[direction][sym][0], reverse=True)[:TOP_N]
+        return [(scores[direction][sym][0], sym, sector_map.get(sym, all_data[sym].get('sector') or '?'),
+                 all_data[sym], signal_texts(all_data[sym], scores[direction][sym][1], direction))
+                for sym in ranked]
 
-    long_scores.sort(key=lambda x: x[0], reverse=True)
-    short_scores.sort(key=lambda x: x[0], reverse=True)
-    top_long = long_scores[:TOP_N]
-    top_short = short_scores[:TOP_N]
+    top_long = top('LONG')
+    top_short = top('SHORT')
 
     sector_conc = calc_sector_concentration(positions, sector_map)
 
@@ -833,8 +661,13 @@ def build_message(all_data, positions, sector_map, scan_time, total_scanned, pos
 
     events = [(d.get('earnings_date'), sym) for sym, d in passed.items() if d.get('earnings_date')]
     events.sort()
-    if events:
+    if events or index_changes:
         msg += f'\n<b>EVENTS</b>\n'
+        for label, change in index_changes or []:
+            if change['added']:
+                msg += f'  {label} neu: {", ".join(change["added"])}\n'
+            if change['removed']:
+                msg += f'  {label} raus: {", ".join(change["removed"])}\n'
         for date, sym in events[:5]:
             msg += f'  {sym}: Earnings {date}\n'
 
@@ -842,55 +675,24 @@ def build_message(all_data, positions, sector_map, scan_time, total_scanned, pos
     return msg
 
 
-def send_telegram(text):
-    """Send message via Telegram. Splits if over 4096 chars."""
-    import os
-    token = os.environ['TELEGRAM_BOT_TOKEN']
-    chat_id = os.environ['TELEGRAM_CHAT_ID']
-    api = f'https://api.telegram.org/bot{token}/sendMessage'
-
-    chunks = []
-    if len(text) <= 4096:
-        chunks = [text]
-    else:
-        current = ''
-        for line in text.split('\n'):
-            if len(current) + len(line) + 1 > 4000:
-                chunks.append(current)
-                current = line
-            else:
-                current = current + '\n' + line if current else line
-        if current:
-            chunks.append(current)
-
-    result = None
-    for chunk in chunks:
-        body = urllib.parse.urlencode({
-            'chat_id': chat_id, 'parse_mode': 'HTML', 'text': chunk,
-        }).encode()
-        req = urllib.request.Request(api, data=body)
-        resp = urllib.request.urlopen(req)
-        result = json.loads(resp.read())
-    return result
-
-
-def main():
+def main(timeframes=INTRADAY, universe=UNIVERSE):
     now = datetime.now(timezone.utc)
     scan_time = now.strftime('%d.%m.%Y %H:%M UTC')
     print(f'[{now.strftime("%H:%M:%S")} UTC] Morning Screener v3')
 
     # 1. Build symbol universe
-    print('  Fetching NASDAQ-100 list...')
-    ndx100, ndx100_sectors, ndx100_names = fetch_nasdaq100_symbols()
-    print(f'  NASDAQ-100: {len(ndx100)} symbols')
+    print(f'  Building universe ({universe})...')
+    with span('universe'):
+        index_syms, index_sectors, index_names, index_changes = build_universe(universe)
 
-    watchlist = get_watchlist()
-    positions = get_open_positions()
+    with span('watchlist'):
+        watchlist = get_watchlist()
+        positions = get_open_positions()
     print(f'  Watchlist: {len(watchlist)} | Positions: {len(positions)} open')
 
     watchlist_syms = {s['symbol'] for s in watchlist}
     position_syms = {p['symbol'] for p in positions}
-    all_symbols = sorted(set(ndx100) | watchlist_syms | position_syms | FUTURES)
+    all_symbols = sorted(index_syms | watchlist_syms | position_syms | FUTURES)
     total_scanned = len(all_symbols)
     print(f'  Total universe: {total_scanned} symbols')
 
@@ -898,28 +700,23 @@ def main():
         print('  No symbols to scan.')
         return
 
-    # Sector map: Wikipedia > watchlist (portfolio has no sector column)
-    sector_map = dict(ndx100_sectors)
+    # Sector map: universe sources > watchlist (portfolio has no sector column)
+    sector_map = dict(index_sectors)
     for s in watchlist:
         sector_map.setdefault(s['symbol'], s.get('sector', 'Unbekannt'))
 
-    # Name map: Wikipedia > watchlist
-    name_map = dict(ndx100_names)
+    # Name map: universe sources > watchlist
+    name_map = dict(index_names)
     for s in watchlist:
         name_map.setdefault(s['symbol'], s.get('name', s['symbol']))
     # Futures get manual sector assignment
     sector_map.setdefault('SI=F', 'Commodities')
     sector_map.setdefault('GC=F', 'Commodities')
 
-    # 2. Phase 1: Batch download
-    print(f'  Phase 1: Batch downloading {total_scanned} symbols...')
-    single = len(all_symbols) == 1
-    batch_data = batch_download(all_symbols)
-    print('  Download complete.')
-
-    # 3. Calculate all technicals
-    print('  Calculating v3 technicals (RSI/delta/div, MACD, ATR, ADX, BB, vol)...')
-    data = calc_technicals(batch_data, all_symbols, single=single)
+    # 2+3. Phase 1: Chunked download + technicals
+    print(f'  Phase 1: Download + v3 technicals (RSI/delta/div, MACD, ATR, ADX, BB, vol), '
+          f'{DAILY_CHUNK} symbols per chunk...')
+    data = scan_daily(all_symbols)
     print(f'  Technicals for {len(data)} symbols')
 
     # 3b. Infer position directions from KO vs current stock price
@@ -931,8 +728,15 @@ def main():
     passed = {sym: d for sym, d in data.items() if passes_hard_gates(sym, d)}
     print(f'  Hard gates: {len(passed)} passed')
 
-    long_pre = sorted([(score_long(d)[0], sym) for sym, d in passed.items()], reverse=True)
-    short_pre = sorted([(score_short(d)[0], sym) for sym, d in passed.items()], reverse=True)
+    # 4a. Intraday timeframes for everything that passed the gates
+    if timeframes:
+        print(f'  Intraday technicals ({", ".join(timeframes)}) for {len(passed)} symbols...')
+        add_intraday(data, sorted(passed), timeframes)
+
+    with span('scoring'):
+        scores = score_candidates(data, passed)
+    long_pre = sorted([(sc, sym) for sym, (sc, _) in scores['LONG'].items()], reverse=True)
+    short_pre = sorted([(sc, sym) for sym, (sc, _) in scores['SHORT'].items()], reverse=True)
 
     enrich_syms = set()
     for sc, sym in long_pre[:ENRICH_N]:
@@ -943,19 +747,40 @@ def main():
     enrich_syms |= position_syms & set(data.keys())
 
     print(f'  Phase 2: Enriching {len(enrich_syms)} candidates...')
-    enrich_candidates(list(enrich_syms), data)
+    with span('enrichment'):
+        enrich_candidates(list(enrich_syms), data)
 
     for sym in enrich_syms:
         if sym in data and data[sym].get('sector'):
             sector_map.setdefault(sym, data[sym]['sector'])
 
+    # Enrichment (short interest, analyst rating) only changes the enriched rows
+    with span('scoring'):
+        for direction, rescored in score_candidates(data, enrich_syms & passed.keys()).items():
+            scores[direction].update(rescored)
+
     # 5. Build and send
-    msg = build_message(data, positions, sector_map, scan_time, total_scanned, pos_dirs, name_map)
+    with span('message'):
+        msg = build_message(data, positions, sector_map, scan_time, total_scanned, pos_dirs, name_map,
+                            index_changes, scores)
     print(f'\n{msg}\n')
 
-    result = send_telegram(msg)
-    print(f'  Telegram sent: {result.get("ok", False)}')
+    with span('telegram'):
+        result = send_telegram(msg)
+    print(f'  Telegram sent: {bool(result and result.get("ok"))}')
 
 
 if __name__ == '__main__':
-    main()
+    if '--profile-startup' in sys.argv:
+        from startup_profile import run
+        sys.exit(run(__file__))
+    timeframes = INTRADAY
+    if '--timeframes' in sys.argv:
+        # e.g. --timeframes 1h,15m  (or --timeframes 1d for daily only)
+        wanted = sys.argv[sys.argv.index('--timeframes') + 1].split(',')
+        timeframes = {tf: INTRADAY[tf] for tf in wanted if tf in INTRADAY}
+    # e.g. --universe nasdaq100,sp500,file:universe/stoxx600.csv
+    universe = sys.argv[sys.argv.index('--universe') + 1] if '--universe' in sys.argv else UNIVERSE
+    with job_run('morning_screener'):
+        main(timeframes, universe)
+    report()
@@ -0,0 +1,207 @@
+"""Shared Telegram notifier.
+Used by send_telegram.py, tracker_check.py (via outbox.py), portfolio_check.py,
+reddit_gems.py and morning_screener.py.
+
+All messages of a run go over one keep-alive connection to the Bot API.
+Long texts are split at 4096 characters without breaking HTML tags, every
+request is paced and retried by governor.py, and photos are streamed from
+disk as multipart instead of being read into memory.
+
+    await send_message(text)          # async API
+    send_telegram(text, silent=True)  # blocking wrapper for the cron scripts"""
+
+import io
+import json
+import os
+import re
+import threading
+import urllib.error
+import uuid
+
+from env import load_env
+from governor import call, record_bytes, transient
+from http_session import Session
+
+MAX_LEN = 4096      # message limit
+CAPTION_LEN = 1024  # photo caption limit
+BLOCK_SIZE = 64 * 1024
+
+_TAG = re.compile(r'<(/?)([a-zA-Z-]+)[^>]*>')
+_ATOM = re.compile(r'<[^>]*>|&#?\w+;|.', re.S)
+
+
+load_env()
+
+_session = Session('https://api.telegram.org')
+_lock = threading.Lock()  # one connection: requests are serialized
+
+
+# ── Splitting ──
+
+def _len(text):
+    """Length as Telegram counts it (UTF-16 code units, emoji count twice)."""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _units(text, budget):
+    """Break text into pieces of at most `budget`: whole lines where possible,
+    then words, then single atoms (a tag or entity is never cut)."""
+    for line in text.splitlines(keepends=True):
+        if _len(line) <= budget:
+            yield line
+            continue
+        for word in re.findall(r'\S+\s*|\s+', line):
+            if _len(word) <= budget:
+                yield word
+                continue
+            yield from _ATOM.findall(word)
+
+
+def _open_tags(stack, unit):
+    """Stack of (name, opening tag) still open after `unit`."""
+    stack = list(stack)
+    for m in _TAG.finditer(unit):
+        closing_tag, name = m.group(1), m.group(2).lower()
+        if not closing_tag:
+            stack.append((name, m.group(0)))
+        elif any(n == name for n, _ in stack):
+            while stack and stack.pop()[0] != name:
+                pass
+    return stack
+
+
+def _closing(stack):
+    return ''.join(f'</{name}>' for name, _ in reversed(stack))
+
+
+def split_message(text, limit=MAX_LEN):
+    """Split HTML text into chunks of at most `limit` characters.
+    Tags still open at a cut are closed at the end of the chunk and reopened
+    at the start of the next one, so every chunk is valid HTML."""
+    if _len(text) <= limit:
+        return [text]
+    budget = limit // 2  # room for the tags closed/reopened around a cut
+    chunks, current, stack = [], '', []
+    for unit in _units(text, budget):
+        after = _open_tags(stack, unit)
+        # The tags still open *after* this unit are what a later cut must close
+        if current and _len(current) + _len(unit) + _len(_closing(after)) > limit:
+            chunks.append(current.rstrip('\n') + _closing(stack))
+            current = ''.join(tag for _, tag in stack)
+        current += unit
+        stack = after
+    if current.strip():
+        chunks.append(current.rstrip('\n'))
+    return chunks
+
+
+# ── Requests ──
+
+def _api(method, body, content_type):
+    """One Bot API call over the shared connection. Errors are raised as
+    HTTPError so governor.py can honor Telegram's retry_after."""
+    path = f'bot{os.environ["TELEGRAM_BOT_TOKEN"]}/{method}'
+    headers = {'Content-Type': content_type}
+    sent = len(body) if isinstance(body, bytes) else 0
+    if isinstance(body, tuple):  # (body factory, length) for streamed uploads
+        body, headers['Content-Length'], sent = body[0], str(body[1]), body[1]
+    with _lock:
+        status, payload, resp_headers = _session.request('POST', path, body, headers)
+    record_bytes('telegram', sent + len(payload))
+    if status >= 400:
+        raise urllib.error.HTTPError(f'{method}', status, payload[:200].decode(errors='replace'),
+                                     resp_headers, io.BytesIO(payload))
+    return json.loads(payload)
+
+
+def _post_json(method, fields):
+    body = json.dumps(fields).encode()
+    return call('telegram', _api, method, body, 'application/json')
+
+
+def _multipart(fields, file_field, path):
+    """Streaming multipart body: (factory yielding the parts, total length).
+    The file is read in BLOCK_SIZE pieces, never held in memory as a whole."""
+    boundary = uuid.uuid4().hex
+    head = b''.join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items())
+    head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+             f'filename="{os.path.basename(path)}"\r\n'
+             f'Content-Type: application/octet-stream\r\n\r\n').encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+
+    def parts():
+        yield head
+        with open(path, 'rb') as f:
+            while block := f.read(BLOCK_SIZE):
+                yield block
+        yield tail
+
+    length = len(head) + os.path.getsize(path) + len(tail)
+    return (parts, length), f'multipart/form-data; boundary={boundary}'
+
+
+# ── Blocking API ──
+
+def send_chunks(text, silent=False, parse_mode='HTML'):
+    """Send a message split into chunks, stopping at the first transient failure.
+    Returns (API result of the last part, chunks not delivered), so a retry
+    can resend only the rest instead of repeating delivered parts. A part
+    Telegram rejects for good (e.g. 400 "can't parse entities") is logged and
+    skipped, never returned for a retry; the result is then None."""
+    result, rejected, chunks = None, False, split_message(text)
+    for i, chunk in enumerate(chunks):
+        fields = {'chat_id': os.environ['TELEGRAM_CHAT_ID'], 'text': chunk,
+                  'disable_notification': silent}
+        if parse_mode:
+            fields['parse_mode'] = parse_mode
+        try:
+            result = _post_json('sendMessage', fields)
+        except Exception as e:
+            if transient(e):
+                print(f'  Telegram error (after {i}/{len(chunks)} parts): {e}')
+                return None, chunks[i:]
+            print(f'  Telegram rejected part {i + 1}/{len(chunks)}, dropped: {e} | {chunk[:80]!r}')
+            rejected = True
+    return (None if rejected else result), []
+
+
+def send_telegram(text, silent=False, parse_mode='HTML'):
+    """Send a message (split into several if needed).
+    Returns the API result of the last part, or None on error."""
+    result, unsent = send_chunks(text, silent, parse_mode)
+    return None if unsent else result
+
+
+def send_telegram_photo(path, caption='', silent=False):
+    """Upload a photo from disk (streamed). A caption over Telegram's
+    1024-character limit is sent as a separate message instead.
+    Returns the API result, or None on error."""
+    fields = {'chat_id': os.environ['TELEGRAM_CHAT_ID'],
+              'disable_notification': str(silent).lower()}
+    if caption and _len(caption) <= CAPTION_LEN:
+        fields.update(caption=caption, parse_mode='HTML')
+    try:
+        body, content_type = _multipart(fields, 'photo', path)
+        result = call('telegram', _api, 'sendPhoto', body, content_type)
+    except Exception as e:
+        print(f'  Telegram error: {e}')
+        return None
+    if caption and 'caption' not in fields:
+        send_telegram(caption, silent=silent)
+    return result
+
+
+# ── Async API ──
+
+async def send_message(text, silent=False, parse_mode='HTML'):
+    """Async send_telegram(): runs in a worker thread, the event loop stays free."""
+    import asyncio  # only the async callers pay for the import, not the cron scripts
+    return await asyncio.to_thread(send_telegram, text, silent, parse_mode)
+
+
+async def send_photo(path, caption='', silent=False):
+    """Async send_telegram_photo()."""
+    import asyncio
+    return await asyncio.to_thread(send_telegram_photo, path, caption, silent)
@@ -0,0 +1,96 @@
+"""Shared outbound Telegram message queue.
+Used by tracker_check.py (cron run and --daemon).
+
+Alerts are queued during a run and sent together by flush(): more than
+DIGEST_THRESHOLD alerts are coalesced into digest messages instead of a burst
+of single ones, every message is split at 4096 characters without breaking
+HTML tags (notifier.send_chunks), and sends are paced by governor.py. Parts that
+still fail transiently (429, 5xx, network) are persisted to OUTBOX_PATH and
+retried first on the next run; parts of a message that were already delivered are
+never sent again, and parts Telegram rejects for good (4xx) are logged and dropped
+instead of holding back every later alert."""
+
+import json
+import os
+import time
+
+OUTBOX_PATH = os.environ.get(
+    'TELEGRAM_OUTBOX',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'telegram_outbox.json'),
+)
+DIGEST_THRESHOLD = 3  # more queued alerts than this are sent as a digest
+MAX_AGE = 6 * 3600    # unsent messages older than this are dropped (stale prices)
+SEPARATOR = '\n\n━━━━━━━━━━\n\n'
+
+
+# ── Queue ──
+
+def _load():
+    try:
+        with open(OUTBOX_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _save(messages):
+    if not messages and not os.path.exists(OUTBOX_PATH):
+        return
+    os.makedirs(os.path.dirname(OUTBOX_PATH), exist_ok=True)
+    tmp = OUTBOX_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(messages, f, ensure_ascii=False)
+    os.replace(tmp, OUTBOX_PATH)
+
+
+class Outbox:
+    """Queue alerts with add(), send them with flush().
+    `send(text, silent)` returns (result, undelivered chunks) like notifier.send_chunks:
+    only transient failures come back as undelivered, permanent ones are dropped."""
+
+    def __init__(self, send, threshold=DIGEST_THRESHOLD):
+        self.send = send
+        self.threshold = threshold
+        self.pending = []  # [{'text', 'silent'}]
+        now = time.time()
+        stored = _load()
+        self.retry = [m for m in stored if now - m.get('ts', 0) <= MAX_AGE]
+        if len(self.retry) < len(stored):
+            print(f'  [outbox: dropped {len(stored) - len(self.retry)} stale messages]')
+
+    def add(self, text, silent=True):
+        self.pending.append({'text': text, 'silent': silent})
+
+    def _build(self):
+        """Pending alerts -> messages, coalesced into a digest above the threshold."""
+        if len(self.pending) <= self.threshold:
+            return [(m['text'], m['silent']) for m in self.pending]
+        header = f'📬 <b>{len(self.pending)} Alerts</b>\n\n'
+        silent = all(m['silent'] for m in self.pending)
+        return [(header + SEPARATOR.join(m['text'] for m in self.pending), silent)]
+
+    def flush(self):
+        """Send retried + pending messages in order. Returns the number sent;
+        failed messages are kept (and persisted) for the next flush or run."""
+        now = time.time()
+        queue = [(m['text'], m['silent'], m['ts']) for m in self.retry]
+        queue += [(text, silent, now) for text, silent in self._build()]
+        self.pending, self.retry = [], []
+
+        sent, failed = 0, []
+        for text, silent, ts in queue:
+            if failed:  # keep order: once one fails, defer the rest
+                failed.append({'text': text, 'silent': silent, 'ts': ts})
+                continue
+            result, unsent = self.send(text, silent)
+            if unsent:  # transient: only the parts not delivered yet, each as its own entry
+                failed += [{'text': chunk, 'silent': silent, 'ts': ts} for chunk in unsent]
+            elif result:
+                sent += 1
+                print(f'  ALERT SENT: {text[:60]}...')
+            # else: rejected for good (logged by send): dropped, never blocks later alerts
+        self.retry = failed  # daemon: retried on the next flush
+        _save(failed)
+        if failed:
+            print(f'  [outbox: {len(failed)} messages kept for the next run]')
+        return sent
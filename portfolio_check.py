@@ -2,13 +2,13 @@
 """Silver Hawk Trading - Portfolio Health Check (GitHub Actions).
 Fetches live data for open positions + full watchlist, sends Telegram alert with RSI flags."""
 
-import json
-import os
-import urllib.parse
-import urllib.request
+import sys
 from datetime import datetime, timezone
 
+from governor import report
+from notifier import send_telegram
 from supabase_client import supabase_request
+from telemetry import job_run, span
 
 
 def get_open_positions():
@@ -24,52 +24,49 @@ def get_watchlist_symbols():
 
 
 def fetch_yfinance_data(symbols):
-    """Fetch live yfinance data for a list of symbols."""
-    import yfinance as yf
-    import numpy as np
+    """Fetch live data for a list of symbols: quote-only prices, cached
+    50/200-day averages (metadata cache) and RSI/MACD from the bar cache."""
+    import indicators as ind
+    from bar_store import get_bars
+    from meta_cache import get_meta
+    from quotes import fetch_quotes
 
     data = {}
+    quotes = {}
+    hists = {}
+    bars = get_bars(symbols, period='3mo')
+    live = fetch_quotes(symbols)
+    meta = get_meta(symbols, ('fiftyDayAverage', 'twoHundredDayAverage'))
     for sym in symbols:
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            hist = t.history(period='3mo')
-
-            rsi = None
-            macd_hist = None
-
-            if len(hist) >= 14:
-                delta = hist['Close'].diff()
-                gain = delta.where(delta > 0, 0).ewm(alpha=1/14, min_periods=14).mean()
-                loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, min_periods=14).mean()
-                rs = gain / loss
-                rsi_val = float((100 - (100 / (1 + rs))).iloc[-1])
-                if not np.isnan(rsi_val):
-                    rsi = round(rsi_val, 1)
-
-            if len(hist) >= 26:
-                exp12 = hist['Close'].ewm(span=12, adjust=False).mean()
-                exp26 = hist['Close'].ewm(span=26, adjust=False).mean()
-                macd = exp12 - exp26
-                signal = macd.ewm(span=9, adjust=False).mean()
-                macd_hist = round(float((macd - signal).iloc[-1]), 2)
-
-            price = info.get('currentPrice') or info.get('regularMarketPrice', 0)
-            prev_close = info.get('previousClose', 0)
-            change_pct = ((price - prev_close) / prev_close * 100) if prev_close else 0
-
-            data[sym] = {
-                'price': price,
-                'change_pct': round(change_pct, 2),
-                'rsi': rsi,
-                'macd_hist': macd_hist,
-                'sma50': info.get('fiftyDayAverage', 0),
-                'sma200': info.get('twoHundredDayAverage', 0),
-                'market_state': info.get('marketState', 'UNKNOWN'),
-            }
-        except Exception as e:
-            print(f'  {sym}: ERROR - {e}')
+        q = live.get(sym, {'error': 'no quote'})
+        if 'error' in q:
+            print(f'  {sym}: ERROR - {q["error"]}')
             data[sym] = None
+            continue
+        quotes[sym] = {**q, **meta[sym]}
+        hists[sym] = bars[sym]['Close'].values if sym in bars else []
+
+    # Indicators for all fetched symbols in one pass
+    fetched = list(quotes)
+    close = ind.align([hists[s] for s in fetched])
+    n_bars = ind.bar_counts(close)
+    rsi = ind.latest(ind.rsi(close))
+    macd_hist = ind.latest(ind.macd(close)[2])
+
+    for i, sym in enumerate(fetched):
+        q = quotes[sym]
+        price = q['price']
+        change_pct = q['change_pct']
+
+        data[sym] = {
+            'price': price,
+            'change_pct': round(change_pct, 2),
+            'rsi': ind.scalar(rsi[i], 1),
+            'macd_hist': ind.scalar(macd_hist[i], 2) if n_bars[i] >= 26 else None,
+            'sma50': q['fiftyDayAverage'] or 0,
+            'sma200': q['twoHundredDayAverage'] or 0,
+            'market_state': q['market_state'],
+        }
 
     return data
 
@@ -200,28 +197,14 @@ def build_message(positions, watchlist, data, check_time):
     return msg
 
 
-def send_telegram(text):
-    """Send message via Telegram."""
-    token = os.environ['TELEGRAM_BOT_TOKEN']
-    chat_id = os.environ['TELEGRAM_CHAT_ID']
-
-    body = urllib.parse.urlencode({
-        'chat_id': chat_id,
-        'parse_mode': 'HTML',
-        'text': text
-    }).encode()
-    req = urllib.request.Request(f'https://api.telegram.org/bot{token}/sendMessage', data=body)
-    resp = urllib.request.urlopen(req)
-    return json.loads(resp.read())
-
-
 def main():
     now = datetime.now(timezone.utc)
     check_time = now.strftime('%d.%m.%Y %H:%M UTC')
     print(f'[{now.strftime("%H:%M:%S")} UTC] Portfolio Health Check')
 
-    positions = get_open_positions()
-    watchlist = get_watchlist_symbols()
+    with span('positions'):
+        positions = get_open_positions()
+        watchlist = get_watchlist_symbols()
 
     # Collect all unique symbols
     all_symbols = list(set(
@@ -234,7 +217,8 @@ def main():
         return
 
     print(f'  Fetching {len(all_symbols)} symbols...')
-    data = fetch_yfinance_data(all_symbols)
+    with span('fetch'):
+        data = fetch_yfinance_data(all_symbols)
 
     for sym in sorted(data.keys()):
         d = data[sym]
@@ -242,10 +226,17 @@ def main():
             owned = ' [OWNED]' if sym in set(p['symbol'] for p in positions) else ''
             print(f'  {sym}: ${d["price"]:.2f} RSI={d["rsi"]}{owned}')
 
-    msg = build_message(positions, watchlist, data, check_time)
-    result = send_telegram(msg)
-    print(f'  Telegram sent: {result.get("ok", False)}')
+    with span('message'):
+        msg = build_message(positions, watchlist, data, check_time)
+    with span('telegram'):
+        result = send_telegram(msg)
+    print(f'  Telegram sent: {bool(result and result.get("ok"))}')
 
 
 if __name__ == '__main__':
-    main()
+    if '--profile-startup' in sys.argv:
+        from startup_profile import run
+        sys.exit(run(__file__))
+    with job_run('portfolio_check'):
+        main()
+    report()
@@ -0,0 +1,87 @@
+"""Lightweight concurrent quote fetcher.
+Used by tracker_check.py for price alerts and for the live price fields in
+update_stocks.py, portfolio_check.py and reddit_gems.py.
+
+Reads only the quote meta block of Yahoo's chart endpoint (a few hundred bytes)
+instead of the full Ticker.info blob, and fetches all symbols concurrently with
+bounded parallelism and a per-request timeout, so one slow symbol cannot hold
+up the others."""
+
+import asyncio
+import json
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from governor import call, record_bytes
+
+CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1d'
+USER_AGENT = 'Mozilla/5.0 (SilverHawk/1.0)'
+MAX_CONCURRENCY = 8
+TIMEOUT = 8  # seconds per request attempt (socket timeout, not time spent queued)
+
+
+def _market_state(meta, now=None):
+    """Derive PRE/REGULAR/POST/CLOSED from the chart's currentTradingPeriod."""
+    now = now or time.time()
+    periods = meta.get('currentTradingPeriod') or {}
+    for name, state in (('regular', 'REGULAR'), ('pre', 'PRE'), ('post', 'POST')):
+        p = periods.get(name) or {}
+        if p.get('start', 0) <= now < p.get('end', 0):
+            return state
+    return 'CLOSED' if periods else 'UNKNOWN'
+
+
+def fetch_quote(symbol, timeout=TIMEOUT):
+    """Fetch one quote (blocking). Returns the tracker's price dict."""
+    url = CHART_URL.format(symbol=urllib.parse.quote(symbol))
+    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    # One retry at most: a slow symbol costs at most two timeouts
+    resp = call('yahoo', urllib.request.urlopen, req, timeout=timeout, retries=1)
+    body = resp.read()
+    record_bytes('yahoo', len(body))
+    meta = json.loads(body)['chart']['result'][0]['meta']
+    price = meta.get('regularMarketPrice') or 0
+    prev_close = meta.get('chartPreviousClose') or meta.get('previousClose') or 0
+    change_pct = ((price - prev_close) / prev_close * 100) if prev_close else 0
+    return {
+        'price': price,
+        'change_pct': change_pct,
+        'day_high': meta.get('regularMarketDayHigh', 0),
+        'day_low': meta.get('regularMarketDayLow', 0),
+        'prev_close': prev_close,
+        'volume': meta.get('regularMarketVolume'),
+        'year_high': meta.get('fiftyTwoWeekHigh'),
+        'year_low': meta.get('fiftyTwoWeekLow'),
+        'market_state': _market_state(meta),
+    }
+
+
+async def fetch_quotes_async(symbols, max_concurrency=MAX_CONCURRENCY, timeout=TIMEOUT):
+    """Fetch quotes for all symbols concurrently.
+    Failed or timed-out symbols get {'error': ...} instead of a price.
+    The timeout is the socket timeout of each request, so waiting for a worker
+    or for the yahoo rate limit (long symbol lists) never counts against it."""
+    loop = asyncio.get_running_loop()
+    # Own pool: the worker count bounds parallelism, and a hung request
+    # does not block shutdown of the event loop's default executor
+    pool = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def one(sym):
+        try:
+            return sym, await loop.run_in_executor(pool, fetch_quote, sym, timeout)
+        except TimeoutError:
+            return sym, {'error': f'timeout after {timeout}s'}
+        except Exception as e:
+            return sym, {'error': str(e)}
+
+    try:
+        return dict(await asyncio.gather(*(one(s) for s in symbols)))
+    finally:
+        pool.shutdown(wait=False)
+
+
+def fetch_quotes(symbols, max_concurrency=MAX_CONCURRENCY, timeout=TIMEOUT):
+    """Blocking wrapper around fetch_quotes_async()."""
+    return asyncio.run(fetch_quotes_async(symbols, max_concurrency, timeout))
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""Shared record/replay layer for all network traffic.
+Used by the cron scripts (update_stocks.py, tracker_check.py, portfolio_check.py,
+morning_screener.py, reddit_gems.py) via `python3 recorder.py record|replay`.
+
+Three seams carry every outbound request: http_session.Session.request
+(Supabase REST + Telegram Bot API), urllib.request.urlopen (Yahoo quotes,
+Wikipedia, ApeWisdom) and the yfinance entry points (yf.download, Ticker
+attributes such as .info/.calendar and Ticker method calls keyed by their
+arguments). `record` runs the script normally and
+stores every response (or error) on a tape; `replay` answers the same
+requests from the tape in recorded order, without network, without importing
+yfinance and without rate limiting, so a job runs end-to-end offline at full
+speed and can be timed.
+
+Both modes start from an empty temporary cache (bars, metadata, constituents,
+alert levels, outbox, job runs), so a replay asks exactly what the recording asked.
+The tape also stores the recording's start time; a replay runs on a clock
+shifted back to it (time.time and datetime.now), so market-hours gates,
+cache TTLs and download windows decide as they did when it was recorded.
+Request headers and bodies are never stored and secrets are masked in the
+request keys.
+
+    python3 recorder.py record tracker_check.py             # once, online
+    python3 recorder.py replay tracker_check.py             # offline, repeatable
+    NETWORK_TAPE=/tmp/ms.tape python3 recorder.py replay morning_screener.py --timeframes 1d"""
+
+import builtins
+import datetime
+import http.client
+import io
+import os
+import pickle
+import runpy
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import urllib.error
+import urllib.parse
+import urllib.request
+
+TAPE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'tapes')
+# Cache locations pointed at a fresh temp dir for every record/replay run
+CACHE_ENV = {
+    'BAR_CACHE_DIR': 'bars',
+    'META_CACHE_PATH': 'meta.json',
+    'CONSTITUENTS_CACHE': 'constituents.json',
+    'ALERT_LEVELS_SNAPSHOT': 'alert_levels.json',
+    'TELEGRAM_OUTBOX': 'telegram_outbox.json',
+    'JOB_RUNS_PATH': 'job_runs.json',
+}
+# Stand-in credentials for replays without a .env (masked to the same keys)
+REPLAY_ENV = {
+    'SUPABASE_URL': 'https://supabase.invalid',
+    'SUPABASE_ANON_KEY': 'replay-key',
+    'TELEGRAM_BOT_TOKEN': 'replay-token',
+    'TELEGRAM_CHAT_ID': '0',
+}
+
+
+class TapeMiss(LookupError):
+    """A replayed request that was never recorded."""
+
+
+# ── Tape ──
+
+def _mask(text):
+    """Replace credentials in a request key with placeholders."""
+    secrets = {
+        '<supabase>': urllib.parse.urlsplit(os.environ.get('SUPABASE_URL', '')).netloc,
+        '<key>': os.environ.get('SUPABASE_ANON_KEY'),
+        '<token>': os.environ.get('TELEGRAM_BOT_TOKEN'),
+    }
+    for label, value in secrets.items():
+        if value and len(value) >= 8:  # real credentials; never mask short fragments
+            text = text.replace(value, label)
+    return text
+
+
+def _freeze(e):
+    """Exception -> picklable form (HTTPError keeps its status and body)."""
+    if isinstance(e, urllib.error.HTTPError):
+        body = e.read() if e.fp else b''
+        return ('http', e.url, e.code, e.msg, list((e.headers or {}).items()), body)
+    try:
+        pickle.dumps(e)
+        return ('exc', e)
+    except Exception:
+        return ('exc', RuntimeError(f'{type(e).__name__}: {e}'))
+
+
+def _thaw(frozen):
+    if frozen[0] == 'http':
+        _, url, code, msg, items, body = frozen
+        return urllib.error.HTTPError(url, code, msg, _message(items), io.BytesIO(body))
+    return frozen[1]
+
+
+def _message(items):
+    """Header list -> case-insensitive HTTPMessage, like a live response."""
+    msg = http.client.HTTPMessage()
+    for name, value in items:
+        msg[name] = value
+    return msg
+
+
+class Tape:
+    """Recorded answers per request key, replayed in recorded order
+    (the last answer repeats if a request comes more often than recorded)."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self.entries = {}  # key -> [(ok, value or frozen error)]
+        self.started = time.time()  # replay: when the tape was recorded (None for old tapes)
+        self.cursor = {}
+        self.calls = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if mode == 'replay':
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            if 'entries' in data:
+                self.entries, self.started = data['entries'], data['started']
+            else:  # tapes recorded before the start time was stored
+                self.entries, self.started = data, None
+
+    def through(self, key, fetch):
+        """record: run fetch() and store its result or error; replay: answer from the tape."""
+        with self.lock:
+            self.calls += 1
+        if self.mode == 'record':
+            try:
+                value = fetch()
+            except Exception as e:
+                frozen = _freeze(e)
+                with self.lock:
+                    self.entries.setdefault(key, []).append((False, frozen))
+                if frozen[0] == 'http':
+                    raise _thaw(frozen) from None  # body was read for the tape
+                raise
+            with self.lock:
+                self.entries.setdefault(key, []).append((True, value))
+            return value
+        with self.lock:
+            answers = self.entries.get(key)
+            if not answers:
+                self.misses += 1
+                raise TapeMiss(f'not on tape: {key}')
+            i = self.cursor.get(key, 0)
+            self.cursor[key] = i + 1
+        ok, value = answers[min(i, len(answers) - 1)]
+        if not ok:
+            raise _thaw(value)
+        return value
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump({'started': self.started, 'entries': self.entries}, f)
+        os.replace(tmp, self.path)
+
+
+# ── Seams ──
+
+class _Response(io.BytesIO):
+    """urlopen() result served from memory."""
+
+    def __init__(self, body, status, headers, url):
+        super().__init__(body)
+        self.status = status
+        self.headers = headers
+        self.url = url
+
+    def getcode(self):
+        return self.status
+
+
+class _Ticker:
+    """yf.Ticker stand-in: attribute reads (.info, .calendar) and method calls
+    (.history(...), keyed by their arguments) go through the tape."""
+
+    def __init__(self, tape, symbol, real=None):
+        self._tape = tape
+        self._real = real(symbol) if real else None
+        self.ticker = symbol
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        key = ('yf.Ticker', self.ticker, name)
+        if self._real is not None:
+            is_method = callable(getattr(type(self._real), name, None))
+        else:
+            is_method = key not in self._tape.entries  # replay: attributes were recorded as reads
+        if not is_method:
+            return self._tape.through(key, lambda: getattr(self._real, name))
+
+        def method(*args, **kwargs):
+            return self._tape.through(key + (repr(args), repr(sorted(kwargs.items()))),
+                                      lambda: getattr(self._real, name)(*args, **kwargs))
+        return method
+
+
+_real_datetime = datetime.datetime
+
+
+class _ClockType(type):
+    """Real datetime objects still pass isinstance() checks against the stand-in."""
+
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, _real_datetime)
+
+    def __subclasscheck__(cls, sub):
+        return issubclass(sub, _real_datetime)
+
+
+class _ReplayDatetime(_real_datetime, metaclass=_ClockType):
+    """datetime.datetime whose now()/utcnow() follow the (shifted) time.time."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return _real_datetime.fromtimestamp(time.time(), tz)
+
+    @classmethod
+    def utcnow(cls):
+        return _real_datetime.fromtimestamp(time.time(), datetime.timezone.utc).replace(tzinfo=None)
+
+
+def set_clock(started):
+    """Shift time.time and datetime.now so the run starts at `started` (epoch seconds).
+    datetime.datetime itself is a C type that extension modules (pandas) are built
+    against, so only this repo's modules get the stand-in via `from datetime import`."""
+    real_time = time.time
+    offset = started - real_time()
+    time.time = lambda: real_time() + offset
+
+    clock = types.ModuleType('datetime')
+    clock.__dict__.update(vars(datetime))
+    clock.datetime = _ReplayDatetime
+    here = os.path.dirname(os.path.abspath(__file__))
+    real_import = builtins.__import__
+
+    def _import(name, globals=None, locals=None, fromlist=(), level=0):
+        module = real_import(name, globals, locals, fromlist, level)
+        caller = (globals or {}).get('__file__') or ''
+        if name == 'datetime' and caller and os.path.dirname(os.path.abspath(caller)) == here:
+            return clock
+        return module
+
+    builtins.__import__ = _import
+
+
+def install(tape):
+    """Route Supabase/Telegram, urlopen and yfinance through the tape."""
+    import http_session
+
+    real_request = http_session.Session.request
+
+    def request(self, method, path, body=None, headers=None):
+        def fetch():
+            status, payload, resp_headers = real_request(self, method, path, body, headers)
+            return status, payload, list(resp_headers.items())
+        status, payload, items = tape.through(('http', _mask(self.host), method, _mask(path)), fetch)
+        return status, payload, _message(items)
+
+    http_session.Session.request = request
+
+    real_urlopen = urllib.request.urlopen
+
+    def urlopen(url, *args, **kwargs):
+        req = url if isinstance(url, urllib.request.Request) else urllib.request.Request(url)
+
+        def fetch():
+            with real_urlopen(url, *args, **kwargs) as resp:
+                return resp.status, list(resp.headers.items()), resp.read()
+        status, items, body = tape.through(('url', req.get_method(), _mask(req.full_url)), fetch)
+        return _Response(body, status, _message(items), req.full_url)
+
+    urllib.request.urlopen = urlopen
+
+    if tape.mode == 'replay':
+        yf = sys.modules['yfinance'] = types.ModuleType('yfinance')  # no import, no network
+        real_download = real_ticker = None
+    else:
+        import yfinance as yf
+        real_download, real_ticker = yf.download, yf.Ticker
+
+    def download(tickers, **kwargs):
+        key = ('yf.download', repr(tickers), repr(sorted(kwargs.items())))
+        return tape.through(key, lambda: real_download(tickers, **kwargs))
+
+    yf.download = download
+    yf.Ticker = lambda symbol, *args, **kwargs: _Ticker(tape, symbol, real_ticker)
+
+
+# ── CLI ──
+
+def run(mode, script, args, tape_path=None):
+    """Run `script` (as __main__) recording to or replaying from a tape."""
+    name = os.path.splitext(os.path.basename(script))[0]
+    tape_path = tape_path or os.environ.get('NETWORK_TAPE') or os.path.join(TAPE_DIR, f'{name}.tape')
+    tape = Tape(tape_path, mode)
+    cache = tempfile.mkdtemp(prefix=f'{name}-{mode}-')
+    for var, rel in CACHE_ENV.items():
+        os.environ[var] = os.path.join(cache, rel)
+    if mode == 'replay':
+        for var, value in REPLAY_ENV.items():
+            os.environ.setdefault(var, value)
+        from governor import unthrottle
+        unthrottle()
+        if tape.started is not None:
+            set_clock(tape.started)
+    install(tape)
+
+    sys.argv = [script, *args]
+    code = 0
+    started = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        elapsed = time.perf_counter() - started
+        shutil.rmtree(cache, ignore_errors=True)
+        if mode == 'record':
+            tape.save()
+        print(f'  [tape {mode}: {tape.calls} requests, {tape.misses} not on tape, '
+              f'{elapsed:.2f}s, {tape_path}]')
+    return code
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'replay'):
+        print('Usage: python3 recorder.py record|replay <script.py> [args...]')
+        sys.exit(2)
+    sys.exit(run(sys.argv[1], sys.argv[2], sys.argv[3:]))
@@ -10,10 +10,11 @@ import os
 import sys
 from datetime import datetime, timezone
 
+from governor import call, record_bytes, report
+from notifier import send_telegram
+from telemetry import job_run, span
+
 # ── Config ──
-TOKEN = os.environ['TELEGRAM_BOT_TOKEN']
-CHAT_ID = os.environ['TELEGRAM_CHAT_ID']
-API_TG = f'https://api.telegram.org/bot{TOKEN}'
 
 # Stocks we already own or track (skip these as "gems")
 SKIP_TICKERS = {
@@ -33,8 +34,10 @@ def fetch_reddit_trending():
     url = 'https://apewisdom.io/api/v1.0/filter/all-stocks/page/1'
     req = urllib.request.Request(url, headers={'User-Agent': 'SilverHawk/1.0'})
     try:
-        resp = urllib.request.urlopen(req, timeout=15)
-        data = json.loads(resp.read())
+        resp = call('web', urllib.request.urlopen, req, timeout=15, retries=1)
+        body = resp.read()
+        record_bytes('web', len(body))
+        data = json.loads(body)
         return data.get('results', [])[:MAX_RESULTS]
     except Exception as e:
         print(f'  ApeWisdom error: {e}')
@@ -46,60 +49,69 @@ def fetch_wsb_trending():
     url = 'https://apewisdom.io/api/v1.0/filter/wallstreetbets/page/1'
     req = urllib.request.Request(url, headers={'User-Agent': 'SilverHawk/1.0'})
     try:
-        resp = urllib.request.urlopen(req, timeout=15)
-        data = json.loads(resp.read())
+        resp = call('web', urllib.request.urlopen, req, timeout=15, retries=1)
+        body = resp.read()
+        record_bytes('web', len(body))
+        data = json.loads(body)
         return {r['ticker']: r for r in data.get('results', [])[:30]}
     except Exception:
         return {}
 
 
 def enrich_with_yfinance(tickers):
-    """Fetch yfinance data for a list of tickers. Returns dict of enriched data."""
-    import yfinance as yf
+    """Fetch yfinance data for a list of tickers. Returns dict of enriched data.
+    Prices come from the quote-only endpoint, fundamentals from the metadata cache."""
+    import indicators as ind
+    from bar_store import get_bars
+    from meta_cache import get_meta
+    from quotes import fetch_quotes
     enriched = {}
+    hists = {}
+    bars = get_bars(tickers, period='1mo')
+    live = fetch_quotes(tickers)
+    meta = get_meta(tickers, ('marketCap', 'sector', 'industry', 'averageVolume', 'beta',
+                              'shortPercentOfFloat', 'shortName', 'trailingPE', 'forwardPE'))
     for sym in tickers:
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            price = info.get('regularMarketPrice', 0)
-            if not price:
-                continue
-            prev_close = info.get('previousClose', price)
-            change_pct = ((price - prev_close) / prev_close * 100) if prev_close else 0
-
-            # Quick RSI from last 20 days
-            hist = t.history(period='1mo')
-            rsi = None
-            if len(hist) >= 14:
-                delta = hist['Close'].diff()
-                gain = delta.where(delta > 0, 0).ewm(alpha=1/14, min_periods=14).mean().iloc[-1]
-                loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, min_periods=14).mean().iloc[-1]
-                if loss > 0:
-                    rsi = 100 - (100 / (1 + gain / loss))
-
-            # Volume spike
-            avg_vol = info.get('averageVolume', 0)
-            today_vol = info.get('volume', 0)
-            vol_ratio = (today_vol / avg_vol) if avg_vol > 0 else 1.0
-
-            enriched[sym] = {
-                'price': price,
-                'change_pct': change_pct,
-                'market_cap': info.get('marketCap', 0),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', ''),
-                'rsi': rsi,
-                'vol_ratio': vol_ratio,
-                'beta': info.get('beta', 1.0),
-                'short_pct': info.get('shortPercentOfFloat', 0),
-                'name': info.get('shortName', sym),
-                'pe': info.get('trailingPE', None),
-                'fwd_pe': info.get('forwardPE', None),
-                '52w_high': info.get('fiftyTwoWeekHigh', 0),
-                '52w_low': info.get('fiftyTwoWeekLow', 0),
-            }
-        except Exception as e:
-            print(f'  yfinance error {sym}: {e}')
+        q = live.get(sym, {})
+        if 'error' in q:
+            print(f'  yfinance error {sym}: {q["error"]}')
+            continue
+        info = meta[sym]
+        price = q.get('price', 0)
+        if not price:
+            continue
+        change_pct = q['change_pct']
+
+        # History for a quick RSI (computed for all tickers below)
+        if sym in bars:
+            hists[sym] = bars[sym]['Close'].values
+
+        # Volume spike
+        avg_vol = info.get('averageVolume') or 0
+        today_vol = q.get('volume') or 0
+        vol_ratio = (today_vol / avg_vol) if avg_vol > 0 else 1.0
+
+        enriched[sym] = {
+            'price': price,
+            'change_pct': change_pct,
+            'market_cap': info.get('marketCap') or 0,
+            'sector': info.get('sector') or 'Unknown',
+            'industry': info.get('industry') or '',
+            'rsi': None,
+            'vol_ratio': vol_ratio,
+            'beta': info.get('beta') or 1.0,
+            'short_pct': info.get('shortPercentOfFloat') or 0,
+            'name': info.get('shortName') or sym,
+            'pe': info.get('trailingPE'),
+            'fwd_pe': info.get('forwardPE'),
+            '52w_high': q.get('year_high') or 0,
+            '52w_low': q.get('year_low') or 0,
+        }
+
+    syms = list(hists)
+    rsi = ind.latest(ind.rsi(ind.align([hists[s] for s in syms])))
+    for i, sym in enumerate(syms):
+        enriched[sym]['rsi'] = ind.scalar(rsi[i])
     return enriched
 
 
@@ -231,22 +243,6 @@ def format_gem_line(rank, sym, reddit, yf_data, score, mention_growth, wsb_data)
     return line
 
 
-def send_telegram(text, silent=True):
-    """Send message via Telegram."""
-    import urllib.parse
-    data = urllib.parse.urlencode({
-        'chat_id': CHAT_ID,
-        'parse_mode': 'HTML',
-        'text': text,
-        'disable_notification': 'true' if silent else 'false',
-    }).encode()
-    req = urllib.request.Request(f'{API_TG}/sendMessage', data=data)
-    try:
-        urllib.request.urlopen(req)
-    except Exception as e:
-        print(f'  Telegram error: {e}')
-
-
 def load_portfolio_symbols():
     """Load current portfolio symbols from Supabase to exclude from gems."""
     supa_url = os.environ.get('SUPABASE_URL', '')
@@ -258,8 +254,10 @@ def load_portfolio_symbols():
         req = urllib.request.Request(url)
         req.add_header('apikey', supa_key)
         req.add_header('Authorization', f'Bearer {supa_key}')
-        resp = urllib.request.urlopen(req, timeout=10)
-        rows = json.loads(resp.read())
+        resp = call('supabase', urllib.request.urlopen, req, timeout=10, retries=1)
+        body = resp.read()
+        record_bytes('supabase', len(body))
+        rows = json.loads(body)
         return {r['symbol'] for r in rows}
     except Exception:
         return set()
@@ -270,18 +268,20 @@ def main():
     print(f'[{now.strftime("%H:%M:%S")} UTC] Reddit Gems Scanner')
 
     # Load portfolio to exclude owned stocks
-    portfolio_syms = load_portfolio_symbols()
+    with span('portfolio'):
+        portfolio_syms = load_portfolio_symbols()
     skip = SKIP_TICKERS | portfolio_syms
     print(f'  Skipping: {skip}')
 
     # Fetch Reddit data
-    print('  Fetching ApeWisdom all-stocks...')
-    trending = fetch_reddit_trending()
-    print(f'  Got {len(trending)} trending stocks')
+    with span('apewisdom'):
+        print('  Fetching ApeWisdom all-stocks...')
+        trending = fetch_reddit_trending()
+        print(f'  Got {len(trending)} trending stocks')
 
-    print('  Fetching WSB specifically...')
-    wsb = fetch_wsb_trending()
-    print(f'  Got {len(wsb)} WSB stocks')
+        print('  Fetching WSB specifically...')
+        wsb = fetch_wsb_trending()
+        print(f'  Got {len(wsb)} WSB stocks')
 
     if not trending:
         print('  No data from ApeWisdom, aborting.')
@@ -303,32 +303,36 @@ def main():
     print(f'  {len(candidates)} candidates after filtering')
     if not candidates:
         print('  No interesting gems found today.')
-        send_telegram('🦅 <b>Daily Reddit Scan</b>\n\nKeine neuen Gems gefunden. Ruhiger Tag auf Reddit.', silent=True)
+        with span('telegram'):
+            send_telegram('🦅 <b>Daily Reddit Scan</b>\n\nKeine neuen Gems gefunden. Ruhiger Tag auf Reddit.', silent=True)
         return
 
     # Enrich top candidates with yfinance (limit to save time)
     tickers_to_check = [c['ticker'] for c in candidates[:20]]
     print(f'  Enriching {len(tickers_to_check)} tickers with yfinance...')
-    yf_data = enrich_with_yfinance(tickers_to_check)
+    with span('enrich'):
+        yf_data = enrich_with_yfinance(tickers_to_check)
 
     # Score and rank
-    scored = []
-    for r in candidates:
-        sym = r['ticker']
-        yf = yf_data.get(sym)
-        # Skip if market cap too small (penny stocks)
-        if yf and yf['market_cap'] < MIN_MARKET_CAP:
-            continue
-        mentions_24h = r.get('mentions_24h_ago', 1) or 1
-        mention_growth = ((r['mentions'] - mentions_24h) / mentions_24h) * 100
-        score, _ = score_gem(r, yf, wsb)
-        scored.append((score, mention_growth, sym, r, yf))
+    with span('scoring'):
+        scored = []
+        for r in candidates:
+            sym = r['ticker']
+            yf = yf_data.get(sym)
+            # Skip if market cap too small (penny stocks)
+            if yf and yf['market_cap'] < MIN_MARKET_CAP:
+                continue
+            mentions_24h = r.get('mentions_24h_ago', 1) or 1
+            mention_growth = ((r['mentions'] - mentions_24h) / mentions_24h) * 100
+            score, _ = score_gem(r, yf, wsb)
+            scored.append((score, mention_growth, sym, r, yf))
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = scored[:TOP_GEMS]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        top = scored[:TOP_GEMS]
 
     if not top:
-        send_telegram('🦅 <b>Daily Reddit Scan</b>\n\nKeine Gems ueber dem Schwellenwert.', silent=True)
+        with span('telegram'):
+            send_telegram('🦅 <b>Daily Reddit Scan</b>\n\nKeine Gems ueber dem Schwellenwert.', silent=True)
         return
 
     # Format Telegram message
@@ -345,7 +349,8 @@ def main():
     lines.append('\n<i>Score = Mention-Wachstum + RSI + Volume + Short Interest + Momentum</i>')
 
     msg = '\n'.join(lines)
-    send_telegram(msg, silent=False)
+    with span('telegram'):
+        send_telegram(msg, silent=False)
     print(f'  Sent {len(top)} gems to Telegram!')
 
     # Also print to console
@@ -355,4 +360,9 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    if '--profile-startup' in sys.argv:
+        from startup_profile import run
+        sys.exit(run(__file__))
+    with job_run('reddit_gems'):
+        main()
+    report()
@@ -0,0 +1,268 @@
+"""Shared vectorized v4 scoring engine (LONG/SHORT) for the morning screener.
+Used by morning_screener.py and backtest.py.
+
+The scoring rules are a table: each group is an if/elif chain of
+(points, condition, signal) rules, evaluated for the whole universe at once
+with np.select (first matching rule of a group wins). Signals are returned as
+int64 bitmasks (one bit per signal rule) and only turned into text for the
+symbols that are actually displayed.
+
+Weight distribution (max ~100):
+  Trend alignment (SMA200)     0-15  (mandatory foundation)
+  SMA50 pullback/rejection     0-12  (entry timing)
+  RSI sweet spot               0-12  (momentum, not extremes)
+  MACD confirmation            0-13  (momentum direction)
+  ATR% volatility              0-18  (Turbo leverage needs vol)
+  ADX trend strength           0-10  (trending vs ranging)
+  Volume confirmation          0-8   (institutional backing)
+  Bollinger / squeeze          0-5   (breakout potential)
+  Extras (SI, analyst, 5d)     0-7   (bonus signals)
+  Intraday alignment (1h/15m)  -4-8  (Turbo entry timing, optional gate)"""
+
+import numpy as np
+
+MTF_REQUIRE_ALIGNMENT = False  # True: LONG/SHORT score 0 unless all intraday timeframes agree
+
+
+def _between(x, lo, hi):
+    return (x >= lo) & (x <= hi)
+
+
+def _isin(values, options):
+    return np.isin(values, list(options))
+
+
+# ── Rule Tables ──
+# Philosophy: Score stocks with TREND CONFIRMATION.
+# LONG = uptrend + pullback to support + momentum resuming
+# SHORT = downtrend + bounce to resistance + momentum fading
+# Falling knives (RSI <30 under SMA200) get ZERO, not bonus points.
+# NaN (missing) inputs never match a condition, like the `is not None` guards.
+
+LONG_RULES = [
+    # ── TREND ALIGNMENT: SMA200 (0-15) - below SMA200 kills the setup ──
+    [(-15, lambda c: c['dist200'] < 0, 'UNTER SMA200'),
+     (15, lambda c: _between(c['dist200'], 0, 5), 'Uptrend nah SMA200'),
+     (12, lambda c: (c['dist200'] > 5) & (c['dist200'] <= 15), 'Uptrend'),
+     (8, lambda c: (c['dist200'] > 15) & (c['dist200'] <= 30), None),
+     (4, lambda c: ~np.isnan(c['dist200']), None)],  # else: very extended above SMA200
+    # ── SMA50 PULLBACK TIMING (0-12) - pullback to SMA50 in an uptrend ──
+    [(12, lambda c: (c['dist200'] >= 0) & _between(c['dist50'], -3, 1), 'SMA50 Pullback'),
+     (8, lambda c: (c['dist200'] >= 0) & _between(c['dist50'], -5, 3), 'Nahe SMA50'),
+     (4, lambda c: (c['dist200'] >= 0) & (c['dist50'] > 3), None)],
+    # ── RSI SWEET SPOT (0-12) - cooled off in uptrend, not a falling knife ──
+    [(12, lambda c: _between(c['rsi'], 35, 45), 'RSI {rsi:.0f} Pullback-Zone'),
+     (10, lambda c: (c['rsi'] > 45) & (c['rsi'] <= 55), 'RSI {rsi:.0f} neutral'),
+     (6, lambda c: (c['rsi'] >= 30) & (c['rsi'] < 35), 'RSI {rsi:.0f} niedrig'),
+     (5, lambda c: (c['rsi'] > 55) & (c['rsi'] <= 65), None),
+     (-5, lambda c: c['rsi'] > 70, None),   # Overbought = bad entry for LONG
+     (-8, lambda c: c['rsi'] < 30, None)],  # Falling knife territory
+    # RSI delta: momentum resuming (0-8)
+    [(8, lambda c: (c['rsi_delta'] > 5) & _between(c['rsi'], 30, 55), 'RSI dreht +{rsi_delta:.0f}'),
+     (5, lambda c: (c['rsi_delta'] > 3) & (c['rsi'] <= 55), None),
+     (2, lambda c: c['rsi_delta'] > 0, None),
+     (-3, lambda c: c['rsi_delta'] < -5, None)],  # Momentum fading
+    # RSI divergence (0-5)
+    [(5, lambda c: (c['divergence'] == 1) & (c['dist200'] >= 0), 'DIV bullish')],
+    # ── MACD CONFIRMATION (0-13) ──
+    [(10, lambda c: (c['macd_prev'] < 0) & (c['macd'] > 0), 'MACD Cross UP'),
+     (8, lambda c: (c['macd'] > 0) & c['macd_up'], 'MACD steigend'),
+     (5, lambda c: c['macd'] > 0, None),
+     (3, lambda c: (c['macd_prev'] < 0) & (c['macd'] < 0) & c['macd_up'], None)],  # Converging from below
+    # ── ATR% VOLATILITY (0-18, Turbo king) ──
+    [(18, lambda c: c['atr_pct'] >= 5.0, 'ATR {atr_pct:.1f}%'),
+     (14, lambda c: c['atr_pct'] >= 3.5, None),
+     (9, lambda c: c['atr_pct'] >= 2.5, None),
+     (4, lambda c: c['atr_pct'] >= 1.5, None)],
+    # ── ADX TREND STRENGTH (0-10) ──
+    [(10, lambda c: c['adx'] >= 35, 'ADX {adx:.0f} stark'),
+     (7, lambda c: c['adx'] >= 25, 'ADX {adx:.0f}'),
+     (3, lambda c: c['adx'] >= 20, None),
+     (-2, lambda c: c['adx'] < 20, None)],  # No trend = bad for momentum
+    # ── VOLUME CONFIRMATION (0-8) ──
+    [(8, lambda c: (c['vol_ratio'] >= 2.5) & (c['change_pct'] > 0), 'Vol {vol_ratio:.1f}x'),
+     (5, lambda c: (c['vol_ratio'] >= 1.5) & (c['change_pct'] > 0), None),
+     (-3, lambda c: (c['vol_ratio'] >= 1.5) & (c['change_pct'] < -1), None)],  # Distribution
+    # ── BOLLINGER SQUEEZE (0-5) ──
+    [(5, lambda c: c['bb_ok'] & (c['bb_pctl'] < 15) & (c['adx'] >= 20), 'BB Squeeze'),
+     (2, lambda c: c['bb_ok'] & (c['bb_pctl'] < 25), None)],
+    # ── EXTRAS (0-7) ──
+    # Short Interest: squeeze fuel for LONG
+    [(4, lambda c: c['short_pct'] >= 0.20, 'SI {si_pct:.0f}%'),
+     (2, lambda c: c['short_pct'] >= 0.10, None)],
+    # Analyst
+    [(3, lambda c: _isin(c['rating'], ('strong_buy', 'strongBuy')), None),
+     (2, lambda c: c['rating'] == 'buy', None)],
+    # 5-day pullback in uptrend
+    [(5, lambda c: _between(c['change_5d'], -8, -2) & (c['dist200'] >= 0), '5d Pullback im Uptrend')],
+    # ── MULTI-TIMEFRAME ALIGNMENT (-4-8) ──
+    [(8, lambda c: (c['agree_long'] > 0) & (c['against_long'] == 0) & (c['agree_long'] == c['n_tf']),
+      'MTF {mtf}↑'),
+     (4, lambda c: (c['agree_long'] > 0) & (c['against_long'] == 0), 'MTF {mtf}↑'),
+     (-4, lambda c: c['against_long'] > 0, None)],
+]
+
+SHORT_RULES = [
+    # ── TREND ALIGNMENT: SMA200 (0-15) - above SMA200 kills the setup ──
+    [(-15, lambda c: c['dist200'] > 0, 'UEBER SMA200'),
+     (15, lambda c: (c['dist200'] >= -5) & (c['dist200'] < 0), 'Downtrend nah SMA200'),
+     (12, lambda c: (c['dist200'] >= -15) & (c['dist200'] < -5), 'Downtrend'),
+     (8, lambda c: (c['dist200'] >= -30) & (c['dist200'] < -15), None),
+     (4, lambda c: ~np.isnan(c['dist200']), None)],  # else: very extended below SMA200
+    # ── SMA50 REJECTION TIMING (0-12) - bounce to SMA50 in a downtrend ──
+    [(12, lambda c: (c['dist200'] < 0) & _between(c['dist50'], -1, 3), 'SMA50 Abprall'),
+     (8, lambda c: (c['dist200'] < 0) & _between(c['dist50'], -3, 5), 'Nahe SMA50'),
+     (4, lambda c: (c['dist200'] < 0) & (c['dist50'] < -3), None)],
+    # ── RSI SWEET SPOT (0-12) - bounced in downtrend, ready to resume down ──
+    [(12, lambda c: _between(c['rsi'], 55, 65), 'RSI {rsi:.0f} Bounce-Zone'),
+     (10, lambda c: (c['rsi'] >= 50) & (c['rsi'] < 55), 'RSI {rsi:.0f} neutral'),
+     (6, lambda c: (c['rsi'] > 65) & (c['rsi'] <= 70), 'RSI {rsi:.0f} hoch'),
+     (5, lambda c: (c['rsi'] >= 40) & (c['rsi'] < 50), None),
+     (-5, lambda c: c['rsi'] < 30, None),   # Oversold = bad entry for SHORT
+     (-8, lambda c: c['rsi'] > 75, None)],  # Strong momentum, risky short
+    # RSI delta: momentum fading (0-8)
+    [(8, lambda c: (c['rsi_delta'] < -5) & _between(c['rsi'], 45, 70), 'RSI faellt {rsi_delta:.0f}'),
+     (5, lambda c: (c['rsi_delta'] < -3) & (c['rsi'] >= 45), None),
+     (2, lambda c: c['rsi_delta'] < 0, None),
+     (-3, lambda c: c['rsi_delta'] > 5, None)],  # Momentum picking up
+    # RSI divergence (0-5)
+    [(5, lambda c: (c['divergence'] == -1) & (c['dist200'] < 0), 'DIV bearish')],
+    # ── MACD CONFIRMATION (0-13) ──
+    [(10, lambda c: (c['macd_prev'] > 0) & (c['macd'] < 0), 'MACD Cross DOWN'),
+     (8, lambda c: (c['macd'] < 0) & c['macd_down'], 'MACD fallend'),
+     (5, lambda c: c['macd'] < 0, None),
+     (3, lambda c: (c['macd_prev'] > 0) & (c['macd'] > 0) & c['macd_down'], None)],  # Converging from above
+    # ── ATR% VOLATILITY (0-18, Turbo king) ──
+    LONG_RULES[6],
+    # ── ADX TREND STRENGTH (0-10) ──
+    LONG_RULES[7],
+    # ── VOLUME CONFIRMATION (0-8) ──
+    [(8, lambda c: (c['vol_ratio'] >= 2.5) & (c['change_pct'] < 0), 'Vol {vol_ratio:.1f}x'),
+     (5, lambda c: (c['vol_ratio'] >= 1.5) & (c['change_pct'] < 0), None),
+     (-3, lambda c: (c['vol_ratio'] >= 1.5) & (c['change_pct'] > 1), None)],  # Accumulation
+    # ── BOLLINGER SQUEEZE (0-5) ──
+    LONG_RULES[9],
+    # ── EXTRAS (0-7) ──
+    # Short Interest: crowded short = risky
+    [(-5, lambda c: c['short_pct'] >= 0.25, None),  # Too crowded, squeeze risk
+     (-2, lambda c: c['short_pct'] >= 0.15, None),
+     (2, lambda c: c['short_pct'] < 0.05, None)],   # Low SI = room to short
+    # Analyst
+    [(3, lambda c: _isin(c['rating'], ('sell', 'strong_sell', 'strongSell')), None),
+     (2, lambda c: c['rating'] == 'underperform', None)],
+    # 5-day bounce in downtrend
+    [(5, lambda c: _between(c['change_5d'], 2, 8) & (c['dist200'] < 0), '5d Bounce im Downtrend')],
+    # ── MULTI-TIMEFRAME ALIGNMENT (-4-8) ──
+    [(8, lambda c: (c['agree_short'] > 0) & (c['against_short'] == 0) & (c['agree_short'] == c['n_tf']),
+      'MTF {mtf}↓'),
+     (4, lambda c: (c['agree_short'] > 0) & (c['against_short'] == 0), 'MTF {mtf}↓'),
+     (-4, lambda c: c['against_short'] > 0, None)],
+]
+
+MTF_NOT_ALIGNED = 'MTF nicht aligned'
+
+
+def _signal_bits(rules):
+    """[(group, rule) -> bit] and the signal template per bit, in rule order."""
+    bits, templates = {}, []
+    for g, group in enumerate(rules):
+        for r, (_, _, signal) in enumerate(group):
+            if signal:
+                bits[g, r] = len(templates)
+                templates.append(signal)
+    templates.append(MTF_NOT_ALIGNED)  # last bit: MTF_REQUIRE_ALIGNMENT gate
+    return bits, templates
+
+
+RULES = {'LONG': LONG_RULES, 'SHORT': SHORT_RULES}
+SIGNALS = {direction: _signal_bits(rules) for direction, rules in RULES.items()}
+
+
+# ── Columns ──
+
+def _num(rows, key, default=np.nan):
+    return np.array([default if (v := r.get(key)) is None else v for r in rows], dtype=float)
+
+
+def columns(rows):
+    """Screener rows (dicts from calc_technicals/enrichment) -> {name: array}."""
+    n_tf, agree, against = (np.zeros((len(rows), 2), dtype=int) for _ in range(3))
+    for i, r in enumerate(rows):
+        tfs = r.get('tf') or {}
+        n_tf[i] = len(tfs)
+        for j, direction in enumerate(('LONG', 'SHORT')):
+            agree[i, j] = sum(v['bias'] == direction for v in tfs.values())
+            against[i, j] = sum(bool(v['bias']) and v['bias'] != direction for v in tfs.values())
+    bb_pos = _num(rows, 'bb_position')
+    macd, macd_prev = _num(rows, 'macd_hist'), _num(rows, 'macd_hist_prev')
+    macd[np.isnan(macd_prev)] = macd_prev[np.isnan(macd)] = np.nan  # MACD rules need both
+    return {
+        'rsi': _num(rows, 'rsi'),
+        'rsi_delta': _num(rows, 'rsi_delta'),
+        'dist200': _num(rows, 'sma200_distance_pct'),
+        'dist50': _num(rows, 'sma50_distance_pct'),
+        'divergence': np.array([{'bullish': 1, 'bearish': -1}.get(r.get('rsi_divergence'), 0)
+                                for r in rows]),
+        'macd': macd,
+        'macd_prev': macd_prev,
+        'macd_up': np.array([r.get('macd_hist_direction') == 'increasing' for r in rows], dtype=bool),
+        'macd_down': np.array([r.get('macd_hist_direction') == 'decreasing' for r in rows], dtype=bool),
+        'atr_pct': _num(rows, 'atr_pct'),
+        'adx': _num(rows, 'adx'),
+        'vol_ratio': np.nan_to_num(_num(rows, 'vol_ratio', 0)),
+        'change_pct': _num(rows, 'change_pct', 0),
+        'bb_pctl': _num(rows, 'bb_width_percentile'),
+        'bb_ok': ~np.isnan(bb_pos),
+        'short_pct': np.nan_to_num(_num(rows, 'short_pct', 0)),
+        'rating': np.array([r.get('analyst_rating') or '' for r in rows], dtype=object),
+        'change_5d': _num(rows, 'change_5d'),
+        'n_tf': n_tf[:, 0],
+        'agree_long': agree[:, 0], 'against_long': against[:, 0],
+        'agree_short': agree[:, 1], 'against_short': against[:, 1],
+    }
+
+
+# ── Scoring ──
+
+def score(cols, direction):
+    """Score one direction for all rows. Returns (scores 0-100, signal bitmasks).
+    Works on any array shape (e.g. symbols x dates in backtests)."""
+    rules = RULES[direction]
+    bits, templates = SIGNALS[direction]
+    shape = np.shape(cols['rsi'])
+    total = np.zeros(shape, dtype=np.int64)
+    masks = np.zeros(shape, dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        for g, group in enumerate(rules):
+            conds = [np.broadcast_to(cond(cols), shape) for _, cond, _ in group]
+            total += np.select(conds, [points for points, _, _ in group], 0)
+            matched = np.select(conds, list(range(1, len(group) + 1)), 0)
+            for r in range(len(group)):
+                if (g, r) in bits:
+                    masks |= np.where(matched == r + 1, np.int64(1) << bits[g, r], 0)
+    total = np.clip(total, 0, 100)
+    if MTF_REQUIRE_ALIGNMENT:
+        key = 'agree_long' if direction == 'LONG' else 'agree_short'
+        gated = (cols['n_tf'] > 0) & (cols[key] < cols['n_tf'])
+        total = np.where(gated, 0, total)
+        masks |= np.where(gated, np.int64(1) << (len(templates) - 1), 0)
+    return total, masks
+
+
+def score_rows(rows):
+    """{'LONG': (scores, masks), 'SHORT': (scores, masks)} for a list of row dicts."""
+    cols = columns(rows)
+    return {direction: score(cols, direction) for direction in RULES}
+
+
+def signal_texts(d, mask, direction):
+    """Decode a signal bitmask into display texts (rule order) for one row."""
+    _, templates = SIGNALS[direction]
+    tfs = d.get('tf') or {}
+    context = {
+        'rsi': d.get('rsi'), 'rsi_delta': d.get('rsi_delta'), 'atr_pct': d.get('atr_pct'),
+        'adx': d.get('adx'), 'vol_ratio': d.get('vol_ratio') or 0,
+        'si_pct': (d.get('short_pct') or 0) * 100,
+        'mtf': '/'.join(tf for tf, v in tfs.items() if v['bias'] == direction),
+    }
+    return [t.format(**context) for bit, t in enumerate(templates) if int(mask) >> bit & 1]
@@ -0,0 +1,48 @@
+"""Shared --profile-startup helper for the cron scripts.
+Used by tracker_check.py, update_stocks.py, portfolio_check.py, morning_screener.py
+and reddit_gems.py.
+
+Re-runs the calling script under `python -X importtime` (same arguments, minus
+the flag) and prints the import cost per top-level module next to the total
+runtime, so heavy imports on the hot path are easy to spot."""
+
+import os
+import subprocess
+import sys
+import time
+
+
+def parse_importtime(stderr):
+    """Sum cumulative import time (us) per top-level module.
+    Returns ({module: us}, other stderr lines)."""
+    totals, other = {}, []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            other.append(line)
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit() or name.startswith('  '):
+            continue  # header / nested import (already in its parent)
+        root = name.strip().split('.')[0]
+        totals[root] = totals.get(root, 0) + int(cumulative)
+    return totals, other
+
+
+def run(script, top=15):
+    """Profile one run of `script`. Returns its exit code."""
+    args = [a for a in sys.argv[1:] if a != '--profile-startup']
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', script, *args],
+                          stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    totals, other = parse_importtime(proc.stderr)
+    for line in other:
+        print(line, file=sys.stderr)
+
+    imports = sum(totals.values()) / 1e6
+    print(f'\n── Startup profile: {os.path.basename(script)} ──')
+    print(f'  Total runtime: {wall:.2f}s')
+    print(f'  Imports:       {imports:.2f}s ({imports / wall * 100:.0f}%)')
+    for name, us in sorted(totals.items(), key=lambda kv: -kv[1])[:top]:
+        print(f'    {name:<28} {us / 1000:>8.1f} ms')
+    return proc.returncode
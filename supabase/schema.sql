@@ -58,6 +58,32 @@ CREATE POLICY "Allow all for anon on stocks" ON stocks
 CREATE INDEX IF NOT EXISTS idx_stocks_is_active ON stocks(is_active);
 CREATE INDEX IF NOT EXISTS idx_stocks_sector ON stocks(sector);
 
+-- Bulk update for update_stocks.py: one request, existing rows only (a stock
+-- deleted meanwhile is not recreated); missing fields keep their old value
+CREATE OR REPLACE FUNCTION update_stock_rows(rows JSONB) RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE stocks s SET
+        price = COALESCE(r.price, s.price),
+        change_pct = COALESCE(r.change_pct, s.change_pct),
+        rsi = COALESCE(r.rsi, s.rsi),
+        sma50 = COALESCE(r.sma50, s.sma50),
+        sma200 = COALESCE(r.sma200, s.sma200),
+        market_cap = COALESCE(r.market_cap, s.market_cap),
+        volume = COALESCE(r.volume, s.volume),
+        analyst_rating = COALESCE(r.analyst_rating, s.analyst_rating),
+        last_updated = r.last_updated
+    FROM jsonb_to_recordset(rows) AS r(
+        symbol TEXT, price NUMERIC, change_pct NUMERIC, rsi NUMERIC, sma50 NUMERIC,
+        sma200 NUMERIC, market_cap BIGINT, volume BIGINT, analyst_rating TEXT,
+        last_updated TIMESTAMPTZ)
+    WHERE s.symbol = r.symbol;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================
 -- Tracker State (for price alert persistence in GitHub Actions)
 -- ============================================================
@@ -105,6 +131,72 @@ CREATE POLICY "Allow all for anon on portfolio" ON portfolio
 CREATE INDEX IF NOT EXISTS idx_portfolio_status ON portfolio(status);
 CREATE INDEX IF NOT EXISTS idx_portfolio_symbol ON portfolio(symbol);
 
+-- ============================================================
+-- Alert Levels Table (tracker_check.py price levels + zone notes)
+-- ============================================================
+-- Remove levels by setting is_active = false: the tracker only refetches
+-- the table when MAX(updated_at) changes, a DELETE would go unnoticed.
+CREATE TABLE IF NOT EXISTS alert_levels (
+    id BIGSERIAL PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    name TEXT,
+    emoji TEXT,
+    direction TEXT NOT NULL CHECK (direction IN ('above', 'below')),
+    price NUMERIC NOT NULL,
+    zone_type TEXT,
+    note TEXT,
+    is_active BOOLEAN DEFAULT TRUE,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (symbol, direction, price)
+);
+
+ALTER TABLE alert_levels ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all for anon on alert_levels" ON alert_levels;
+CREATE POLICY "Allow all for anon on alert_levels" ON alert_levels
+    FOR ALL USING (true) WITH CHECK (true);
+
+CREATE INDEX IF NOT EXISTS idx_alert_levels_updated_at ON alert_levels(updated_at DESC);
+
+-- Bump updated_at on every edit (also manual edits in the dashboard)
+CREATE OR REPLACE FUNCTION alert_levels_touch() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS alert_levels_touch ON alert_levels;
+CREATE TRIGGER alert_levels_touch BEFORE UPDATE ON alert_levels
+    FOR EACH ROW EXECUTE FUNCTION alert_levels_touch();
+
+-- ============================================================
+-- Job Runs Table (telemetry.py: one row per cron job run)
+-- ============================================================
+CREATE TABLE IF NOT EXISTS job_runs (
+    id BIGSERIAL PRIMARY KEY,
+    job TEXT NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('ok', 'error')),
+    error TEXT,
+    requests INTEGER DEFAULT 0,
+    bytes BIGINT DEFAULT 0,
+    errors INTEGER DEFAULT 0,
+    spans JSONB,       -- [{name, ms, count, requests, bytes, errors}] per stage
+    upstreams JSONB,   -- governor.py counters per upstream for this run
+    git_sha TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+ALTER TABLE job_runs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all for anon on job_runs" ON job_runs;
+CREATE POLICY "Allow all for anon on job_runs" ON job_runs
+    FOR ALL USING (true) WITH CHECK (true);
+
+CREATE INDEX IF NOT EXISTS idx_job_runs_job_started ON job_runs(job, started_at DESC);
+
 -- ============================================================
 -- Storage: Create a "charts" bucket in Supabase Dashboard
 -- ============================================================
@@ -1,24 +1,17 @@
-"""Shared Supabase client and environment loader.
+"""Shared Supabase client.
 Used by admin_stocks.py, update_stocks.py, browse_stocks.py, and other scripts
-that need Supabase access."""
+that need Supabase access.
+
+All requests of a run share one keep-alive connection, so only the first call
+pays for the TCP + TLS handshake. Requests are paced and retried by governor.py."""
 
-import urllib.request
-import urllib.error
 import json
 import os
+import urllib.parse
 
-
-def load_env():
-    """Load .env file into os.environ."""
-    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
-    if not os.path.exists(env_path):
-        return
-    with open(env_path) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, val = line.split('=', 1)
-                os.environ.setdefault(key.strip(), val.strip())
+from env import load_env  # noqa: F401  (re-exported for scripts importing it from here)
+from governor import Throttled, call, record_bytes, record_error
+from http_session import Session
 
 
 load_env()
@@ -27,21 +20,63 @@ SUPABASE_URL = os.environ['SUPABASE_URL']
 SUPABASE_KEY = os.environ['SUPABASE_ANON_KEY']
 
 
+_session = Session(SUPABASE_URL)
+
+
+def _headers(prefer='return=representation'):
+    return {
+        'apikey': SUPABASE_KEY,
+        'Authorization': f'Bearer {SUPABASE_KEY}',
+        'Content-Type': 'application/json',
+        'Prefer': prefer,
+    }
+
+
+def _send(method, path, body, prefer='return=representation'):
+    """One governed request: 429/503 are retried (honoring Retry-After)."""
+    def once():
+        status, payload, headers = _session.request(method, path, body, _headers(prefer))
+        record_bytes('supabase', len(body or b'') + len(payload))
+        if status in (429, 503):
+            retry_after = headers.get('Retry-After', '')
+            raise Throttled(f'Supabase {status}', int(retry_after) if retry_after.isdigit() else None)
+        if status >= 400:
+            record_error('supabase')
+        return status, payload
+    return call('supabase', once)
+
+
 def supabase_request(method, path, data=None):
     """Make a request to the Supabase REST API.
 
     Returns parsed JSON on success, None on error.
     """
-    url = f'{SUPABASE_URL}/rest/v1/{path}'
     body = json.dumps(data).encode() if data else None
-    req = urllib.request.Request(url, data=body, method=method)
-    req.add_header('apikey', SUPABASE_KEY)
-    req.add_header('Authorization', f'Bearer {SUPABASE_KEY}')
-    req.add_header('Content-Type', 'application/json')
-    req.add_header('Prefer', 'return=representation')
-    try:
-        resp = urllib.request.urlopen(req)
-        return json.loads(resp.read())
-    except urllib.error.HTTPError as e:
-        print(f'Supabase error: {e.code} {e.read().decode()}')
+    status, payload = _send(method, f'rest/v1/{path}', body)
+    if status >= 400:
+        print(f'Supabase error: {status} {payload.decode()}')
         return None
+    return json.loads(payload) if payload else []
+
+
+def supabase_upsert(table, rows, on_conflict):
+    """Insert-or-update many rows in ONE request (POST with a JSON array).
+
+    PostgREST needs identical keys in every row of a bulk insert, so rows are
+    grouped by their key set (usually a single group). Returns the number of
+    rows written, or None on error.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    written = 0
+    for group in groups.values():
+        body = json.dumps(group).encode()
+        path = f'rest/v1/{table}?on_conflict={urllib.parse.quote(on_conflict)}'
+        status, payload = _send('POST', path, body, 'resolution=merge-duplicates,return=minimal')
+        if status >= 400:
+            print(f'Supabase error: {status} {payload.decode()}')
+            return None
+        written += len(group)
+    return written
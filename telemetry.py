@@ -0,0 +1,201 @@
+"""Shared per-stage timing and run telemetry for the cron jobs.
+Used by update_stocks.py, tracker_check.py, portfolio_check.py,
+morning_screener.py and reddit_gems.py.
+
+A job's __main__ runs main() inside job_run(name), and main() wraps its
+stages in span(name). Each span records its wall time plus the requests,
+bytes and failed request attempts that governor.py counted meanwhile; spans
+with the same name (e.g. one per download chunk) add up. When the run ends
+the summary is printed and appended to RUNS_PATH; runs not yet in the
+Supabase job_runs table are then written there in one bulk insert. Jobs
+that run every few minutes pass batch=True and flush at most every
+BATCH_INTERVAL, so telemetry costs the tracker one Supabase request per
+hour, not one per run. Outside job_run(), span() only runs its block, so
+main() can still be called from other tools without recording a run.
+
+    with job_run('update_stocks'):
+        main()"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import governor
+
+RUNS_PATH = os.environ.get(
+    'JOB_RUNS_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'job_runs.json'),
+)
+HISTORY = 500  # runs kept in RUNS_PATH
+BATCH_INTERVAL = 3600  # batch=True: flush pending runs once the oldest is this old
+COUNTERS = ('calls', 'bytes', 'errors')
+
+_run = None
+
+
+def _delta(before, after):
+    """Counter increase per upstream between two governor snapshots (used ones only)."""
+    out = {}
+    for name, m in after.items():
+        diff = {k: v - before[name][k] for k, v in m.items()}
+        if any(diff.values()):
+            out[name] = diff
+    return out
+
+
+def _totals(upstreams):
+    return {k: sum(m[k] for m in upstreams.values()) for k in COUNTERS}
+
+
+# ── API ──
+
+def start(job):
+    """Begin recording a run of `job` (job_run() does this for you)."""
+    global _run
+    _run = {
+        'job': job,
+        'started_at': datetime.now(timezone.utc),
+        'clock': time.perf_counter(),
+        'metrics': governor.snapshot(),
+        'spans': {},
+    }
+
+
+@contextmanager
+def span(name):
+    """Time one stage of the current run."""
+    if _run is None:
+        yield
+        return
+    before, started = governor.snapshot(), time.perf_counter()
+    try:
+        yield
+    finally:
+        used = _totals(_delta(before, governor.snapshot()))
+        s = _run['spans'].setdefault(name, {'name': name, 'ms': 0.0, 'count': 0,
+                                            'requests': 0, 'bytes': 0, 'errors': 0})
+        s['ms'] += (time.perf_counter() - started) * 1000
+        s['count'] += 1
+        s['requests'] += used['calls']
+        s['bytes'] += used['bytes']
+        s['errors'] += used['errors']
+
+
+def finish(status='ok', error=None, batch=False):
+    """End the current run: print, store locally and flush pending runs to job_runs
+    (with batch=True only once the oldest pending run is BATCH_INTERVAL old)."""
+    global _run
+    if _run is None:
+        return None
+    run, _run = _run, None
+    upstreams = _delta(run['metrics'], governor.snapshot())
+    totals = _totals(upstreams)
+    summary = {
+        'job': run['job'],
+        'started_at': run['started_at'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'duration_ms': round((time.perf_counter() - run['clock']) * 1000),
+        'status': status,
+        'error': error,
+        'requests': totals['calls'],
+        'bytes': totals['bytes'],
+        'errors': totals['errors'],
+        'spans': [dict(s, ms=round(s['ms'], 1)) for s in run['spans'].values()],
+        'upstreams': upstreams,
+        'git_sha': os.environ.get('GITHUB_SHA'),
+    }
+    print_summary(summary)
+    runs = save_run(dict(summary, synced=False))
+    flush(runs, BATCH_INTERVAL if batch else 0)
+    return summary
+
+
+@contextmanager
+def job_run(job, batch=False):
+    """Record one run of `job` around the block; failures are recorded, then re-raised."""
+    start(job)
+    try:
+        yield
+    except SystemExit as e:
+        failed = e.code not in (None, 0)
+        finish('error' if failed else 'ok', f'exit {e.code}' if failed else None, batch)
+        raise
+    except BaseException as e:
+        finish('error', f'{type(e).__name__}: {e}'[:500], batch)
+        raise
+    else:
+        finish(batch=batch)
+
+
+# ── Output ──
+
+def _size(n):
+    if n >= 1e6:
+        return f'{n / 1e6:.1f} MB'
+    return f'{n / 1e3:.0f} kB' if n >= 1e3 else f'{n} B'
+
+
+def print_summary(summary):
+    parts = []
+    for s in summary['spans']:
+        part = f'{s["name"]} {s["ms"] / 1000:.1f}s'
+        if s['requests']:
+            part += f' ({s["requests"]} req, {_size(s["bytes"])}'
+            part += f', {s["errors"]} err)' if s['errors'] else ')'
+        parts.append(part)
+    print(f'  [run {summary["status"]}: {summary["duration_ms"] / 1000:.1f}s, '
+          f'{summary["requests"]} requests, {_size(summary["bytes"])}, {summary["errors"]} errors'
+          + (f' | {", ".join(parts)}]' if parts else ']'))
+
+
+def load_runs():
+    try:
+        with open(RUNS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _write(runs):
+    try:
+        os.makedirs(os.path.dirname(RUNS_PATH), exist_ok=True)
+        tmp = RUNS_PATH + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(runs, f, indent=1)
+        os.replace(tmp, RUNS_PATH)
+    except OSError as e:
+        print(f'  Telemetry: could not write {RUNS_PATH}: {e}')
+
+
+def save_run(run):
+    """Append one run to RUNS_PATH. Returns all stored runs."""
+    runs = (load_runs() + [run])[-HISTORY:]
+    _write(runs)
+    return runs
+
+
+def flush(runs=None, min_age=0):
+    """Insert all runs not yet in job_runs in one request, once the oldest of
+    them is `min_age` seconds old. Telemetry never fails the job."""
+    runs = load_runs() if runs is None else runs
+    pending = [run for run in runs if not run.get('synced', True)]
+    if not pending:
+        return 0
+    oldest = datetime.strptime(pending[0]['started_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    if (datetime.now(timezone.utc) - oldest).total_seconds() < min_age:
+        print(f'  [telemetry: {len(pending)} runs pending, flushed every {min_age // 60} min]')
+        return 0
+    rows = [{k: v for k, v in run.items() if k != 'synced'} for run in pending]
+    try:
+        from supabase_client import supabase_request
+        if supabase_request('POST', 'job_runs', rows) is None:
+            print('  Telemetry: job_runs insert failed, kept for the next run')
+            return 0
+    except Exception as e:
+        print(f'  Telemetry: job_runs insert failed, kept for the next run: {e}')
+        return 0
+    for run in pending:
+        run['synced'] = True
+    _write(runs)
+    return len(pending)
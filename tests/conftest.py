@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The job modules read credentials at import time; tests never reach the network
+for _var, _value in {'SUPABASE_URL': 'https://supabase.invalid', 'SUPABASE_ANON_KEY': 'test-key',
+                     'TELEGRAM_BOT_TOKEN': 'test-token', 'TELEGRAM_CHAT_ID': '0'}.items():
+    os.environ.setdefault(_var, _value)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+import bar_store
+
+
+class FakeYahoo:
+    """Stands in for bar_store._download: serves slices of one adjusted history."""
+
+    def __init__(self, history):
+        self.history = history
+        self.calls = []
+
+    def __call__(self, symbols, interval, start=None, period=None):
+        self.calls.append((tuple(symbols), start, period))
+        df = self.history if start is None else self.history[self.history.index >= pd.Timestamp(start)]
+        return {sym: df.copy() for sym in symbols}
+
+
+def _history(days):
+    end = pd.Timestamp.now('UTC').tz_localize(None).normalize() - pd.Timedelta(days=1)
+    index = pd.bdate_range(end=end, periods=days)
+    close = np.linspace(100, 140, days)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(days, 1e6)}, index=index)
+
+
+def _setup(tmp_path, monkeypatch, history):
+    monkeypatch.setattr(bar_store, 'CACHE_DIR', str(tmp_path))
+    yahoo = FakeYahoo(history)
+    monkeypatch.setattr(bar_store, '_download', yahoo)
+    bar_store.get_bars(['AAA'], period='1y')
+    yahoo.calls.clear()
+    return yahoo
+
+
+def test_tail_only_when_prices_unchanged(tmp_path, monkeypatch):
+    history = _history(200)
+    yahoo = _setup(tmp_path, monkeypatch, history)
+
+    bars = bar_store.get_bars(['AAA'], period='1y')['AAA']
+
+    assert [start is not None for _, start, _ in yahoo.calls] == [True]
+    assert np.allclose(bars['Close'].values, history['Close'].values)
+
+
+def test_split_in_tail_refetches_full_history(tmp_path, monkeypatch):
+    history = _history(200)
+    yahoo = _setup(tmp_path, monkeypatch, history)
+
+    # 2:1 split after the last run: Yahoo now serves the whole history halved
+    split = history.copy()
+    split[['Open', 'High', 'Low', 'Close']] /= 2
+    split.loc[split.index[-1] + pd.offsets.BDay()] = split.iloc[-1]
+    yahoo.history = split
+
+    bars = bar_store.get_bars(['AAA'], period='1y')['AAA']
+
+    assert yahoo.calls[-1][2] == '1y'  # full refetch after the tail
+    assert len(bars) == len(split)
+    assert np.allclose(bars['Close'].values, split['Close'].values)
+    # The rewritten cache is on the new basis too
+    assert np.allclose(bar_store.load('AAA')['Close'].values, split['Close'].values)
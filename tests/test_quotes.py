@@ -0,0 +1,26 @@
+import io
+import json
+import time
+
+import governor
+import quotes
+
+CHART = {'chart': {'result': [{'meta': {'regularMarketPrice': 101.0, 'chartPreviousClose': 100.0}}]}}
+
+
+def test_long_symbol_lists_do_not_time_out_while_queued(monkeypatch):
+    # A faster bucket and a shorter timeout keep the test quick; the ratio is
+    # the same as 60 symbols at 4/s against the default 8 s timeout
+    monkeypatch.setitem(governor._buckets, 'yahoo', governor.TokenBucket(40.0, 8))
+
+    def urlopen(req, timeout):
+        time.sleep(0.05)
+        return io.BytesIO(json.dumps(CHART).encode())
+
+    monkeypatch.setattr(quotes.urllib.request, 'urlopen', urlopen)
+    symbols = [f'S{i}' for i in range(60)]
+
+    result = quotes.fetch_quotes(symbols, timeout=1.0)
+
+    assert [sym for sym, q in result.items() if 'error' in q] == []
+    assert all(result[sym]['price'] == 101.0 for sym in symbols)
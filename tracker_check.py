@@ -1,21 +1,39 @@
 #!/usr/bin/env python3
 """Silver Hawk Trading - Single Check (for GitHub Actions).
 Runs once, checks prices, sends alerts if needed, then exits.
-State is persisted in Supabase."""
+State is persisted in Supabase.
 
-import urllib.request
-import urllib.parse
-import json
-import os
+With --daemon it keeps running instead: quotes are polled every few seconds
+in an asyncio loop, state stays in memory and is checkpointed to Supabase
+only every few minutes (and on exit).
+
+    python tracker_check.py --daemon [--interval 15] [--checkpoint 300] [--duration 3600]
+
+With --replay stored 1m/5m bars are fed through the alert logic at a simulated
+cadence instead (nothing is sent or saved), printing the alert timeline and
+counts, so thresholds can be tuned against last month's prices.
+
+    python tracker_check.py --replay [--bars 5m] [--period 1mo] [--cadence 600]
+                            [--flash 1.5] [--daily 5] [--quiet]"""
+
+import bisect
+import sys
+import time
 from datetime import datetime, timezone
 
-# ── Config from environment ──
-TOKEN = os.environ['TELEGRAM_BOT_TOKEN']
-CHAT_ID = os.environ['TELEGRAM_CHAT_ID']
-SUPABASE_URL = os.environ['SUPABASE_URL']
-SUPABASE_KEY = os.environ['SUPABASE_ANON_KEY']
-API = f'https://api.telegram.org/bot{TOKEN}'
+from notifier import send_chunks
+from outbox import Outbox
+from supabase_client import supabase_request, supabase_upsert
+from telemetry import job_run, span
+
+# ── Daemon ──
+DAEMON_INTERVAL = 15       # seconds between quote polls
+CHECKPOINT_INTERVAL = 300  # seconds between tracker_state writes
+FLASH_WINDOW = 600         # flash moves are measured over this window (= cron spacing)
 
+# ── Built-in levels ──
+# Defaults for when the Supabase alert_levels table is empty or unreachable
+# without a local snapshot. Seed the table with: python alert_levels.py seed
 SYMBOLS = {
     'SI=F': {'name': 'Silber', 'emoji': '🥈'},
     'AAPL': {'name': 'Apple', 'emoji': '🍎'},
@@ -336,133 +354,193 @@ TRADING_ZONES = {
 
 # ── Supabase State ──
 
-def supabase_request(method, path, data=None):
-    """Make a request to Supabase REST API."""
-    url = f'{SUPABASE_URL}/rest/v1/{path}'
-    body = json.dumps(data).encode() if data else None
-    req = urllib.request.Request(url, data=body, method=method)
-    req.add_header('apikey', SUPABASE_KEY)
-    req.add_header('Authorization', f'Bearer {SUPABASE_KEY}')
-    req.add_header('Content-Type', 'application/json')
-    req.add_header('Prefer', 'return=representation')
-    try:
-        resp = urllib.request.urlopen(req)
-        return json.loads(resp.read())
-    except Exception as e:
-        print(f'  Supabase error: {e}')
-        return None
+STATE_KEYS = ('prev_prices', 'alerted_levels', 'last_summary_hour')
+
+
+def _state_values(prev_prices, alerted_levels, last_summary_hour):
+    """Normalized state as stored in tracker_state (comparable + JSON-ready)."""
+    return {
+        'prev_prices': dict(prev_prices),
+        'alerted_levels': sorted(alerted_levels),
+        'last_summary_hour': last_summary_hour,
+    }
 
 
 def load_state():
-    """Load tracker state from Supabase."""
+    """Load tracker state from Supabase (one select for all keys).
+    Also returns a snapshot so save_state() can skip unchanged keys."""
     result = supabase_request('GET', 'tracker_state?select=key,value')
     if not result:
         print('  [state: empty or error, starting fresh]')
-        return {}, set(), -1
+        return {}, set(), -1, {}
     state = {row['key']: row['value'] for row in result}
     prev_prices = state.get('prev_prices', {})
     alerted_raw = state.get('alerted_levels', [])
-    # Clean up daily alerts at market open (14:30 UTC = US open)
-    now = datetime.now(timezone.utc)
-    if now.hour == 14 and now.minute < 15:
-        # Reset daily move alerts at US market open
-        alerted_raw = [k for k in alerted_raw if '_daily_' not in k]
-        print('  [state: daily alerts reset for new trading day]')
-    alerted_levels = set(alerted_raw)
     last_summary_hour = state.get('last_summary_hour', -1)
+    snapshot = _state_values(prev_prices, alerted_raw, last_summary_hour)
+    alerted_levels = set(alerted_raw)
+    apply_session_resets(alerted_levels)
     print(f'  [state loaded: {len(prev_prices)} prices, {len(alerted_levels)} alerts]')
-    return prev_prices, alerted_levels, last_summary_hour
-
-
-def save_state(prev_prices, alerted_levels, last_summary_hour):
-    """Save tracker state to Supabase via upsert."""
-    items = [
-        {'key': 'prev_prices', 'value': prev_prices, 'updated_at': datetime.now(timezone.utc).isoformat()},
-        {'key': 'alerted_levels', 'value': list(alerted_levels), 'updated_at': datetime.now(timezone.utc).isoformat()},
-        {'key': 'last_summary_hour', 'value': last_summary_hour, 'updated_at': datetime.now(timezone.utc).isoformat()},
-    ]
-    for item in items:
-        # Upsert via POST with on_conflict
-        url = f'tracker_state?on_conflict=key'
-        req = urllib.request.Request(
-            f'{SUPABASE_URL}/rest/v1/{url}',
-            data=json.dumps(item).encode(),
-            method='POST'
-        )
-        req.add_header('apikey', SUPABASE_KEY)
-        req.add_header('Authorization', f'Bearer {SUPABASE_KEY}')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Prefer', 'resolution=merge-duplicates')
-        try:
-            urllib.request.urlopen(req)
-        except Exception as e:
-            print(f'  State save error: {e}')
+    return prev_prices, alerted_levels, last_summary_hour, snapshot
+
+
+def _reset_market(sym):
+    """Market whose session open resets a symbol's daily alerts."""
+    from market_calendar import market_for
+    return market_for(sym) or 'US'
+
+
+def apply_session_resets(alerted_levels, now=None, verbose=True):
+    """Reset daily move alerts (in place) once each market's new session opened.
+    A session_<market>_<open> marker in alerted_levels records the last reset,
+    so a delayed or skipped run still resets exactly once per session."""
+    from market_calendar import last_open
+    now = now or datetime.now(timezone.utc)
+    for market in sorted({_reset_market(sym) for sym in SYMBOLS}):
+        opened = last_open(market, now)
+        if opened is None:
+            continue
+        marker = f'session_{market}_{opened.strftime("%Y-%m-%dT%H:%M")}'
+        if marker in alerted_levels:
+            continue
+        stale = {k for k in alerted_levels
+                 if k.startswith(f'session_{market}_')
+                 or ('_daily_' in k and _reset_market(k.rsplit('_daily_', 1)[0]) == market)}
+        alerted_levels -= stale
+        alerted_levels.add(marker)
+        if verbose:
+            print(f'  [state: {market} session open, daily alerts reset]')
+
+
+def save_state(prev_prices, alerted_levels, last_summary_hour, snapshot=None):
+    """Save changed state keys to Supabase in one bulk upsert.
+    Returns the number of keys written (0 = unchanged since load, no request)."""
+    values = _state_values(prev_prices, alerted_levels, last_summary_hour)
+    snapshot = snapshot or {}
+    now = datetime.now(timezone.utc).isoformat()
+    rows = [{'key': key, 'value': values[key], 'updated_at': now}
+            for key in STATE_KEYS if key not in snapshot or snapshot[key] != values[key]]
+    if not rows:
+        return 0
+    if supabase_upsert('tracker_state', rows, on_conflict='key') is None:
+        print('  State save error')
+        return 0
+    return len(rows)
 
 
 # ── Price Fetching ──
 
-def get_prices():
-    """Fetch current prices via yfinance."""
-    import yfinance as yf
-    result = {}
-    for sym in SYMBOLS:
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            result[sym] = {
-                'price': info.get('regularMarketPrice', 0),
-                'change_pct': info.get('regularMarketChangePercent', 0),
-                'day_high': info.get('dayHigh', 0),
-                'day_low': info.get('dayLow', 0),
-                'prev_close': info.get('previousClose', 0),
-                'market_state': info.get('marketState', 'UNKNOWN'),
-            }
-        except Exception as e:
-            result[sym] = {'error': str(e)}
+def get_prices(symbols=None):
+    """Fetch current prices for all (or the given) symbols concurrently (quote-only endpoint).
+    A slow or failing symbol only gets an 'error' entry, the rest still alert."""
+    from quotes import fetch_quotes
+    result = fetch_quotes(list(symbols or SYMBOLS))
+    for sym, data in result.items():
+        if 'error' in data:
+            print(f'  {sym}: price ERROR - {data["error"]}')
     return result
 
 
-# ── Telegram ──
+# ── Alert Levels (Supabase) ──
 
-def send_telegram(text, silent=True):
-    """Send message via Telegram."""
-    data = urllib.parse.urlencode({
-        'chat_id': CHAT_ID,
-        'parse_mode': 'HTML',
-        'text': text,
-        'disable_notification': 'true' if silent else 'false',
-    }).encode()
-    req = urllib.request.Request(f'{API}/sendMessage', data=data)
-    try:
-        resp = urllib.request.urlopen(req)
-        return json.loads(resp.read())
-    except Exception as e:
-        print(f'  Telegram error: {e}')
-        return None
+def load_alert_config():
+    """Replace the built-in SYMBOLS/levels/zones with the alert_levels table.
+    Keeps the global move thresholds from ALERT_RULES."""
+    global SYMBOLS, ALERT_RULES, TRADING_ZONES, _alert_index
+    from alert_levels import load_rows, config_from_rows
+    rows = load_rows()
+    if rows is None:
+        print('  [alert levels: built-in defaults]')
+        return
+    if not rows:
+        print('  [alert levels: all deactivated, no level alerts]')
+    SYMBOLS, rules, TRADING_ZONES = config_from_rows(rows)
+    thresholds = {k: v for k, v in ALERT_RULES.items() if not isinstance(v, dict)}
+    ALERT_RULES = {**thresholds, **rules}
+    _alert_index = None
 
 
-# ── Zone Context ──
+# ── Compiled Alert Index ──
 
-def get_zone_context(sym, price_level, direction):
-    """Get AI trading context for a price level."""
-    if sym not in TRADING_ZONES:
-        return None
-    for zone in TRADING_ZONES[sym]['zones']:
-        if zone['price'] == price_level and zone['dir'] == direction:
-            type_emoji = {'BUY': '🟢', 'SELL': '🔴', 'WATCH': '👀', 'STOP': '⚠️', 'DANGER': '🔥'}.get(zone['type'], '')
-            return f'{type_emoji} {zone["note"]}'
-    return None
+ZONE_EMOJI = {'BUY': '🟢', 'SELL': '🔴', 'WATCH': '👀', 'STOP': '⚠️', 'DANGER': '🔥'}
 
 
+def compile_alert_rules(rules, zones):
+    """Compile ALERT_RULES + TRADING_ZONES into per-symbol sorted level arrays.
+    Returns {sym: {'above': (levels, lines), 'below': (levels, lines)}} where
+    levels is sorted ascending and lines holds the ready-made alert line
+    (incl. zone note) for each level, so checks are bisect range queries."""
+    index = {}
+    for sym, levels in rules.items():
+        if not isinstance(levels, dict):
+            continue
+        notes = {}
+        for zone in zones.get(sym, {}).get('zones', []):
+            # First matching zone wins (same as the old linear lookup)
+            notes.setdefault((zone['price'], zone['dir']),
+                             f'{ZONE_EMOJI.get(zone["type"], "")} {zone["note"]}')
+        entry = {}
+        for direction, label in (('above', 'ÜBER'), ('below', 'UNTER')):
+            lvls = sorted(set(levels.get(direction, [])))
+            lines = []
+            for lvl in lvls:
+                line = f'  {label} ${lvl}'
+                note = notes.get((lvl, direction))
+                if note:
+                    line += f' - {note}'
+                lines.append(line)
+            entry[direction] = (lvls, lines)
+        index[sym] = entry
+    return index
+
+
+_alert_index = None
+
+
+def get_alert_index():
+    """Compiled index of the configured rules (built once per process)."""
+    global _alert_index
+    if _alert_index is None:
+        _alert_index = compile_alert_rules(ALERT_RULES, TRADING_ZONES)
+    return _alert_index
+
+
+def crossed_levels(entry, sym, price, prev, alerted_levels):
+    """Return alert lines for levels crossed between prev and price.
+    prev <= 0 (no previous price) checks every level on the price's side."""
+    lines = []
+    lvls, texts = entry['above']
+    lo = bisect.bisect_left(lvls, prev) if prev > 0 else 0
+    hi = bisect.bisect_right(lvls, price)
+    for i in range(lo, hi):
+        key = f'{sym}_above_{lvls[i]}'
+        if key not in alerted_levels:
+            alerted_levels.add(key)
+            alerted_levels.discard(f'{sym}_below_{lvls[i]}')
+            lines.append(texts[i])
+    lvls, texts = entry['below']
+    lo = bisect.bisect_left(lvls, price)
+    hi = bisect.bisect_right(lvls, prev) if prev > 0 else len(lvls)
+    # Nearest level first when price falls
+    for i in range(hi - 1, lo - 1, -1):
+        key = f'{sym}_below_{lvls[i]}'
+        if key not in alerted_levels:
+            alerted_levels.add(key)
+            alerted_levels.discard(f'{sym}_above_{lvls[i]}')
+            lines.append(texts[i])
+    return lines
 
 
 # ── Alert Logic ──
 
-def check_alerts(prices, prev_prices, alerted_levels):
+def check_alerts(prices, prev_prices, alerted_levels, index=None, flash_ref=None):
     """Check all alert conditions. Returns list of alert messages.
     Groups multiple level crossings per symbol into ONE message.
-    Skips stale prices (unchanged from last check = market closed)."""
+    Skips stale prices (unchanged from last check = market closed).
+    flash_ref ({sym: (price, minutes ago)}) overrides the flash move baseline,
+    by default the previous check ~10 minutes ago."""
     alerts = []
+    index = index if index is not None else get_alert_index()
 
     for sym, meta in SYMBOLS.items():
         data = prices.get(sym, {})
@@ -477,41 +555,23 @@ def check_alerts(prices, prev_prices, alerted_levels):
         price_is_stale = (prev > 0 and abs(price - prev) < 0.001)
 
         # Flash move (vs previous check) - only on fresh prices
-        if not price_is_stale and prev > 0:
-            move = ((price / prev) - 1) * 100
+        ref, minutes = (flash_ref or {}).get(sym, (prev, 10))
+        if not price_is_stale and ref > 0:
+            move = ((price / ref) - 1) * 100
             if abs(move) >= ALERT_RULES['flash_move_pct']:
                 direction = '📈 SPIKE' if move > 0 else '📉 DROP'
                 alerts.append({
+                    'sym': sym, 'kind': 'flash', 'flash': True,
                     'text': (f'⚡ <b>{direction}: {meta["emoji"]} {meta["name"]}</b>\n'
-                             f'${price:.2f} ({move:+.1f}% in ~10 Min!)\n'
+                             f'${price:.2f} ({move:+.1f}% in ~{minutes} Min!)\n'
                              f'Tageschange: {change:+.1f}%'),
                     'silent': False,
                 })
 
-        # Price level crossings - grouped per symbol
+        # Price level crossings (bisect range query) - grouped per symbol
         level_lines = []
-        if sym in ALERT_RULES and not price_is_stale:
-            levels = ALERT_RULES[sym]
-            for lvl in levels.get('above', []):
-                key = f'{sym}_above_{lvl}'
-                if price >= lvl and key not in alerted_levels:
-                    alerted_levels.add(key)
-                    alerted_levels.discard(f'{sym}_below_{lvl}')
-                    zone_note = get_zone_context(sym, lvl, 'above')
-                    line = f'  ÜBER ${lvl}'
-                    if zone_note:
-                        line += f' - {zone_note}'
-                    level_lines.append(line)
-            for lvl in levels.get('below', []):
-                key = f'{sym}_below_{lvl}'
-                if price <= lvl and key not in alerted_levels:
-                    alerted_levels.add(key)
-                    alerted_levels.discard(f'{sym}_above_{lvl}')
-                    zone_note = get_zone_context(sym, lvl, 'below')
-                    line = f'  UNTER ${lvl}'
-                    if zone_note:
-                        line += f' - {zone_note}'
-                    level_lines.append(line)
+        if sym in index and not price_is_stale:
+            level_lines = crossed_levels(index[sym], sym, price, prev, alerted_levels)
 
         # Send ONE combined message per symbol for level crossings
         if level_lines:
@@ -520,7 +580,7 @@ def check_alerts(prices, prev_prices, alerted_levels):
             text = f'🚨 <b>{meta["emoji"]} {meta["name"]} - {label}!</b>\n'
             text += f'Aktuell: ${price:.2f} ({change:+.1f}%)\n\n'
             text += '\n'.join(level_lines)
-            alerts.append({'text': text, 'silent': False})
+            alerts.append({'sym': sym, 'kind': 'level', 'text': text, 'silent': False})
 
         # Big daily move - only alert once per threshold per day
         if not price_is_stale:
@@ -531,6 +591,7 @@ def check_alerts(prices, prev_prices, alerted_levels):
                     alerted_levels.add(key)
                     emoji = '🟢' if change > 0 else '🔴'
                     alerts.append({
+                        'sym': sym, 'kind': 'daily',
                         'text': (f'{emoji} <b>{meta["emoji"]} {meta["name"]}: {change:+.1f}% heute!</b>\n'
                                  f'Aktuell: ${price:.2f}\n'
                                  f'Range: ${data["day_low"]:.2f} - ${data["day_high"]:.2f}'),
@@ -549,17 +610,34 @@ def main():
     hour = now.hour
     print(f'[{now.strftime("%H:%M:%S")} UTC] Silver Hawk Check')
 
-    # Load state
-    prev_prices, alerted_levels, last_summary_hour = load_state()
+    # Load levels + state
+    with span('state'):
+        load_alert_config()
+        prev_prices, alerted_levels, last_summary_hour, snapshot = load_state()
+    outbox = Outbox(send_chunks)  # also retries messages left over from the last run
+
+    # Only fetch symbols whose market is open (or that have no price yet)
+    from market_calendar import symbols_to_fetch
+    symbols = symbols_to_fetch(SYMBOLS, prev_prices, now)
+    if not symbols:
+        print('  [all markets closed, skipping fetch]')
+        if outbox.retry:
+            with span('telegram'):
+                outbox.flush()
+        return
+    if len(symbols) < len(SYMBOLS):
+        print(f'  [markets closed for {len(SYMBOLS) - len(symbols)} symbols, fetching {len(symbols)}]')
 
     # Fetch prices
-    prices = get_prices()
+    with span('quotes'):
+        prices = get_prices(symbols)
 
-    # Check alerts
-    alerts = check_alerts(prices, prev_prices, alerted_levels)
-    for alert in alerts:
-        send_telegram(alert['text'], silent=alert['silent'])
-        print(f'  ALERT SENT: {alert["text"][:60]}...')
+    # Check alerts (queued, sent as a digest when there are many)
+    with span('alerts'):
+        for alert in check_alerts(prices, prev_prices, alerted_levels):
+            outbox.add(alert['text'], silent=alert['silent'])
+    with span('telegram'):
+        outbox.flush()
 
     # Update prev_prices
     for sym, data in prices.items():
@@ -570,9 +648,250 @@ def main():
             prev_prices[sym] = p
 
     # Save state
-    save_state(prev_prices, alerted_levels, last_summary_hour)
-    print('  [state saved]')
+    with span('save'):
+        written = save_state(prev_prices, alerted_levels, last_summary_hour, snapshot)
+    print(f'  [state saved: {written} keys]' if written else '  [state unchanged, no write]')
+
+
+# ── Daemon Mode ──
+
+class FlashWindow:
+    """Recent prices per symbol, so flash moves are measured over FLASH_WINDOW
+    seconds even though quotes are polled every few seconds."""
+
+    def __init__(self, seconds=FLASH_WINDOW):
+        self.seconds = seconds
+        self.history = {}  # sym -> [(t, price), ...] oldest first
+
+    def add(self, sym, t, price):
+        hist = self.history.setdefault(sym, [])
+        hist.append((t, price))
+        cutoff = t - self.seconds
+        while len(hist) > 1 and hist[1][0] <= cutoff:
+            hist.pop(0)
+
+    def refs(self, now):
+        """{sym: (oldest price in window, minutes ago)} for check_alerts()."""
+        return {sym: (hist[0][1], max(1, round((now - hist[0][0]) / 60)))
+                for sym, hist in self.history.items() if hist}
+
+    def reset(self, sym):
+        """Restart the window after an alert, so one move alerts only once."""
+        self.history[sym] = self.history.get(sym, [])[-1:]
+
+
+async def run_daemon(interval=DAEMON_INTERVAL, checkpoint=CHECKPOINT_INTERVAL, duration=None):
+    """Poll quotes in a loop and alert within seconds. State lives in memory
+    and is written to tracker_state every `checkpoint` seconds and on exit."""
+    import asyncio
+    import signal
+    from market_calendar import symbols_to_fetch
+    from quotes import fetch_quotes_async
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    load_alert_config()
+    prev_prices, alerted_levels, last_summary_hour, snapshot = load_state()
+    window = FlashWindow()
+    outbox = Outbox(send_chunks)
+    started = last_checkpoint = time.monotonic()
+    ticks = 0
+    print(f'  [daemon: polling every {interval}s, checkpoint every {checkpoint}s]')
+
+    while not stop.is_set():
+        tick = time.monotonic()
+        now = datetime.now(timezone.utc)
+        apply_session_resets(alerted_levels, now)
+
+        symbols = symbols_to_fetch(SYMBOLS, prev_prices, now)
+        prices = await fetch_quotes_async(symbols) if symbols else {}
+        for sym, data in prices.items():
+            if data.get('price'):
+                window.add(sym, tick, data['price'])
+        alerts = check_alerts(prices, prev_prices, alerted_levels, flash_ref=window.refs(tick))
+        for alert in alerts:
+            if alert.get('flash'):
+                window.reset(alert['sym'])
+            outbox.add(alert['text'], silent=alert['silent'])
+        if alerts or outbox.retry:
+            await asyncio.to_thread(outbox.flush)
+        for sym, data in prices.items():
+            if data.get('price'):
+                prev_prices[sym] = data['price']
+        ticks += 1
+
+        if tick - last_checkpoint >= checkpoint:
+            written = save_state(prev_prices, alerted_levels, last_summary_hour, snapshot)
+            if written:
+                snapshot = _state_values(prev_prices, alerted_levels, last_summary_hour)
+            last_checkpoint = tick
+            print(f'  [{now.strftime("%H:%M:%S")}] checkpoint: {ticks} ticks, {written} keys saved')
+            load_alert_config()  # picks up new levels (one watermark read)
+        if duration and tick - started >= duration:
+            break
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, interval - (time.monotonic() - tick)))
+        except asyncio.TimeoutError:
+            pass
+
+    written = save_state(prev_prices, alerted_levels, last_summary_hour, snapshot)
+    print(f'  [daemon stopped after {ticks} ticks, final checkpoint: {written} keys]')
+
+
+# ── Replay Mode ──
+
+REPLAY_PERIODS = {'1m': '7d', '5m': '1mo'}  # default bar history per interval
+REPLAY_CADENCE = 600  # seconds between simulated checks (cron spacing)
+BAR_SECONDS = {'1m': 60, '5m': 300}
+
+
+def _session_opens(market, start, end):
+    """Sorted session opens (epoch seconds) of a market between two epochs;
+    symbols without a known market roll over at UTC midnight."""
+    import numpy as np
+    from datetime import timedelta
+    from market_calendar import session_bounds
+    first = datetime.fromtimestamp(start, timezone.utc).date() - timedelta(days=7)
+    days = (datetime.fromtimestamp(end, timezone.utc).date() - first).days + 2
+    opens = []
+    for n in range(days):
+        d = first + timedelta(days=n)
+        if market is None:
+            opens.append(datetime(d.year, d.month, d.day, tzinfo=timezone.utc).timestamp())
+        elif bounds := session_bounds(market, d):
+            opens.append(bounds[0].timestamp())
+    return np.array(sorted(opens))
+
+
+def _replay_quotes(df, market, bar_seconds):
+    """Bars of one symbol -> quote arrays as fetch_quotes() would have seen them
+    after each bar closed: (bar end, price, change_pct vs the previous session's
+    last close, day low, day high)."""
+    import numpy as np
+    ts = df.index.values.astype('datetime64[s]').astype('int64')
+    close = df['Close'].values
+    opens = _session_opens(market, ts[0], ts[-1])
+    session = np.searchsorted(opens, ts, side='right') - 1
+    first = np.searchsorted(ts, opens[np.clip(session, 0, None)], side='left')
+    prev_close = np.where(first > 0, close[np.clip(first - 1, 0, None)], np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = np.nan_to_num((close - prev_close) / prev_close * 100)
+    day_low = df['Low'].groupby(session).cummin().values
+    day_high = df['High'].groupby(session).cummax().values
+    return ts + bar_seconds, close, change, day_low, day_high
+
+
+def replay(interval='5m', period=None, cadence=REPLAY_CADENCE, overrides=None, timeline=True):
+    """Feed stored intraday bars through check_alerts() at a simulated cadence,
+    in memory (no Telegram, no tracker_state). Below FLASH_WINDOW the daemon's
+    FlashWindow is used, otherwise flash moves compare to the previous check
+    like the cron run. Returns the replayed alerts as (time, alert) tuples."""
+    import re
+    import numpy as np
+    from collections import Counter
+    from bar_store import get_bars
+    from market_calendar import market_for
+    from outbox import DIGEST_THRESHOLD
+
+    load_alert_config()
+    ALERT_RULES.update(overrides or {})
+    period = period or REPLAY_PERIODS[interval]
+    bars = get_bars(list(SYMBOLS), period=period, interval=interval)
+    if not bars:
+        print('  [replay: no bars]')
+        return []
+
+    started = time.perf_counter()
+    syms = list(bars)
+    quotes = [_replay_quotes(bars[s], market_for(s), BAR_SECONDS[interval]) for s in syms]
+    t0 = min(q[0][0] for q in quotes)
+    t1 = max(q[0][-1] for q in quotes)
+    ticks = np.arange(t0 - t0 % cadence + cadence, t1 + cadence, cadence)
+    # Latest closed bar per symbol at every tick; only ticks where some symbol
+    # got a new bar can alert (all other prices are stale)
+    pos = np.stack([np.searchsorted(q[0], ticks, side='right') - 1 for q in quotes])
+    changed = np.any(pos != np.concatenate([np.full((len(syms), 1), -1), pos[:, :-1]], axis=1), axis=0)
+
+    index = get_alert_index()
+    window = FlashWindow() if cadence < FLASH_WINDOW else None
+    prev_prices, alerted_levels = {}, set()
+    events = []
+    messages = 0
+    for k in np.nonzero(changed)[0]:
+        tick = int(ticks[k])
+        now = datetime.fromtimestamp(tick, timezone.utc)
+        apply_session_resets(alerted_levels, now, verbose=False)
+        prices = {}
+        for i, sym in enumerate(syms):
+            j = pos[i, k]
+            if j >= 0:
+                _, close, change, low, high = quotes[i]
+                prices[sym] = {'price': float(close[j]), 'change_pct': float(change[j]),
+                               'day_low': float(low[j]), 'day_high': float(high[j])}
+                if window:
+                    window.add(sym, tick, prices[sym]['price'])
+        if prev_prices:  # the first tick only seeds prices (no stored state)
+            alerts = check_alerts(prices, prev_prices, alerted_levels, index,
+                                  flash_ref=window.refs(tick) if window else None)
+            for alert in alerts:
+                if window and alert.get('flash'):
+                    window.reset(alert['sym'])
+                events.append((now, alert))
+            messages += 1 if len(alerts) > DIGEST_THRESHOLD else len(alerts)
+        for sym, data in prices.items():
+            prev_prices[sym] = data['price']
+    elapsed = time.perf_counter() - started
+
+    if timeline:
+        for now, alert in events:
+            title = re.sub(r'<[^>]+>', '', alert['text'].split('\n', 1)[0])
+            print(f'  {now:%Y-%m-%d %H:%M} {alert["kind"]:<5} {title}')
+    kinds = Counter(alert['kind'] for _, alert in events)
+    per_sym = Counter(alert['sym'] for _, alert in events)
+    per_day = Counter(now.date() for now, _ in events)
+    first, last = datetime.fromtimestamp(t0, timezone.utc), datetime.fromtimestamp(t1, timezone.utc)
+    print(f'\n  [replay: {len(syms)} symbols, {interval} bars {first:%d.%m.} - {last:%d.%m.%Y}, '
+          f'check every {cadence:g}s, {int(changed.sum())} checks in {elapsed:.1f}s]')
+    print(f'  Alerts: {len(events)} ({", ".join(f"{n} {k}" for k, n in kinds.most_common()) or "none"}) '
+          f'-> {messages} Telegram messages')
+    if per_day:
+        day, n = per_day.most_common(1)[0]
+        print(f'  Per day: {len(events) / max(1, len(per_day)):.1f} avg on {len(per_day)} days, '
+              f'max {n} on {day:%d.%m.}')
+    for sym, n in per_sym.most_common():
+        print(f'    {sym}: {n}')
+    return events
+
+
+def _arg(name, default):
+    if name in sys.argv:
+        return float(sys.argv[sys.argv.index(name) + 1])
+    return default
 
 
 if __name__ == '__main__':
-    main()
+    from governor import report
+    if '--profile-startup' in sys.argv:
+        from startup_profile import run
+        sys.exit(run(__file__))
+    if '--daemon' in sys.argv:
+        import asyncio
+        asyncio.run(run_daemon(
+            interval=_arg('--interval', DAEMON_INTERVAL),
+            checkpoint=_arg('--checkpoint', CHECKPOINT_INTERVAL),
+            duration=_arg('--duration', None),
+        ))
+    elif '--replay' in sys.argv:
+        bars = sys.argv[sys.argv.index('--bars') + 1] if '--bars' in sys.argv else '5m'
+        period = sys.argv[sys.argv.index('--period') + 1] if '--period' in sys.argv else None
+        overrides = {key: _arg(flag, None) for flag, key in
+                     (('--flash', 'flash_move_pct'), ('--daily', 'big_daily_move_pct'))}
+        replay(bars, period, _arg('--cadence', REPLAY_CADENCE),
+               {k: v for k, v in overrides.items() if v is not None},
+               timeline='--quiet' not in sys.argv)
+    else:
+        with job_run('tracker_check', batch=True):
+            main()
+    report()
@@ -2,94 +2,149 @@
 """Silver Hawk Trading - Stock Data Updater (GitHub Actions).
 Reads active symbols from Supabase stocks table, fetches yfinance data, updates back."""
 
+import sys
 import urllib.parse
 from datetime import datetime, timezone
 
+from governor import report
 from supabase_client import supabase_request
+from telemetry import job_run, span
 
+QUOTE_WORKERS = 8
 
-def get_active_symbols():
-    """Fetch list of active symbols from stocks table."""
+
+def get_active_stocks():
+    """Fetch active symbols from stocks table."""
     result = supabase_request('GET', 'stocks?select=symbol&is_active=eq.true')
     if not result:
         return []
     return [row['symbol'] for row in result]
 
 
+def download_history(symbols):
+    """Load 1 year of daily bars for all symbols from the local bar cache.
+    Only the tail since the last stored bar is downloaded, in one batch.
+    Returns {symbol: DataFrame}; symbols without data are left out."""
+    from bar_store import get_bars
+    return get_bars(symbols, period='1y')
+
+
+def fetch_quotes(symbols):
+    """Fetch quote fields (price, change, volume) from the quote-only chart endpoint
+    plus market cap and rating from the metadata cache (Ticker.info only when expired)."""
+    from quotes import fetch_quotes as fetch_live
+    from meta_cache import get_meta
+
+    live = fetch_live(symbols, max_concurrency=QUOTE_WORKERS)
+    meta = get_meta(symbols, ('marketCap', 'recommendationKey'))
+    result = {}
+    for sym in symbols:
+        q = live.get(sym, {})
+        if 'error' in q:
+            print(f'  {sym}: quote ERROR - {q["error"]}')
+            q = {}
+        result[sym] = {
+            'regularMarketPrice': q.get('price'),
+            'regularMarketChangePercent': q.get('change_pct') if q else None,
+            'regularMarketVolume': q.get('volume'),
+            **meta[sym],
+        }
+    return result
+
+
 def fetch_stock_data(symbols):
-    """Fetch price, RSI, SMAs, and rating for each symbol via yfinance."""
-    import yfinance as yf
-    import numpy as np
+    """Fetch price, RSI, SMAs, and rating for all symbols via yfinance.
+    One batch download for a year of bars (the 3-month window is a slice of it)
+    plus concurrent quote lookups, instead of three requests per symbol."""
+    import pandas as pd
+    import indicators as ind
+
+    frames = download_history(symbols)
+    quotes = fetch_quotes(symbols)
 
     results = {}
+    # fetch_quotes() has an entry (at least the cached metadata) for every symbol:
+    # only a live price or daily bars count as data
+    fetched = [s for s in symbols if s in frames or quotes[s].get('regularMarketPrice')]
     for sym in symbols:
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            hist = t.history(period='3mo')
-
-            rsi = None
-            sma50 = None
-            sma200 = None
-
-            if len(hist) >= 14:
-                delta = hist['Close'].diff()
-                gain = delta.where(delta > 0, 0).ewm(alpha=1/14, min_periods=14).mean()
-                loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, min_periods=14).mean()
-                rs = gain / loss
-                rsi_val = float((100 - (100 / (1 + rs))).iloc[-1])
-                if not np.isnan(rsi_val):
-                    rsi = round(rsi_val, 1)
-
-            if len(hist) >= 50:
-                sma50 = round(float(hist['Close'].rolling(50).mean().iloc[-1]), 2)
-
-            hist_long = t.history(period='1y')
-            if len(hist_long) >= 200:
-                sma200 = round(float(hist_long['Close'].rolling(200).mean().iloc[-1]), 2)
-
-            rating = info.get('recommendationKey')
-            if rating:
-                rating = rating.replace('_', ' ').title()
-
-            results[sym] = {
-                'price': info.get('regularMarketPrice'),
-                'change_pct': round(info.get('regularMarketChangePercent', 0), 2),
-                'rsi': rsi,
-                'sma50': sma50,
-                'sma200': sma200,
-                'market_cap': info.get('marketCap'),
-                'volume': info.get('regularMarketVolume'),
-                'analyst_rating': rating,
-            }
-            r = results[sym]
-            print(f'  {sym}: ${r["price"]} ({r["change_pct"]:+.1f}%) RSI={rsi} SMA50={sma50} SMA200={sma200} [{rating}]')
-
-        except Exception as e:
-            print(f'  {sym}: ERROR - {e}')
+        if sym not in fetched:
+            print(f'  {sym}: ERROR - no data')
             results[sym] = None
 
+    # Indicators for all fetched symbols in one pass
+    closes = {s: frames[s]['Close'] if s in frames else pd.Series(dtype=float) for s in fetched}
+    recent = [c[c.index >= c.index[-1] - pd.DateOffset(months=3)] if len(c) else c
+              for c in closes.values()]
+    close = ind.align([c.values for c in recent])
+    close_long = ind.align([c.values for c in closes.values()])
+    rsi = ind.latest(ind.rsi(close))
+    sma50 = ind.latest(ind.sma(close, 50))
+    sma200 = ind.latest(ind.sma(close_long, 200))
+    last = ind.latest(close_long)
+    prev = ind.latest(close_long, 1)
+
+    for i, sym in enumerate(fetched):
+        info = quotes.get(sym) or {}
+        rating = info.get('recommendationKey')
+        if rating:
+            rating = rating.replace('_', ' ').title()
+
+        # Live quote first, last daily bar as fallback
+        price = info.get('regularMarketPrice') or ind.scalar(last[i], 2)
+        change_pct = info.get('regularMarketChangePercent')
+        if change_pct is None:
+            change_pct = ind.scalar((last[i] - prev[i]) / prev[i] * 100) or 0
+        volume = info.get('regularMarketVolume')
+        if volume is None and sym in frames:
+            volume = ind.scalar(frames[sym]['Volume'].iloc[-1])  # NaN on a partial bar
+            volume = int(volume) if volume is not None else None
+
+        results[sym] = {
+            'price': price,
+            'change_pct': round(change_pct, 2),
+            'rsi': ind.scalar(rsi[i], 1),
+            'sma50': ind.scalar(sma50[i], 2),
+            'sma200': ind.scalar(sma200[i], 2),
+            'market_cap': info.get('marketCap'),
+            'volume': volume,
+            'analyst_rating': rating,
+        }
+        r = results[sym]
+        print(f'  {sym}: ${r["price"]} ({r["change_pct"]:+.1f}%) RSI={r["rsi"]} SMA50={r["sma50"]} SMA200={r["sma200"]} [{rating}]')
+
     return results
 
 
 def update_supabase(data):
-    """Update stock data in Supabase."""
+    """Write all updated stock rows to Supabase in one request (update_stock_rows
+    RPC, see supabase/schema.sql). Only existing rows are updated, so a stock
+    deleted during the run is not recreated; fields without a fresh value keep
+    their old value. Falls back to one PATCH per row if the RPC is missing."""
     now = datetime.now(timezone.utc).isoformat()
-    updated = 0
+    rows = []
 
     for sym, vals in data.items():
         if vals is None:
             continue
 
-        row = {'last_updated': now}
+        row = {'symbol': sym, 'last_updated': now}
         for key in ('price', 'change_pct', 'rsi', 'sma50', 'sma200', 'market_cap', 'volume', 'analyst_rating'):
             if vals.get(key) is not None:
                 row[key] = vals[key]
+        rows.append(row)
 
-        result = supabase_request('PATCH', f'stocks?symbol=eq.{urllib.parse.quote(sym)}', row)
-        if result is not None:
-            updated += 1
+    if not rows:
+        return 0
+    updated = supabase_request('POST', 'rpc/update_stock_rows', {'rows': rows})
+    if isinstance(updated, int):
+        return updated
 
+    print('  update_stock_rows RPC unavailable, updating row by row')
+    updated = 0
+    for row in rows:
+        fields = {k: v for k, v in row.items() if k != 'symbol'}
+        if supabase_request('PATCH', f'stocks?symbol=eq.{urllib.parse.quote(row["symbol"])}', fields):
+            updated += 1
     return updated
 
 
@@ -97,18 +152,36 @@ def main():
     now = datetime.now(timezone.utc)
     print(f'[{now.strftime("%H:%M:%S")} UTC] Stock Data Update')
 
-    symbols = get_active_symbols()
+    with span('symbols'):
+        symbols = get_active_stocks()
     if not symbols:
         print('  No active symbols found.')
         return
 
+    # Closed markets have nothing new (use --all to force a full refresh)
+    if '--all' not in sys.argv:
+        from market_calendar import after_close, symbols_to_fetch
+        open_symbols = symbols_to_fetch(symbols, now=now, grace=after_close('update_stocks'))
+        if len(open_symbols) < len(symbols):
+            print(f'  Skipping {len(symbols) - len(open_symbols)} symbols (market closed)')
+        symbols = open_symbols
+        if not symbols:
+            return
+
     print(f'  Updating {len(symbols)} symbols: {", ".join(symbols)}')
 
-    data = fetch_stock_data(symbols)
-    updated = update_supabase(data)
+    with span('fetch'):
+        data = fetch_stock_data(symbols)
+    with span('update'):
+        updated = update_supabase(data)
 
     print(f'  Done! Updated {updated}/{len(symbols)} stocks.')
 
 
 if __name__ == '__main__':
-    main()
+    if '--profile-startup' in sys.argv:
+        from startup_profile import run
+        sys.exit(run(__file__))
+    with job_run('update_stocks'):
+        main()
+    report()